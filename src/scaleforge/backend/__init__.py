@@ -2,9 +2,11 @@
 
 try:
     from .torch_backend import TorchRealESRGANBackend  # noqa: F401
+    from .compiled_backend import TorchCompiledBackend  # noqa: F401
+    from .onnx_backend import OnnxRuntimeBackend  # noqa: F401
     from .vulkan_backend import VulkanBackend  # noqa: F401
 
-    __all__ = ["TorchRealESRGANBackend", "VulkanBackend"]
+    __all__ = ["TorchRealESRGANBackend", "TorchCompiledBackend", "OnnxRuntimeBackend", "VulkanBackend"]
 except Exception:  # pragma: no cover
     # Heavy deps missing – nothing exported
     pass
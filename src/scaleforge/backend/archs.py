@@ -0,0 +1,195 @@
+"""Network architecture registry for the in-process back-ends.
+
+Each model registry entry may carry an ``arch`` object naming one of the
+architectures below plus its hyper-parameters::
+
+    "arch": {"name": "srvgg", "params": {"num_conv": 32, "upscale": 4}}
+
+Built-in Real-ESRGAN models fall back to :data:`MODEL_ARCHS` when the
+registry has no entry, and unknown models default to the full RRDBNet.
+Builders receive the lazily imported :mod:`torch` module so importing this
+file never pulls in heavy dependencies.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict
+
+from scaleforge.backend.tiling import DEFAULT_BYTES_PER_PIXEL
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ArchSpec:
+    """Architecture name, hyper-parameters and native upscale factor."""
+
+    name: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def scale(self) -> int:
+        return int(self.params.get("upscale", self.params.get("scale", 4)))
+
+    @property
+    def bytes_per_pixel(self) -> int:
+        """Rough fp32 peak activation bytes per input pixel, for tile sizing."""
+        if self.name == "srvgg":
+            # A couple of live feature maps plus the pixel-shuffled output.
+            return int(self.params.get("num_feat", 64)) * 16 + self.scale**2 * 3 * 12
+        return DEFAULT_BYTES_PER_PIXEL
+
+    @property
+    def receptive_radius(self) -> int | None:
+        """Input pixels on each side that one output pixel depends on, if known.
+
+        Every 3x3 convolution at input resolution adds one pixel.
+        """
+        if self.name == "srvgg":
+            # First conv, ``num_conv`` body convs and the conv before the shuffle.
+            return int(self.params.get("num_conv", 16)) + 2
+        if self.name == "rrdbnet":
+            # Five convs per dense block and three blocks per RRDB, plus
+            # conv_first/conv_body; the upsampling convs add under two more.
+            return 15 * int(self.params.get("num_block", 23)) + 4
+        return None
+
+
+ARCHS: Dict[str, Callable[..., Any]] = {}
+
+
+def register_arch(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator registering ``builder(torch, **params)`` under ``name``."""
+
+    def deco(builder: Callable[..., Any]) -> Callable[..., Any]:
+        ARCHS[name] = builder
+        return builder
+
+    return deco
+
+
+# Real hyper-parameters of the upstream Real-ESRGAN releases.
+MODEL_ARCHS: Dict[str, ArchSpec] = {
+    "realesr-general-x4v3": ArchSpec("srvgg", {"num_feat": 64, "num_conv": 32, "upscale": 4, "act_type": "prelu"}),
+    "realesr-animevideov3": ArchSpec("srvgg", {"num_feat": 64, "num_conv": 16, "upscale": 4, "act_type": "prelu"}),
+    "realesrgan-x4plus": ArchSpec("rrdbnet", {"num_feat": 64, "num_block": 23, "num_grow_ch": 32, "scale": 4}),
+}
+
+DEFAULT_ARCH = MODEL_ARCHS["realesrgan-x4plus"]
+
+
+def arch_for_model(model_name: str, registry: Dict[str, Any] | None = None) -> ArchSpec:
+    """Return the architecture for ``model_name``.
+
+    ``registry`` defaults to :func:`scaleforge.models.registry.load_effective_registry`.
+    """
+
+    if registry is None:
+        from scaleforge.models.registry import load_effective_registry
+
+        registry = load_effective_registry()
+    entry = (registry.get("models") or {}).get(model_name) or {}
+    arch = entry.get("arch")
+    if isinstance(arch, dict) and arch.get("name"):
+        return ArchSpec(str(arch["name"]), dict(arch.get("params") or {}))
+    if model_name in MODEL_ARCHS:
+        return MODEL_ARCHS[model_name]
+    logger.warning("No architecture registered for model '%s'; assuming RRDBNet", model_name)
+    return DEFAULT_ARCH
+
+
+def models_for_scale(scale: int, registry: Dict[str, Any] | None = None) -> list[str]:
+    """Names of known models whose native upscale factor is ``scale``.
+
+    Registry entries come first (in file order), then built-in models.
+    """
+
+    if registry is None:
+        from scaleforge.models.registry import load_effective_registry
+
+        registry = load_effective_registry()
+    names = [name for name in (registry.get("models") or {}) if name not in MODEL_ARCHS]
+    names += list(MODEL_ARCHS)
+    return [name for name in names if arch_for_model(name, registry).scale == scale]
+
+
+def build_model(torch, spec: ArchSpec):
+    """Instantiate the (untrained) network described by ``spec``."""
+
+    try:
+        builder = ARCHS[spec.name]
+    except KeyError:
+        raise ValueError(f"Unknown architecture: {spec.name} (choose from {', '.join(sorted(ARCHS))})") from None
+    return builder(torch, **spec.params)
+
+
+# ---------------------------------------------------------------------------
+# Architectures
+# ---------------------------------------------------------------------------
+
+
+@register_arch("rrdbnet")
+def _build_rrdbnet(torch, *, num_in_ch: int = 3, num_out_ch: int = 3, **params):
+    try:
+        from basicsr.archs.rrdbnet_arch import RRDBNet  # type: ignore
+    except Exception as exc:  # pragma: no cover - optional path
+        raise ImportError(
+            "basicsr not installed; set SF_HEAVY_TESTS=1 and install extras to run this path"
+        ) from exc
+    return RRDBNet(num_in_ch=num_in_ch, num_out_ch=num_out_ch, **params)
+
+
+@register_arch("srvgg")
+def _build_srvgg(
+    torch,
+    *,
+    num_in_ch: int = 3,
+    num_out_ch: int = 3,
+    num_feat: int = 64,
+    num_conv: int = 16,
+    upscale: int = 4,
+    act_type: str = "prelu",
+):
+    """SRVGGNetCompact: a plain conv stack followed by a pixel shuffle.
+
+    Layer names match the upstream checkpoints (``body.<i>.weight``) so
+    released weights load strictly.
+    """
+
+    nn = torch.nn
+    functional = torch.nn.functional
+
+    def activation():
+        if act_type == "relu":
+            return nn.ReLU(inplace=True)
+        if act_type == "prelu":
+            return nn.PReLU(num_parameters=num_feat)
+        if act_type == "leakyrelu":
+            return nn.LeakyReLU(negative_slope=0.1, inplace=True)
+        raise ValueError(f"Unknown activation: {act_type}")
+
+    class SRVGGNetCompact(nn.Module):
+        def __init__(self) -> None:
+            super().__init__()
+            self.upscale = upscale
+            layers = [nn.Conv2d(num_in_ch, num_feat, 3, 1, 1), activation()]
+            for _ in range(num_conv):
+                layers += [nn.Conv2d(num_feat, num_feat, 3, 1, 1), activation()]
+            layers.append(nn.Conv2d(num_feat, num_out_ch * upscale * upscale, 3, 1, 1))
+            self.body = nn.ModuleList(layers)
+            self.upsampler = nn.PixelShuffle(upscale)
+
+        def forward(self, x):
+            out = x
+            for layer in self.body:
+                out = layer(out)
+            out = self.upsampler(out)
+            # The network only learns the residual over nearest upsampling.
+            return out + functional.interpolate(x, scale_factor=self.upscale, mode="nearest")
+
+    return SRVGGNetCompact()
+
+
+__all__ = ["ARCHS", "ArchSpec", "MODEL_ARCHS", "arch_for_model", "build_model", "models_for_scale", "register_arch"]
@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 import abc
+import inspect
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Hashable, Sequence
 
 
 
@@ -11,9 +14,91 @@ class BackendError(RuntimeError):
     pass
 
 
+@dataclass
+class BatchItem:
+    """One image of a micro-batch handed to :meth:`Backend.upscale_batch`."""
+
+    src: Path
+    dst: Path
+    job: Any = None
+
+
 class Backend(abc.ABC):
     name: str
 
+    # Backends that can run several images in one pass set this to ``True``
+    # and override :meth:`batch_key` / :meth:`upscale_batch`.
+    supports_batch: bool = False
+
+    # Backends whose upscale splits into synchronous decode / infer / encode
+    # steps set this to ``True`` so :class:`~scaleforge.pipeline.stages.StagePipeline`
+    # can overlap I/O with inference.
+    supports_stages: bool = False
+
+    # Preferred ``JobQueue`` batch size, e.g. from ``scaleforge tune``.
+    batch_size_hint: int = 1
+
+    # Backends that can pack many small images into one inference canvas set
+    # this to the most images per atlas and override :meth:`atlas_key` /
+    # :meth:`upscale_atlas`.
+    atlas_capacity: int = 0
+
     @abc.abstractmethod
     async def upscale(self, src: Path, dst: Path, scale: int = 2, tile: int | None = None) -> None:  # noqa: D401
         """Upscale one image from src to dst."""
+
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by loaded model weights (``0`` if unknown)."""
+
+        return 0
+
+    def close(self) -> None:
+        """Release model memory; the backend must not be used afterwards."""
+
+    def decode(self, src: Path, job: Any = None) -> Any:
+        """Load ``src`` and prepare it for :meth:`infer` (stage backends only)."""
+
+        raise NotImplementedError
+
+    def infer(self, decoded: Any) -> Any:
+        """Run the model on the output of :meth:`decode` (stage backends only)."""
+
+        raise NotImplementedError
+
+    def encode(self, result: Any, dst: Path) -> None:
+        """Write the output of :meth:`infer` to ``dst`` (stage backends only)."""
+
+        raise NotImplementedError
+
+    def batch_key(self, src: Path, job: Any = None) -> Hashable | None:
+        """Return the bucket ``src`` can be batched in, or ``None`` to run it alone."""
+
+        return None
+
+    def atlas_key(self, src: Path, job: Any = None) -> Hashable | None:
+        """Return the atlas group ``src`` can be packed into, or ``None`` if it is too large."""
+
+        return None
+
+    async def upscale_atlas(self, items: Sequence[BatchItem]) -> list[BaseException | None]:
+        """Upscale small ``items`` packed together; one error (or ``None``) per item."""
+
+        return await self.upscale_batch(items)
+
+    async def upscale_batch(self, items: Sequence[BatchItem]) -> list[BaseException | None]:
+        """Upscale ``items`` and return one error (or ``None``) per item.
+
+        The default implementation simply processes the items one by one.
+        """
+
+        takes_job = "job" in inspect.signature(self.upscale).parameters
+        results: list[BaseException | None] = []
+        for item in items:
+            kwargs = {"job": item.job} if takes_job else {}
+            try:
+                await self.upscale(item.src, item.dst, **kwargs)
+            except Exception as exc:  # noqa: BLE001 - reported per item
+                results.append(exc)
+            else:
+                results.append(None)
+        return results
@@ -0,0 +1,157 @@
+"""Compiled variant of the Torch back-end (``torch-compiled-*``).
+
+On CPU the network is traced with TorchScript, frozen and passed through
+:func:`torch.jit.optimize_for_inference`; the resulting module is saved under
+``<model cache>/compiled`` keyed by model, weights, precision (with the INT8
+quantization mode and calibration set), shape bucket and torch version so
+later processes load it instead of re-tracing.  On GPU devices
+:func:`torch.compile` is used with the Inductor cache pointed at the same
+directory, which makes its compiled kernels persistent as well.
+
+Compiled graphs are shape specialised, so inputs are edge-padded up to a
+multiple of ``shape_bucket`` pixels and the output is cropped back.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from scaleforge.backend.torch_backend import TorchRealESRGANBackend
+
+if TYPE_CHECKING:  # pragma: no cover - forward reference only
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _torch_tag(torch) -> str:
+    return "torch" + str(torch.__version__).split("+")[0]
+
+
+class TorchCompiledBackend(TorchRealESRGANBackend):
+    """Real-ESRGAN back-end running a compiled/frozen graph."""
+
+    name = "torch-compiled"
+
+    def __init__(
+        self,
+        model_name: str | None = None,
+        stub: bool = False,
+        *,
+        shape_bucket: int = 64,
+        **kwargs,
+    ) -> None:
+        """Initialise the backend.
+
+        ``shape_bucket`` is the padding granularity used to bound the number
+        of distinct compiled shapes; the remaining arguments are those of
+        :class:`TorchRealESRGANBackend`.
+        """
+
+        self.shape_bucket = max(1, int(shape_bucket))
+        self._compiled: dict[tuple[int, int, int], Callable] = {}
+        self._compile_lock = threading.Lock()
+        super().__init__(model_name, stub, **kwargs)
+        self._companion_options["shape_bucket"] = self.shape_bucket
+        if stub:
+            return
+
+        if self.device != "cpu":
+            os.environ.setdefault(
+                "TORCHINDUCTOR_CACHE_DIR", str(self.compile_dir / f"inductor-{_torch_tag(self._torch)}")
+            )
+            os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+            self._gpu_module = self._torch.compile(self._model, dynamic=False)
+
+    @property
+    def compile_dir(self) -> Path:
+        """Directory holding compiled artifacts, next to the model weights."""
+
+        path = Path(self.model_path).parent / "compiled"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def description(self) -> str:
+        """Human readable description for CLI output."""
+
+        if self.stub:
+            return "Stub mode (no actual upscaling)"
+        return f"PyTorch compiled ({self.device}, {self.precision}) - {self.model_name}"
+
+    def close(self) -> None:
+        """Drop compiled graphs along with the eager model."""
+
+        self._compiled.clear()
+        self.__dict__.pop("_gpu_module", None)
+        super().close()
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+    def _forward_batch(self, arr: "np.ndarray") -> "np.ndarray":
+        """Pad ``arr`` to its shape bucket and run the compiled graph."""
+
+        import numpy as np
+
+        n, h, w = arr.shape[:3]
+        step = self.shape_bucket
+        bh, bw = -(-h // step) * step, -(-w // step) * step
+        if (bh, bw) != (h, w):
+            arr = np.pad(arr, ((0, 0), (0, bh - h), (0, bw - w), (0, 0)), mode="edge")
+        module = self._compiled_for((n, bh, bw))
+
+        torch = self._torch
+        tensor = torch.from_numpy(arr.transpose(0, 3, 1, 2).copy()).to(self.device, dtype=self._dtype)
+        with torch.inference_mode():
+            out = module(tensor).clamp_(0, 1)
+        s = self._default_scale
+        return out.permute(0, 2, 3, 1).float().cpu().numpy()[:, : h * s, : w * s]
+
+    def _compiled_for(self, shape: tuple[int, int, int]) -> Callable:
+        with self._compile_lock:
+            module = self._compiled.get(shape)
+            if module is None:
+                module = self._compile(shape)
+                self._compiled[shape] = module
+        return module
+
+    def artifact_path(self, shape: tuple[int, int, int]) -> Path:
+        """Return the on-disk location of the compiled graph for ``shape``."""
+
+        n, h, w = shape
+        weights = (self._model_source(self.model_name)[1] or "")[:8]
+        # int8 graphs differ by quantization mode and calibration set.
+        precision = f"{self.precision}-{self.quantization}" if self.quantization else self.precision
+        return self.compile_dir / (
+            f"{self.model_name}-{weights}-{precision}-{self.device}-{n}x{h}x{w}-{_torch_tag(self._torch)}.pt"
+        )
+
+    def _compile(self, shape: tuple[int, int, int]) -> Callable:
+        if self.device != "cpu":
+            return self._gpu_module
+
+        torch = self._torch
+        path = self.artifact_path(shape)
+        if path.exists():
+            try:
+                logger.info("Loading compiled graph %s", path.name)
+                return torch.jit.load(str(path), map_location=self.device)
+            except Exception as exc:  # noqa: BLE001 - stale or corrupt artifact
+                logger.warning("Discarding unreadable compiled graph %s: %s", path, exc)
+
+        logger.info("Compiling %s for shape %s (one-off per machine)", self.model_name, shape)
+        example = torch.zeros(shape[0], 3, shape[1], shape[2], dtype=self._dtype)
+        with torch.no_grad():
+            traced = torch.jit.trace(self._model, example)
+            frozen = torch.jit.optimize_for_inference(torch.jit.freeze(traced.eval()))
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")  # CPU pool workers may race
+        torch.jit.save(frozen, str(tmp))
+        tmp.replace(path)
+        return frozen
+
+
+__all__ = ["TorchCompiledBackend"]
@@ -0,0 +1,191 @@
+"""Multi-process CPU inference pool.
+
+The pool forks ``workers`` processes *after* the model has been loaded so
+every worker shares the weights copy-on-write instead of loading its own
+copy.  Pixel buffers travel through :mod:`multiprocessing.shared_memory`:
+the parent writes the input into one block, allocates the output block and
+only sends the block names and shapes over a pipe, so no image data is ever
+pickled.
+
+Forking is only safe before the parent has used intra-op thread pools, so
+create the pool right after loading the model and before running inference
+in the parent.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import multiprocessing as mp
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from multiprocessing import resource_tracker
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - numpy not installed
+    np = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+_DTYPE = "float32"
+
+
+def _worker_main(
+    fn: Callable[..., Any],
+    conn: Connection,
+    initializer: Callable[[], None] | None,
+) -> None:
+    if initializer is not None:
+        initializer()
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if msg is None:
+            break
+        in_name, in_shape, out_name, out_shape, args = msg
+        in_shm = SharedMemory(name=in_name)
+        out_shm = SharedMemory(name=out_name)
+        src = dst = None
+        try:
+            src = np.ndarray(in_shape, dtype=_DTYPE, buffer=in_shm.buf)
+            dst = np.ndarray(out_shape, dtype=_DTYPE, buffer=out_shm.buf)
+            dst[...] = fn(src, *args)
+            conn.send(("ok", None))
+        except Exception as exc:  # noqa: BLE001 - forwarded to the parent
+            conn.send(("error", f"{type(exc).__name__}: {exc}"))
+        finally:
+            del src, dst
+            in_shm.close()
+            out_shm.close()
+    conn.close()
+
+
+@dataclass
+class _Worker:
+    process: Any
+    conn: Connection
+
+
+class SharedMemoryPool:
+    """Run ``fn(array, *args)`` in forked worker processes.
+
+    ``out_shape(in_shape, *args)`` must return the shape of the result so
+    the parent can allocate the output block up front.  :meth:`run` is
+    thread-safe and blocks until a worker is free, so calling it from
+    ``concurrency`` threads keeps up to ``workers`` processes busy.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[..., Any],
+        workers: int,
+        *,
+        out_shape: Callable[..., tuple[int, ...]],
+        initializer: Callable[[], None] | None = None,
+    ) -> None:
+        if np is None:  # pragma: no cover - optional path
+            raise ImportError("numpy is required for the CPU process pool")
+        if "fork" not in mp.get_all_start_methods():  # pragma: no cover - Windows
+            raise RuntimeError("The CPU process pool requires the 'fork' start method")
+        self.fn = fn
+        self.out_shape = out_shape
+        self.initializer = initializer
+        self.size = max(1, int(workers))
+        self._ctx = mp.get_context("fork")
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        # Children must share the parent's tracker, otherwise each one starts
+        # its own and "cleans up" blocks the parent still owns when it exits.
+        resource_tracker.ensure_running()
+        self._workers = [self._spawn() for _ in range(self.size)]
+        for worker in self._workers:
+            self._idle.put(worker)
+        logger.info("Started CPU inference pool with %d workers", self.size)
+
+    def _spawn(self) -> _Worker:
+        parent, child = self._ctx.Pipe()
+        proc = self._ctx.Process(target=_worker_main, args=(self.fn, child, self.initializer), daemon=True)
+        proc.start()
+        child.close()
+        return _Worker(proc, parent)
+
+    def run(self, arr: "np.ndarray", *args: Any) -> "np.ndarray":
+        """Process ``arr`` in a worker and return the result."""
+
+        if self._closed:
+            raise RuntimeError("pool is closed")
+        arr = np.ascontiguousarray(arr, dtype=_DTYPE)
+        out_shape = tuple(self.out_shape(arr.shape, *args))
+        in_shm = SharedMemory(create=True, size=max(1, arr.nbytes))
+        out_shm = SharedMemory(create=True, size=max(1, math.prod(out_shape) * arr.itemsize))
+        try:
+            view = np.ndarray(arr.shape, dtype=_DTYPE, buffer=in_shm.buf)
+            view[...] = arr
+            del view
+            status, error = self._dispatch((in_shm.name, arr.shape, out_shm.name, out_shape, args))
+            if status != "ok":
+                raise RuntimeError(f"CPU pool worker failed: {error}")
+            result = np.ndarray(out_shape, dtype=_DTYPE, buffer=out_shm.buf).copy()
+            return result
+        finally:
+            for shm in (in_shm, out_shm):
+                shm.close()
+                shm.unlink()
+
+    def _dispatch(self, msg: tuple) -> tuple[str, str | None]:
+        worker = self._idle.get()
+        try:
+            worker.conn.send(msg)
+            return worker.conn.recv()
+        except (EOFError, OSError) as exc:
+            logger.warning("CPU pool worker %s died; replacing it", worker.process.pid)
+            worker = self._replace(worker)
+            return "error", f"worker died: {exc}"
+        finally:
+            self._idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        with self._lock:
+            worker.process.join(timeout=0.1)
+            fresh = self._spawn()
+            self._workers[self._workers.index(worker)] = fresh
+            return fresh
+
+    def close(self) -> None:
+        """Stop all workers."""
+
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():  # pragma: no cover - stuck worker
+                worker.process.terminate()
+            worker.conn.close()
+
+
+def default_workers() -> int:
+    """Return the worker count from ``SCALEFORGE_CPU_WORKERS`` (``0`` = off)."""
+
+    try:
+        return max(0, int(os.getenv("SCALEFORGE_CPU_WORKERS", "0")))
+    except ValueError:
+        logger.warning("Ignoring invalid SCALEFORGE_CPU_WORKERS=%r", os.getenv("SCALEFORGE_CPU_WORKERS"))
+        return 0
+
+
+__all__ = ["SharedMemoryPool", "default_workers"]
@@ -55,13 +55,46 @@ def detect_backend(debug: bool = False) -> tuple[BackendSpec, list[str]]:
     except Exception:  # pragma: no cover - rare
         reasons.append("Vulkan check failed")
 
+    onnx_spec = _onnx_cpu_spec(has_torch, reasons)
+    if onnx_spec is not None:
+        return onnx_spec, reasons
+
     if has_torch:
         reasons.append("No GPU found; using CPU")
         return BackendSpec("torch", "eager", "cpu"), reasons
 
+    try:
+        from scaleforge.backend.numpy_backend import numpy_available
+
+        if numpy_available():
+            reasons.append("torch not installed; using the NumPy engine")
+            return BackendSpec("cpu", "numpy"), reasons
+    except Exception:  # pragma: no cover - rare
+        pass
+
     reasons.append("torch not installed; falling back to Pillow")
     return BackendSpec("cpu", "pillow"), reasons
 
+
+def _onnx_cpu_spec(has_torch: bool, reasons: list[str]) -> BackendSpec | None:
+    """Return the ONNX Runtime spec when it should replace torch eager on CPU."""
+    try:
+        from scaleforge.backend.onnx_backend import onnx_available, onnx_model_path, preferred_cpu_engine
+
+        if not onnx_available():
+            return None
+        if has_torch:
+            if preferred_cpu_engine() != "onnx-ort-cpu":
+                return None
+            reasons.append("No GPU found; ONNX Runtime benchmarked faster than torch eager")
+        else:
+            if not onnx_model_path().exists():
+                return None
+            reasons.append("torch not installed; using exported ONNX model")
+    except Exception:  # pragma: no cover - rare
+        return None
+    return BackendSpec("onnx", "ort", "cpu")
+
 def detect_gpu_vendor() -> str:
     v = get_gpu_info().get("vendor", "cpu")
     return {"nvidia": "nvidia", "amd": "amd", "apple": "apple"}.get(v, v)
@@ -0,0 +1,650 @@
+"""Shared plumbing for back-ends that run a super-resolution network in-process.
+
+Subclasses load a network and implement :meth:`NetworkBackend._forward_batch`,
+which maps an ``NxHxWxC`` float32 batch in ``[0, 1]`` to its upscaled
+counterpart.  This base class takes care of everything around it: decoding
+and encoding images, picking a tile size (per call, per job or from the
+memory budget), tiled inference, micro-batching and the optional CPU
+process pool.  Requested scales and target sizes are turned into a chain of
+native model passes plus a final resample by
+:mod:`scaleforge.pipeline.planner`; passes at another native scale run on a
+companion backend loaded from the model registry.
+
+Only the RGB channels go through the network.  An alpha channel is split off
+on decode (see :func:`split_alpha`).  It is dropped when fully opaque,
+otherwise resampled classically and recombined with the upscaled colour by
+:func:`merge_alpha`.
+"""
+
+from __future__ import annotations
+
+import abc
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Hashable, Mapping, Sequence
+
+from PIL import Image
+
+from scaleforge.backend.archs import models_for_scale
+from scaleforge.backend.base import Backend, BatchItem
+from scaleforge.backend.spec import normalize_precision
+from scaleforge.backend.tiling import (
+    DEFAULT_BYTES_PER_PIXEL,
+    DEFAULT_TILE_PAD,
+    TILE_ALIGN,
+    TiledUpscaler,
+    auto_tile_size,
+    memory_budget,
+    tile_skip_threshold,
+)
+from scaleforge.pipeline.planner import ScalePlan, Target, plan_scale
+
+if TYPE_CHECKING:  # pragma: no cover - forward reference only
+    import numpy as np
+
+    from scaleforge.backend.cpu_pool import SharedMemoryPool
+    from scaleforge.db.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Atlas packing (see NetworkBackend.atlas_key): images with no side above
+# ATLAS_MAX_SIDE are packed onto canvases ATLAS_SIDE pixels wide.  Each image
+# is framed by a gutter of its own replicated edge as wide as the network's
+# receptive radius (NetworkBackend.atlas_gutter), so neighbours never bleed in.
+ATLAS_MAX_SIDE = 128
+ATLAS_SIDE = 1024
+
+
+def pack_shelves(
+    sizes: Sequence[tuple[int, int]], width: int, gutter: int
+) -> tuple[list[tuple[int, int]], tuple[int, int]]:
+    """Shelf-pack ``(w, h)`` boxes plus ``gutter`` on every side into rows of ``width``.
+
+    Returns the top-left corner of each framed box (in input order) and the
+    ``(width, height)`` of the canvas actually used.
+    """
+
+    positions: list[tuple[int, int]] = [(0, 0)] * len(sizes)
+    x = y = shelf = used = 0
+    for idx in sorted(range(len(sizes)), key=lambda i: -sizes[i][1]):
+        w, h = sizes[idx][0] + 2 * gutter, sizes[idx][1] + 2 * gutter
+        if x and x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        positions[idx] = (x, y)
+        x += w
+        shelf = max(shelf, h)
+        used = max(used, x)
+    return positions, (used, y + shelf)
+
+
+def split_alpha(img: "Image.Image") -> tuple["Image.Image", "Image.Image | None"]:
+    """Return ``img`` as RGB plus its alpha band, or ``None`` if it is fully opaque."""
+
+    if "A" not in getattr(img, "mode", "RGB") and "transparency" not in getattr(img, "info", {}):
+        return img.convert("RGB"), None
+    rgba = img.convert("RGBA")
+    alpha = rgba.getchannel("A")
+    if alpha.getextrema()[0] == 255:
+        alpha = None
+    return rgba.convert("RGB"), alpha
+
+
+def merge_alpha(rgb: "Image.Image", alpha: "Image.Image") -> "Image.Image":
+    """Resample ``alpha`` to the size of ``rgb`` and attach it.
+
+    Binary masks (cut-out sprites, icons) are resized bilinearly and
+    re-thresholded, so they stay binary with smooth edges.  Soft masks use
+    bicubic.
+    """
+
+    import numpy as np
+
+    hist = alpha.histogram()
+    if not any(hist[1:255]):
+        mask = np.asarray(alpha.resize(rgb.size, Image.BILINEAR)) >= 128
+        band = mask.astype(np.uint8) * 255
+    else:
+        band = np.asarray(alpha.resize(rgb.size, Image.BICUBIC))
+    return Image.fromarray(np.dstack((np.asarray(rgb.convert("RGB")), band)), "RGBA")
+
+
+@dataclass
+class DecodedImage:
+    """Output of :meth:`NetworkBackend.decode`: pixels plus how to process them."""
+
+    image: "Image.Image"
+    plan: ScalePlan | None
+    tile: int | None
+    tile_pad: int
+    alpha: "Image.Image | None" = None
+    job: "Job | None" = field(default=None, repr=False)
+
+
+class NetworkBackend(Backend):
+    """Base class for in-process network back-ends (Torch, ONNX Runtime, ...)."""
+
+    supports_batch = True
+    supports_stages = True
+    model_name: str
+
+    # Native scales other than the model's own that the planner may use.
+    COMPANION_SCALES = (2, 4)
+
+    def __init__(
+        self,
+        *,
+        stub: bool = False,
+        precision: str | None = None,
+        tile: int | None = None,
+        tile_pad: int = DEFAULT_TILE_PAD,
+        memory_budget_mb: int | None = None,
+        batch_bucket: int = 32,
+    ) -> None:
+        self.stub = stub
+        self.precision = normalize_precision(precision)
+        self.tile = tile
+        self.tile_pad = tile_pad
+        self.memory_budget_mb = memory_budget_mb
+        self.batch_bucket = max(0, int(batch_bucket))
+        self._default_scale = 4
+        self.bytes_per_pixel = DEFAULT_BYTES_PER_PIXEL
+        self.skip_threshold = tile_skip_threshold()
+        try:
+            self.atlas_max_side = max(0, int(os.getenv("SCALEFORGE_ATLAS_MAX_SIDE", ATLAS_MAX_SIDE)))
+        except ValueError:
+            logger.warning("Ignoring invalid SCALEFORGE_ATLAS_MAX_SIDE=%r", os.getenv("SCALEFORGE_ATLAS_MAX_SIDE"))
+            self.atlas_max_side = ATLAS_MAX_SIDE
+        self._pool: "SharedMemoryPool | None" = None
+        self.companions: dict[int, str] | None = None
+        self._companion_backends: dict[int, NetworkBackend] = {}
+        # Subclass-specific constructor arguments companions inherit.
+        self._companion_options: dict[str, Any] = {}
+
+    def _init_engine(self) -> None:
+        """Create the tiled engine once the network is ready.
+
+        The engine shares a tile cache (see :mod:`scaleforge.backend.tile_cache`)
+        across all images this backend processes.
+        """
+
+        from scaleforge.backend.tile_cache import tile_cache_from_env
+        from scaleforge.backend.torch_backend import model_cache_dir
+
+        namespace = "|".join(
+            str(part)
+            for part in (
+                self.name,
+                self.model_name,
+                self.precision,
+                getattr(self, "quantization", None),
+                self._default_scale,
+            )
+        )
+        self._engine = TiledUpscaler(
+            self._forward,
+            self._default_scale,
+            tile=self.tile,
+            tile_pad=self.tile_pad,
+            skip_threshold=self.skip_threshold,
+            cache=tile_cache_from_env(model_cache_dir() / "tiles"),
+            cache_namespace=namespace,
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def is_available(self) -> bool:
+        """Return ``True`` if the backend is ready for use."""
+
+        return not self.stub and hasattr(self, "_engine")
+
+    def close(self) -> None:
+        """Stop the worker pool and drop the engine."""
+
+        for companion in self._companion_backends.values():
+            companion.close()
+        self._companion_backends.clear()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        self.__dict__.pop("_engine", None)
+
+    async def upscale(  # type: ignore[override] - base declares async
+        self,
+        src: Path,
+        dst: Path,
+        *,
+        scale: float | None = None,
+        tile: int | None = None,
+        job: "Job" | None = None,
+    ) -> None:
+        """Upscale ``src`` to ``dst`` using the configured model.
+
+        ``scale`` defaults to the model's native factor; a job's ``scale``
+        or ``target`` metadata takes precedence.  Decoding, inference and
+        encoding all run off the event loop.
+        """
+        import asyncio  # Lazy import to keep startup light
+
+        decoded = await asyncio.to_thread(self.decode, src, job, scale=scale, tile=tile)
+        result = await asyncio.to_thread(self.infer, decoded)
+        await asyncio.to_thread(self.encode, result, dst)
+
+    # ------------------------------------------------------------------
+    # Stages (see scaleforge.pipeline.stages)
+    # ------------------------------------------------------------------
+    def decode(
+        self,
+        src: Path,
+        job: "Job" | None = None,
+        *,
+        scale: float | None = None,
+        tile: int | None = None,
+    ) -> DecodedImage:
+        """Load ``src`` and plan its passes from ``scale`` or job metadata."""
+
+        if self.stub:
+            logger.info("Stub mode: copying %s", src)
+            return DecodedImage(Image.open(src), None, tile, self.tile_pad)
+
+        tile_pad = self.tile_pad
+        if job and job.metadata:
+            if tile is None and job.metadata.get("tile") is not None:
+                tile = int(job.metadata["tile"])
+            if job.metadata.get("tile_pad") is not None:
+                tile_pad = int(job.metadata["tile_pad"])
+
+        img, alpha = split_alpha(Image.open(src))
+        plan = self.plan_for(img.size, scale, job.metadata if job else None)
+        return DecodedImage(img, plan, tile, tile_pad, alpha, job)
+
+    def infer(self, decoded: DecodedImage) -> "Image.Image":
+        """Run the planned model passes (a no-op in stub mode).
+
+        Tile statistics are stored in the job metadata: how many tiles
+        skipped the network under ``tile_skip``, and tile cache hits under
+        ``tile_cache``.
+        """
+
+        if decoded.plan is None:
+            return decoded.image
+        plan = decoded.plan
+        logger.info(
+            "Upscaling to %dx%d via passes %s using model '%s'",
+            plan.size[0], plan.size[1], list(plan.passes), self.model_name,
+        )
+        stats: dict[str, Any] = {}
+        result = self._run_plan(decoded.image, plan, decoded.tile, decoded.tile_pad, decoded.alpha, stats)
+        report: dict[str, Any] = {}
+        if stats.get("tiles"):
+            tiles, skipped = stats["tiles"], stats["skipped"]
+            report["tile_skip"] = {"tiles": tiles, "skipped": skipped, "fraction": round(skipped / tiles, 4)}
+            logger.info("Skipped %d of %d tiles", skipped, tiles)
+        if "cache_hits" in stats:
+            hits, misses = stats["cache_hits"], stats["cache_misses"]
+            rate = round(hits / (hits + misses), 4) if hits + misses else 0.0
+            report["tile_cache"] = {"hits": hits, "misses": misses, "hit_rate": rate}
+            logger.info("Tile cache: %d hits, %d misses", hits, misses)
+        if report and decoded.job is not None:
+            decoded.job.metadata = {**(decoded.job.metadata or {}), **report}
+        if decoded.alpha is not None:
+            result = merge_alpha(result, decoded.alpha)
+        return result
+
+    def encode(self, result: "Image.Image", dst: Path) -> None:
+        """Save ``result`` to ``dst``."""
+
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        result.save(dst)
+        logger.info(f"Saved upscaled image to: {dst}")
+
+    def native_scales(self) -> tuple[int, ...]:
+        """Native factors available to the planner (own model plus companions)."""
+
+        if self.companions is None:
+            self.companions = {}
+            for scale in self.COMPANION_SCALES:
+                if scale == self._default_scale:
+                    continue
+                names = models_for_scale(scale)
+                if names:
+                    self.companions[scale] = names[0]
+        return tuple(sorted({self._default_scale, *self.companions}))
+
+    def plan_for(
+        self,
+        size: tuple[int, int],
+        scale: float | None = None,
+        metadata: Mapping[str, Any] | None = None,
+    ) -> ScalePlan:
+        """Plan the passes for a ``size`` input from ``scale`` or job metadata."""
+
+        target = None
+        if metadata:
+            if metadata.get("target"):
+                target = Target(**metadata["target"])
+            elif metadata.get("scale") is not None:
+                scale = float(metadata["scale"])
+        if scale is None and target is None:
+            scale = self._default_scale
+        return plan_scale(tuple(size), scale=scale, target=target, native_scales=self.native_scales())
+
+    def batch_key(self, src: Path, job: "Job" | None = None) -> Hashable | None:
+        """Bucket images by (padded) size; images that need tiling run alone.
+
+        Only jobs planned as a single pass of this model can be batched.
+        """
+
+        if self.stub:
+            return None
+        with Image.open(src) as im:
+            width, height = im.size
+        plan = self.plan_for((width, height), None, job.metadata if job else None)
+        if plan.passes != (self._default_scale,):
+            return None
+        step = self.batch_bucket
+        if step:
+            width = -(-width // step) * step
+            height = -(-height // step) * step
+        tile = job.metadata.get("tile") if job and job.metadata else None
+        tile = self.resolve_tile(width, height, tile)
+        if tile and tile < max(width, height):
+            return None
+        return (width, height)
+
+    @property
+    def atlas_capacity(self) -> int:  # type: ignore[override]
+        """Images per atlas canvas; ``0`` when packing is disabled.
+
+        Packing is off for architectures whose receptive field is unknown or
+        so wide (RRDBNet) that a canvas would hold a single image.
+        """
+
+        gutter = self.atlas_gutter
+        if self.stub or not self.atlas_max_side or gutter is None:
+            return 0
+        per_row = ATLAS_SIDE // (self.atlas_max_side + 2 * gutter)
+        return per_row * per_row if per_row > 1 else 0
+
+    @property
+    def atlas_gutter(self) -> int | None:
+        """Edge pixels framing each atlas image: the model's receptive radius."""
+
+        arch = getattr(self, "arch", None)
+        return arch.receptive_radius if arch is not None else None
+
+    def atlas_key(self, src: Path, job: "Job" | None = None) -> Hashable | None:
+        """Group images no larger than ``atlas_max_side`` for atlas packing.
+
+        As for batching, only jobs planned as a single pass of this model
+        qualify.
+        """
+
+        if not self.atlas_capacity:
+            return None
+        with Image.open(src) as im:
+            width, height = im.size
+        if max(width, height) > self.atlas_max_side:
+            return None
+        plan = self.plan_for((width, height), None, job.metadata if job else None)
+        if plan.passes != (self._default_scale,):
+            return None
+        return ("atlas", self._default_scale)
+
+    async def upscale_atlas(self, items: Sequence[BatchItem]) -> list[BaseException | None]:
+        """Pack ``items`` onto one canvas, upscale it once and crop the results out."""
+
+        if self.stub:
+            return await super().upscale_atlas(items)
+
+        import asyncio  # Lazy import to keep startup light
+
+        return await asyncio.to_thread(self._predict_atlas, list(items))
+
+    async def upscale_batch(self, items: Sequence[BatchItem]) -> list[BaseException | None]:
+        """Run all ``items`` through the network as one padded batch."""
+
+        if self.stub:
+            return await super().upscale_batch(items)
+
+        import asyncio  # Lazy import to keep startup light
+
+        return await asyncio.to_thread(self._predict_batch, list(items))
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+    def resolve_tile(self, width: int, height: int, tile: int | None = None, tile_pad: int | None = None) -> int:
+        """Return the tile size to use for a ``width`` x ``height`` input.
+
+        An explicit ``tile`` (per call or per job) wins, then the backend
+        default; otherwise a size is derived from the memory budget.  An
+        explicit tile too small for its padding is raised to
+        ``2 * tile_pad + TILE_ALIGN``, as :func:`auto_tile_size` does.
+        """
+
+        tile_pad = self.tile_pad if tile_pad is None else tile_pad
+        if tile is None:
+            tile = self.tile
+        if tile is not None:
+            tile = max(0, int(tile))
+            if 0 < tile <= 2 * tile_pad:
+                clamped = 2 * tile_pad + TILE_ALIGN
+                logger.warning("tile %d is too small for tile_pad %d; using %d", tile, tile_pad, clamped)
+                tile = clamped
+            return tile
+        return auto_tile_size(
+            width,
+            height,
+            self._memory_budget(),
+            scale=self._default_scale,
+            tile_pad=tile_pad,
+            bytes_per_pixel=self._bytes_per_pixel(),
+        )
+
+    def _bytes_per_pixel(self) -> int:
+        """Peak activation bytes per input pixel used for tile sizing."""
+
+        return self.bytes_per_pixel if self.precision == "fp32" else self.bytes_per_pixel // 2
+
+    def _device_free_memory(self) -> int | None:
+        """Free accelerator memory in bytes, or ``None`` for host memory."""
+
+        return None
+
+    def _memory_budget(self) -> int | None:
+        if self.memory_budget_mb:
+            return int(self.memory_budget_mb * 1024 * 1024)
+        return memory_budget(self._device_free_memory())
+
+    def _companion(self, scale: int) -> "NetworkBackend":
+        """Backend running the registry model whose native factor is ``scale``.
+
+        The companion shares this backend's settings, including worker
+        processes and quantization.
+        """
+
+        backend = self._companion_backends.get(scale)
+        if backend is None:
+            name = (self.companions or {})[scale]
+            logger.info("Loading x%d companion model '%s'", scale, name)
+            backend = type(self)(
+                model_name=name,
+                stub=self.stub,
+                precision=self.precision,
+                tile=self.tile,
+                tile_pad=self.tile_pad,
+                memory_budget_mb=self.memory_budget_mb,
+                batch_bucket=self.batch_bucket,
+                **self._companion_options,
+            )
+            backend.companions = {}
+            self._companion_backends[scale] = backend
+        return backend
+
+    def _run_plan(
+        self,
+        img: "Image.Image",
+        plan: ScalePlan,
+        tile: int | None,
+        tile_pad: int,
+        alpha: "Image.Image | None" = None,
+        stats: dict[str, int] | None = None,
+    ) -> "Image.Image":
+        """Run the model passes of ``plan`` and resample to its final size.
+
+        ``alpha`` marks transparent tiles of the first pass for skipping.
+        """
+
+        for idx, factor in enumerate(plan.passes):
+            backend = self if factor == self._default_scale else self._companion(factor)
+            img = backend._predict(img, tile, tile_pad, alpha if idx == 0 else None, stats)
+        if plan.resample:
+            img = img.resize(plan.size, Image.LANCZOS)
+        return img
+
+    def _predict(
+        self,
+        img: "Image.Image",
+        tile: int | None,
+        tile_pad: int,
+        alpha: "Image.Image | None" = None,
+        stats: dict[str, int] | None = None,
+    ) -> "Image.Image":
+        """Run tiled inference on a PIL image and return the upscaled image."""
+
+        import numpy as np
+
+        arr = np.asarray(img, dtype=np.float32) / 255.0
+        height, width = arr.shape[:2]
+        tile = self.resolve_tile(width, height, tile, tile_pad)
+        if self._pool is not None:
+            out = self._pool.run(arr, tile, tile_pad)
+        else:
+            mask = np.asarray(alpha) if alpha is not None else None
+            out = self._engine.run(arr, tile=tile, tile_pad=tile_pad, alpha=mask, stats=stats)
+        return self._to_image(out)
+
+    def _predict_batch(self, items: list[BatchItem]) -> list[BaseException | None]:
+        """Decode, pad, infer and save ``items`` with a single forward pass."""
+
+        import numpy as np
+
+        results: list[BaseException | None] = [None] * len(items)
+        arrays: dict[int, "np.ndarray"] = {}
+        alphas: dict[int, "Image.Image | None"] = {}
+        for idx, item in enumerate(items):
+            try:
+                rgb, alphas[idx] = split_alpha(Image.open(item.src))
+                arrays[idx] = np.asarray(rgb, dtype=np.float32) / 255.0
+            except Exception as exc:  # noqa: BLE001 - reported per item
+                results[idx] = exc
+        if not arrays:
+            return results
+
+        step = max(1, self.batch_bucket)
+        height = -(-max(a.shape[0] for a in arrays.values()) // step) * step
+        width = -(-max(a.shape[1] for a in arrays.values()) // step) * step
+        batch = np.stack(
+            [
+                np.pad(a, ((0, height - a.shape[0]), (0, width - a.shape[1]), (0, 0)), mode="edge")
+                for a in arrays.values()
+            ]
+        )
+        logger.info("Batched inference: %d images at %dx%d", len(arrays), width, height)
+        out = self._pool.run(batch, None, None) if self._pool is not None else self._forward_batch(batch)
+
+        s = self._default_scale
+        for (idx, arr), res in zip(arrays.items(), out):
+            dst = items[idx].dst
+            try:
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                img = self._to_image(res[: arr.shape[0] * s, : arr.shape[1] * s])
+                job = items[idx].job
+                plan = self.plan_for((arr.shape[1], arr.shape[0]), None, job.metadata if job else None)
+                if plan.resample:
+                    img = img.resize(plan.size, Image.LANCZOS)
+                if alphas[idx] is not None:
+                    img = merge_alpha(img, alphas[idx])
+                img.save(dst)
+            except Exception as exc:  # noqa: BLE001 - reported per item
+                results[idx] = exc
+        return results
+
+    def _predict_atlas(self, items: list[BatchItem]) -> list[BaseException | None]:
+        """Decode ``items``, infer them as one atlas and save each crop."""
+
+        import numpy as np
+
+        results: list[BaseException | None] = [None] * len(items)
+        arrays: dict[int, "np.ndarray"] = {}
+        alphas: dict[int, "Image.Image | None"] = {}
+        for idx, item in enumerate(items):
+            try:
+                rgb, alphas[idx] = split_alpha(Image.open(item.src))
+                arrays[idx] = np.asarray(rgb, dtype=np.float32) / 255.0
+            except Exception as exc:  # noqa: BLE001 - reported per item
+                results[idx] = exc
+        if not arrays:
+            return results
+
+        g = self.atlas_gutter
+        positions, (width, height) = pack_shelves([(a.shape[1], a.shape[0]) for a in arrays.values()], ATLAS_SIDE, g)
+        canvas = np.zeros((height, width, 3), dtype=np.float32)
+        for (x, y), arr in zip(positions, arrays.values()):
+            h, w = arr.shape[:2]
+            canvas[y : y + h + 2 * g, x : x + w + 2 * g] = np.pad(arr, ((g, g), (g, g), (0, 0)), mode="edge")
+        logger.info("Atlas inference: %d images on a %dx%d canvas", len(arrays), width, height)
+        tile = self.resolve_tile(width, height)
+        if self._pool is not None:
+            out = self._pool.run(canvas, tile, self.tile_pad)
+        else:
+            out = self._engine.run(canvas, tile=tile, tile_pad=self.tile_pad)
+
+        s = self._default_scale
+        for (idx, arr), (x, y) in zip(arrays.items(), positions):
+            item = items[idx]
+            try:
+                h, w = arr.shape[:2]
+                img = self._to_image(out[(y + g) * s : (y + g + h) * s, (x + g) * s : (x + g + w) * s])
+                plan = self.plan_for((w, h), None, item.job.metadata if item.job else None)
+                if plan.resample:
+                    img = img.resize(plan.size, Image.LANCZOS)
+                if alphas[idx] is not None:
+                    img = merge_alpha(img, alphas[idx])
+                item.dst.parent.mkdir(parents=True, exist_ok=True)
+                img.save(item.dst)
+            except Exception as exc:  # noqa: BLE001 - reported per item
+                results[idx] = exc
+        return results
+
+    def _pool_task(self, arr: "np.ndarray", tile: int | None, tile_pad: int | None) -> "np.ndarray":
+        """Entry point executed inside CPU pool workers."""
+
+        if arr.ndim == 4:
+            return self._forward_batch(arr)
+        return self._engine.run(arr, tile=tile, tile_pad=tile_pad)
+
+    def _pool_out_shape(self, shape: tuple[int, ...], *_args) -> tuple[int, ...]:
+        s = self._default_scale
+        return tuple(shape[:-3]) + (shape[-3] * s, shape[-2] * s, shape[-1])
+
+    def _forward(self, arr: "np.ndarray") -> "np.ndarray":
+        """Run the network on one ``HxWxC`` float32 tile."""
+
+        return self._forward_batch(arr[None])[0]
+
+    @abc.abstractmethod
+    def _forward_batch(self, arr: "np.ndarray") -> "np.ndarray":
+        """Run the network on an ``NxHxWxC`` float32 batch."""
+
+    @staticmethod
+    def _to_image(arr: "np.ndarray") -> "Image.Image":
+        import numpy as np
+
+        return Image.fromarray((np.clip(arr, 0.0, 1.0) * 255.0).round().astype(np.uint8))
+
+
+__all__ = ["DecodedImage", "NetworkBackend", "merge_alpha", "pack_shelves", "split_alpha"]
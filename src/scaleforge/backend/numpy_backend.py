@@ -0,0 +1,363 @@
+"""Pure-NumPy inference for the compact Real-ESRGAN models (``cpu-numpy``).
+
+``realesr-general-x4v3`` and ``realesr-animevideov3`` are SRVGGNetCompact
+networks: a stack of 3x3 convolutions with PReLU activations, then a pixel
+shuffle plus a nearest-neighbour residual.  Those operations are easy to
+express in NumPy, so this back-end gives AI upscaling on hosts that cannot
+ship torch.  Each convolution is an im2col gather followed by a single GEMM.
+The tiled engine runs tiles on a thread pool, and NumPy releases the GIL
+inside the matrix products.
+
+Weights come from the same released ``.pth`` checkpoints as the Torch
+back-end.  They are read without torch by :func:`load_pth`, which unpickles
+the zip archive with a whitelist of torch's rebuild helpers.  They are then
+converted once to ``<model>.npz`` in the model cache.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from scaleforge.backend.archs import arch_for_model
+from scaleforge.backend.network import NetworkBackend
+from scaleforge.backend.tiling import DEFAULT_TILE_PAD
+from scaleforge.backend.torch_backend import DEFAULT_MODEL, TorchRealESRGANBackend, model_cache_dir
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - numpy not installed
+    np = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Default tile when the whole image would fit: smaller tiles let the thread
+# pool work on several at once.
+PARALLEL_TILE = 256
+# Upper bound for one im2col buffer; larger inputs are convolved in row bands.
+IM2COL_BYTES = 32 * 1024 * 1024
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint loading
+# ---------------------------------------------------------------------------
+
+_STORAGE_DTYPES = {
+    "FloatStorage": "float32",
+    "DoubleStorage": "float64",
+    "HalfStorage": "float16",
+    "BFloat16Storage": "bfloat16",
+    "LongStorage": "int64",
+    "IntStorage": "int32",
+    "ShortStorage": "int16",
+    "CharStorage": "int8",
+    "ByteStorage": "uint8",
+    "BoolStorage": "bool",
+}
+
+
+class _StorageType:
+    def __init__(self, name: str) -> None:
+        self.dtype = _STORAGE_DTYPES[name]
+
+
+def _rebuild_tensor(storage, offset, size, stride, *_args):
+    itemsize = storage.dtype.itemsize
+    view = np.lib.stride_tricks.as_strided(
+        storage[offset:], shape=tuple(size), strides=tuple(s * itemsize for s in stride)
+    )
+    return np.array(view)
+
+
+def _rebuild_parameter(data, *_args):
+    return data
+
+
+class _PthUnpickler(pickle.Unpickler):
+    """Unpickle a torch checkpoint into NumPy arrays, refusing arbitrary globals."""
+
+    def __init__(self, fp, archive: zipfile.ZipFile, prefix: str) -> None:
+        super().__init__(fp)
+        self.archive = archive
+        self.prefix = prefix
+        self.storages: dict[str, Any] = {}
+
+    def find_class(self, module: str, name: str):
+        if (module, name) == ("collections", "OrderedDict"):
+            return OrderedDict
+        if module == "torch._utils" and name == "_rebuild_tensor_v2":
+            return _rebuild_tensor
+        if module == "torch._utils" and name == "_rebuild_parameter":
+            return _rebuild_parameter
+        if module == "torch" and name in _STORAGE_DTYPES:
+            return _StorageType(name)
+        raise pickle.UnpicklingError(f"Unsupported object in checkpoint: {module}.{name}")
+
+    def persistent_load(self, pid):
+        kind, storage_type, key, _location, _numel = pid
+        if kind != "storage":
+            raise pickle.UnpicklingError(f"Unsupported persistent id: {kind}")
+        if key not in self.storages:
+            raw = self.archive.read(f"{self.prefix}/data/{key}")
+            if storage_type.dtype == "bfloat16":
+                # NumPy has no bfloat16: widen to float32 by shifting the bits.
+                bits = np.frombuffer(raw, dtype="<u2").astype(np.uint32) << 16
+                self.storages[key] = bits.view(np.float32)
+            else:
+                self.storages[key] = np.frombuffer(raw, dtype=np.dtype(storage_type.dtype).newbyteorder("<"))
+        return self.storages[key]
+
+
+def load_pth(path: Path) -> dict[str, "np.ndarray"]:
+    """Read a torch ``.pth`` checkpoint (zip format) without importing torch."""
+
+    if not zipfile.is_zipfile(path):
+        raise RuntimeError(
+            f"{path.name} uses the legacy torch serialization format; re-save it with torch>=1.6 or as .npz"
+        )
+    with zipfile.ZipFile(path) as archive:
+        pkl = next((n for n in archive.namelist() if n.endswith("/data.pkl")), None)
+        if pkl is None:
+            raise RuntimeError(f"{path.name} is not a torch checkpoint")
+        with archive.open(pkl) as fp:
+            return _PthUnpickler(fp, archive, pkl.rsplit("/", 1)[0]).load()
+
+
+def load_weights(path: Path) -> dict[str, "np.ndarray"]:
+    """Load a ``.npz`` or ``.pth`` state dict, unwrapping ``params_ema``/``params``."""
+
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            return {key: data[key] for key in data.files}
+    state = load_pth(path)
+    for key in ("params_ema", "params"):  # released checkpoints nest the weights
+        if key in state:
+            state = state[key]
+            break
+    return {key: np.asarray(value, dtype=np.float32) for key, value in state.items()}
+
+
+def converted_weights_path(model_path: Path) -> Path:
+    return model_path.with_suffix(".npz")
+
+
+# ---------------------------------------------------------------------------
+# Network
+# ---------------------------------------------------------------------------
+
+
+def conv3x3(x: "np.ndarray", weight: "np.ndarray", bias: "np.ndarray") -> "np.ndarray":
+    """3x3 convolution, stride 1, zero padding 1, on an ``NxHxWxC`` batch.
+
+    ``weight`` is the ``(9*C, O)`` GEMM matrix from :func:`gemm_weight`.
+    """
+
+    n, h, w, c = x.shape
+    xp = np.pad(x, ((0, 0), (1, 1), (1, 1), (0, 0)))
+    out = np.empty((n, h, w, weight.shape[1]), dtype=np.float32)
+    rows = max(1, IM2COL_BYTES // (w * c * 9 * 4))
+    for i in range(n):
+        for y0 in range(0, h, rows):
+            y1 = min(h, y0 + rows)
+            # im2col: (rows, W, C, 3, 3) -> (rows*W, 3*3*C), then one GEMM per band
+            cols = np.lib.stride_tricks.sliding_window_view(xp[i, y0 : y1 + 2], (3, 3), axis=(0, 1))
+            cols = cols.transpose(0, 1, 3, 4, 2).reshape(-1, 9 * c)
+            np.matmul(cols, weight, out=out[i, y0:y1].reshape(-1, weight.shape[1]))
+    out += bias
+    return out
+
+
+def gemm_weight(weight: "np.ndarray") -> "np.ndarray":
+    """Reorder a torch ``(O, C, 3, 3)`` kernel into an ``(3*3*C, O)`` matrix."""
+
+    return np.ascontiguousarray(weight.transpose(2, 3, 1, 0).reshape(-1, weight.shape[0]), dtype=np.float32)
+
+
+def pixel_shuffle(x: "np.ndarray", r: int) -> "np.ndarray":
+    """NHWC equivalent of ``torch.nn.PixelShuffle(r)``."""
+
+    n, h, w, c = x.shape
+    out = x.reshape(n, h, w, c // (r * r), r, r).transpose(0, 1, 4, 2, 5, 3)
+    return out.reshape(n, h * r, w * r, c // (r * r))
+
+
+class SRVGGNumpy:
+    """SRVGGNetCompact forward pass over weights loaded as NumPy arrays."""
+
+    def __init__(self, state: dict[str, "np.ndarray"], *, upscale: int = 4, act_type: str = "prelu", **_params):
+        if act_type not in ("prelu", "relu", "leakyrelu"):
+            raise ValueError(f"Unknown activation: {act_type}")
+        self.upscale = int(upscale)
+        self.act_type = act_type
+        self.layers: list[tuple["np.ndarray", "np.ndarray", "np.ndarray | None"]] = []
+        idx = 0
+        while f"body.{idx}.weight" in state:
+            weight = state[f"body.{idx}.weight"]
+            if weight.ndim != 4:
+                raise RuntimeError(f"Expected a convolution at body.{idx}")
+            alpha = None
+            if act_type == "prelu" and f"body.{idx + 1}.weight" in state:
+                alpha = np.asarray(state[f"body.{idx + 1}.weight"], dtype=np.float32).reshape(-1)
+            self.layers.append((gemm_weight(weight), np.asarray(state[f"body.{idx}.bias"], dtype=np.float32), alpha))
+            idx += 2
+        if not self.layers:
+            raise RuntimeError("Checkpoint does not contain SRVGG body layers")
+
+    def nbytes(self) -> int:
+        return sum(w.nbytes + b.nbytes + (a.nbytes if a is not None else 0) for w, b, a in self.layers)
+
+    def __call__(self, x: "np.ndarray") -> "np.ndarray":
+        out = x
+        last = len(self.layers) - 1
+        for i, (weight, bias, alpha) in enumerate(self.layers):
+            out = conv3x3(out, weight, bias)
+            if i == last:
+                break
+            if self.act_type == "prelu":
+                out = np.maximum(out, 0) + alpha * np.minimum(out, 0)
+            elif self.act_type == "relu":
+                np.maximum(out, 0, out=out)
+            else:
+                out = np.where(out >= 0, out, 0.1 * out)
+        r = self.upscale
+        out = pixel_shuffle(out, r)
+        # The network only learns the residual over nearest upsampling.
+        return out + x.repeat(r, axis=1).repeat(r, axis=2)
+
+
+# ---------------------------------------------------------------------------
+# Backend
+# ---------------------------------------------------------------------------
+
+
+class NumpySRVGGBackend(NetworkBackend):
+    """Real-ESRGAN compact models on NumPy alone."""
+
+    name = "cpu-numpy"
+
+    def __init__(
+        self,
+        model_name: str | None = None,
+        stub: bool = False,
+        *,
+        precision: str | None = None,
+        tile: int | None = None,
+        tile_pad: int = DEFAULT_TILE_PAD,
+        memory_budget_mb: int | None = None,
+        batch_bucket: int = 32,
+        threads: int | None = None,
+    ) -> None:
+        """Initialise the backend.
+
+        Parameters
+        ----------
+        model_name:
+            Name of an SRVGG model (``realesr-general-x4v3`` by default).
+        stub:
+            When ``True`` no weights are loaded.
+        precision:
+            Accepted for interface parity; NumPy runs fp32.
+        tile, tile_pad, memory_budget_mb, batch_bucket:
+            As for :class:`~scaleforge.backend.torch_backend.TorchRealESRGANBackend`.
+        threads:
+            Tiles inferred concurrently. Defaults to ``SCALEFORGE_NUMPY_THREADS``
+            or the CPU count.
+        """
+
+        super().__init__(
+            stub=stub,
+            precision=precision,
+            tile=tile,
+            tile_pad=tile_pad,
+            memory_budget_mb=memory_budget_mb,
+            batch_bucket=batch_bucket,
+        )
+        self.model_name = model_name or DEFAULT_MODEL
+        self.device = "cpu"
+        self.arch = arch_for_model(self.model_name)
+        if self.arch.name != "srvgg":
+            raise ValueError(f"The NumPy backend runs SRVGG models only; '{self.model_name}' is {self.arch.name}")
+        self._default_scale = self.arch.scale
+        self.bytes_per_pixel = self.arch.bytes_per_pixel
+        self.threads = max(1, int(threads or os.getenv("SCALEFORGE_NUMPY_THREADS") or os.cpu_count() or 1))
+        self._companion_options = {"threads": self.threads}
+        if stub:
+            return
+        if np is None:
+            raise RuntimeError("numpy is required for the NumPy back-end. Install with `pip install numpy`.")
+        if self.precision != "fp32":
+            logger.info("Precision %s not supported by the NumPy backend; using fp32", self.precision)
+            self.precision = "fp32"
+
+        self.model_path = self._ensure_weights()
+        self._net = SRVGGNumpy(load_weights(self.model_path), **self.arch.params)
+        self._init_engine()
+        if self.threads > 1:
+            self._engine.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="sf-numpy")
+
+    def description(self) -> str:
+        """Human readable description for CLI output."""
+
+        if self.stub:
+            return "Stub mode (no actual upscaling)"
+        return f"NumPy (cpu, {self.threads} threads) - {self.model_name}"
+
+    def memory_footprint(self) -> int:
+        net = getattr(self, "_net", None)
+        return net.nbytes() if net is not None else 0
+
+    def close(self) -> None:
+        engine = getattr(self, "_engine", None)
+        if engine is not None and engine.executor is not None:
+            engine.executor.shutdown(wait=True)
+        super().close()
+        self.__dict__.pop("_net", None)
+
+    def resolve_tile(self, width: int, height: int, tile: int | None = None, tile_pad: int | None = None) -> int:
+        """As for :class:`NetworkBackend`, but split large inputs across threads."""
+
+        explicit = tile is not None or self.tile is not None
+        resolved = super().resolve_tile(width, height, tile, tile_pad)
+        if not explicit and resolved == 0 and self.threads > 1:
+            return PARALLEL_TILE
+        return resolved
+
+    def _forward_batch(self, arr: "np.ndarray") -> "np.ndarray":
+        """Run the network on an ``NxHxWxC`` float32 batch."""
+
+        return np.clip(self._net(np.asarray(arr, dtype=np.float32)), 0.0, 1.0)
+
+    def _ensure_weights(self) -> Path:
+        """Return converted ``.npz`` weights, downloading/converting the ``.pth`` once."""
+
+        pth = model_cache_dir() / f"{self.model_name}.pth"
+        npz = converted_weights_path(pth)
+        if npz.exists():
+            return npz
+        urls, expected = TorchRealESRGANBackend._model_source(self.model_name)
+        if not pth.exists():
+            if not urls:
+                raise RuntimeError(f"No weights for '{self.model_name}' in {pth.parent} (.pth or .npz)")
+            TorchRealESRGANBackend._download_first(urls, pth)
+        if expected and TorchRealESRGANBackend._sha256(pth) != expected:
+            raise RuntimeError("Model checksum verification failed")
+        try:
+            np.savez(npz, **load_weights(pth))
+        except OSError as exc:  # read-only cache: load the .pth each time
+            logger.warning("Could not cache converted weights at %s: %s", npz, exc)
+            return pth
+        logger.info("Converted %s to %s", pth.name, npz.name)
+        return npz
+
+
+__all__ = ["NumpySRVGGBackend", "SRVGGNumpy", "load_pth", "load_weights", "numpy_available"]
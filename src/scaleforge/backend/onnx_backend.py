@@ -0,0 +1,319 @@
+"""ONNX Runtime back-end for CPU deployments (``onnx-ort-cpu``).
+
+The Real-ESRGAN networks are exported to ONNX once, using the Torch back-end
+to load the weights, and the ``.onnx`` file is cached next to them.  Later
+runs only need :mod:`onnxruntime`.  Session threading and the graph
+optimisation level can be tuned per instance or through
+``SCALEFORGE_ORT_INTRA_THREADS``, ``SCALEFORGE_ORT_INTER_THREADS`` and
+``SCALEFORGE_ORT_OPT_LEVEL``.
+
+:func:`benchmark_cpu_engines` times ONNX Runtime against torch eager on this
+host and records the result so :func:`preferred_cpu_engine` (used by the
+detector) can pick the faster one without re-measuring.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from scaleforge.backend.archs import arch_for_model
+from scaleforge.backend.network import NetworkBackend
+from scaleforge.backend.tiling import DEFAULT_TILE_PAD
+from scaleforge.backend.torch_backend import DEFAULT_MODEL, TorchRealESRGANBackend, model_cache_dir
+
+if TYPE_CHECKING:  # pragma: no cover - forward reference only
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ONNX_OPSET = 17
+
+# ``SCALEFORGE_ORT_OPT_LEVEL`` values -> ``onnxruntime.GraphOptimizationLevel`` members
+ORT_OPT_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+BENCHMARK_FILE = "cpu_engine_bench.json"
+
+
+def _env_int(name: str) -> int | None:
+    value = os.getenv(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r", name, value)
+        return None
+
+
+def onnx_available() -> bool:
+    """Return ``True`` when :mod:`onnxruntime` can be imported."""
+
+    return importlib.util.find_spec("onnxruntime") is not None
+
+
+def onnx_model_path(model_name: str | None = None) -> Path:
+    """Location of the exported ``.onnx`` file for ``model_name``."""
+
+    return model_cache_dir() / f"{model_name or DEFAULT_MODEL}.onnx"
+
+
+def session_options(
+    ort,
+    *,
+    intra_threads: int | None = None,
+    inter_threads: int | None = None,
+    opt_level: str | None = None,
+):
+    """Build ``onnxruntime.SessionOptions`` from arguments or environment.
+
+    Thread counts of ``0``/``None`` leave the ONNX Runtime default in place.
+    """
+
+    if intra_threads is None:
+        intra_threads = _env_int("SCALEFORGE_ORT_INTRA_THREADS")
+    if inter_threads is None:
+        inter_threads = _env_int("SCALEFORGE_ORT_INTER_THREADS")
+    level = (opt_level or os.getenv("SCALEFORGE_ORT_OPT_LEVEL") or "all").lower()
+    if level not in ORT_OPT_LEVELS:
+        raise ValueError(f"Invalid ONNX Runtime optimisation level: {level} (choose from {', '.join(ORT_OPT_LEVELS)})")
+
+    opts = ort.SessionOptions()
+    if intra_threads:
+        opts.intra_op_num_threads = int(intra_threads)
+    if inter_threads:
+        opts.inter_op_num_threads = int(inter_threads)
+        opts.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    opts.graph_optimization_level = getattr(ort.GraphOptimizationLevel, ORT_OPT_LEVELS[level])
+    return opts
+
+
+def export_onnx(model_name: str | None = None, path: Path | None = None) -> Path:
+    """Export ``model_name`` to ONNX with dynamic batch and spatial axes.
+
+    Requires the Torch back-end dependencies; the export is written to a
+    temporary file first so concurrent exports never leave a partial model.
+    """
+
+    path = path or onnx_model_path(model_name)
+    source = TorchRealESRGANBackend(model_name, prefer_gpu=False, workers=0)
+    torch = source._torch
+    logger.info("Exporting %s to ONNX (one-off): %s", source.model_name, path)
+    dummy = torch.zeros(1, 3, 64, 64)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    axes = {0: "batch", 2: "height", 3: "width"}
+    with torch.no_grad():
+        torch.onnx.export(
+            source._model,
+            dummy,
+            str(tmp),
+            input_names=["input"],
+            output_names=["output"],
+            dynamic_axes={"input": axes, "output": axes},
+            opset_version=ONNX_OPSET,
+        )
+    tmp.replace(path)
+    source.close()
+    return path
+
+
+class OnnxRuntimeBackend(NetworkBackend):
+    """Real-ESRGAN back-end running an exported ONNX graph on the CPU."""
+
+    name = "onnx-ort"
+
+    def __init__(
+        self,
+        model_name: str | None = None,
+        stub: bool = False,
+        *,
+        precision: str | None = None,
+        tile: int | None = None,
+        tile_pad: int = DEFAULT_TILE_PAD,
+        memory_budget_mb: int | None = None,
+        batch_bucket: int = 32,
+        intra_threads: int | None = None,
+        inter_threads: int | None = None,
+        opt_level: str | None = None,
+    ) -> None:
+        """Initialise the backend.
+
+        Parameters
+        ----------
+        model_name:
+            Name of the Real-ESRGAN model to run. Exported on first use.
+        stub:
+            When ``True`` nothing is imported or exported.
+        precision:
+            Accepted for interface parity; the CPU provider runs fp32.
+        tile, tile_pad, memory_budget_mb, batch_bucket:
+            As for :class:`~scaleforge.backend.torch_backend.TorchRealESRGANBackend`.
+        intra_threads, inter_threads:
+            ONNX Runtime intra-/inter-op thread counts. Default to
+            ``SCALEFORGE_ORT_INTRA_THREADS`` / ``SCALEFORGE_ORT_INTER_THREADS``.
+        opt_level:
+            Graph optimisation level (``disable``, ``basic``, ``extended`` or
+            ``all``). Defaults to ``SCALEFORGE_ORT_OPT_LEVEL`` or ``all``.
+        """
+
+        super().__init__(
+            stub=stub,
+            precision=precision,
+            tile=tile,
+            tile_pad=tile_pad,
+            memory_budget_mb=memory_budget_mb,
+            batch_bucket=batch_bucket,
+        )
+        self.model_name = model_name or DEFAULT_MODEL
+        self.device = "cpu"
+        self.arch = arch_for_model(self.model_name)
+        self._default_scale = self.arch.scale
+        self.bytes_per_pixel = self.arch.bytes_per_pixel
+        self._companion_options = {
+            "intra_threads": intra_threads,
+            "inter_threads": inter_threads,
+            "opt_level": opt_level,
+        }
+        if stub:
+            return
+
+        if self.precision != "fp32":
+            logger.info("Precision %s not supported by ONNX Runtime on CPU; using fp32", self.precision)
+            self.precision = "fp32"
+
+        try:
+            ort = importlib.import_module("onnxruntime")
+        except ModuleNotFoundError as exc:  # pragma: no cover - import error path
+            raise RuntimeError(
+                "onnxruntime is required for the ONNX back-end. Install with `pip install onnxruntime`."
+            ) from exc
+
+        self.model_path = onnx_model_path(self.model_name)
+        if not self.model_path.exists():
+            export_onnx(self.model_name, self.model_path)
+
+        opts = session_options(
+            ort, intra_threads=intra_threads, inter_threads=inter_threads, opt_level=opt_level
+        )
+        self._session = ort.InferenceSession(
+            str(self.model_path), sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        self._input_name = self._session.get_inputs()[0].name
+        self._init_engine()
+
+    def description(self) -> str:
+        """Human readable description for CLI output."""
+
+        if self.stub:
+            return "Stub mode (no actual upscaling)"
+        return f"ONNX Runtime (cpu) - {self.model_name}"
+
+    def memory_footprint(self) -> int:
+        """Approximate model memory: the size of the ONNX graph."""
+
+        if getattr(self, "_session", None) is None:
+            return 0
+        return self.model_path.stat().st_size
+
+    def close(self) -> None:
+        """Drop the inference session."""
+
+        super().close()
+        self.__dict__.pop("_session", None)
+
+    def _forward_batch(self, arr: "np.ndarray") -> "np.ndarray":
+        """Run the network on an ``NxHxWxC`` float32 batch."""
+
+        import numpy as np
+
+        nchw = np.ascontiguousarray(arr.transpose(0, 3, 1, 2), dtype=np.float32)
+        out = self._session.run(None, {self._input_name: nchw})[0]
+        return np.clip(out, 0.0, 1.0).transpose(0, 2, 3, 1)
+
+
+# ---------------------------------------------------------------------------
+# CPU engine benchmark
+# ---------------------------------------------------------------------------
+
+
+def _benchmark_path() -> Path:
+    return model_cache_dir() / BENCHMARK_FILE
+
+
+def _time_backend(backend: NetworkBackend, size: int, runs: int) -> float:
+    import numpy as np
+
+    batch = np.random.default_rng(0).random((1, size, size, 3), dtype=np.float32)
+    backend._forward_batch(batch)  # warm-up
+    start = time.perf_counter()
+    for _ in range(runs):
+        backend._forward_batch(batch)
+    return (time.perf_counter() - start) / runs
+
+
+def benchmark_cpu_engines(model_name: str | None = None, *, size: int = 128, runs: int = 3) -> dict[str, float]:
+    """Time torch eager and ONNX Runtime on the CPU and cache the result.
+
+    Returns seconds per ``size`` x ``size`` forward pass keyed by backend
+    alias; engines that cannot be loaded are left out.
+    """
+
+    model_name = model_name or DEFAULT_MODEL
+    timings: dict[str, float] = {}
+    for alias, factory in (
+        ("torch-eager-cpu", lambda: TorchRealESRGANBackend(model_name, prefer_gpu=False, workers=0)),
+        ("onnx-ort-cpu", lambda: OnnxRuntimeBackend(model_name)),
+    ):
+        try:
+            backend = factory()
+        except Exception as exc:  # noqa: BLE001 - engine unavailable here
+            logger.info("Skipping %s in CPU benchmark: %s", alias, exc)
+            continue
+        try:
+            timings[alias] = _time_backend(backend, size, runs)
+        finally:
+            backend.close()
+
+    path = _benchmark_path()
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        data = {}
+    data[model_name] = timings
+    path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    return timings
+
+
+def preferred_cpu_engine(model_name: str | None = None) -> str | None:
+    """Return the faster CPU alias from a cached benchmark, if one exists."""
+
+    try:
+        data = json.loads(_benchmark_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    timings = data.get(model_name or DEFAULT_MODEL) or {}
+    if not timings:
+        return None
+    return min(timings, key=timings.get)
+
+
+__all__ = [
+    "OnnxRuntimeBackend",
+    "benchmark_cpu_engines",
+    "export_onnx",
+    "onnx_available",
+    "onnx_model_path",
+    "preferred_cpu_engine",
+    "session_options",
+]
@@ -0,0 +1,195 @@
+"""Classical Pillow resampling back-end (``cpu-pillow``).
+
+This is the fallback on hosts without torch: the same resample modes as
+``scaleforge demo upscale``, with no network involved.  Pillow releases the
+GIL while it resamples, so large outputs are split into horizontal strips
+that are resized on a thread pool.  Each strip is cut from the source with
+enough extra rows for the filter kernel, and the sub-pixel ``box`` keeps
+the filter centred where a single full-image resize centres it; outputs
+differ by floating-point rounding only (at most one level), so strip seams
+are invisible.  Nearest-neighbour picks a source row by flooring, which
+that rounding can tip at fractional scales, so it always runs as one
+resize; it is cheap enough not to need threads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from PIL import Image
+
+from scaleforge.backend.base import Backend
+from scaleforge.pipeline.planner import Target, normalize_scale, output_size
+
+logger = logging.getLogger(__name__)
+
+RESAMPLE_MODES = {
+    "nearest": Image.NEAREST,
+    "bilinear": Image.BILINEAR,
+    "bicubic": Image.BICUBIC,
+    "lanczos": Image.LANCZOS,
+}
+# Kernel radius in source pixels at scale 1 (Pillow's filter supports).
+_FILTER_SUPPORT = {
+    Image.NEAREST: 0.5,
+    Image.BILINEAR: 1.0,
+    Image.BICUBIC: 2.0,
+    Image.LANCZOS: 3.0,
+}
+# Outputs smaller than this are resized in one call; threads would not pay off.
+MIN_PARALLEL_PIXELS = 1 << 20
+MIN_STRIP_ROWS = 64
+
+
+def resize_strips(
+    image: "Image.Image",
+    size: tuple[int, int],
+    resample: int,
+    *,
+    strips: int,
+    executor: Executor | None = None,
+) -> "Image.Image":
+    """Resize ``image`` to ``size`` as ``strips`` horizontal bands.
+
+    Parameters
+    ----------
+    image:
+        Source image.
+    size:
+        Output ``(width, height)``.
+    resample:
+        Pillow resampling filter.
+    strips:
+        Number of bands; ``1`` is a plain :meth:`Image.resize`.  Ignored
+        for ``Image.NEAREST``, which is always one resize.
+    executor:
+        Runs the bands concurrently; sequential when ``None``.
+    """
+
+    out_w, out_h = size
+    strips = max(1, min(int(strips), out_h // MIN_STRIP_ROWS))
+    if strips == 1 or resample == Image.NEAREST:
+        return image.resize(size, resample)
+
+    src_w, src_h = image.width, image.height
+    ratio = src_h / out_h
+    # Downscaling widens the kernel by the reduction factor.
+    margin = _FILTER_SUPPORT.get(resample, 3.0) * max(1.0, ratio) + 1
+    bounds = [round(i * out_h / strips) for i in range(strips + 1)]
+
+    def band(top: int, bottom: int) -> "Image.Image":
+        y0, y1 = top * ratio, bottom * ratio
+        c0 = max(0, math.floor(y0 - margin))
+        c1 = min(src_h, math.ceil(y1 + margin))
+        region = image.crop((0, c0, src_w, c1))
+        return region.resize((out_w, bottom - top), resample, box=(0, y0 - c0, src_w, y1 - c0))
+
+    pairs = list(zip(bounds, bounds[1:]))
+    if executor is None:
+        bands = [band(top, bottom) for top, bottom in pairs]
+    else:
+        bands = list(executor.map(lambda p: band(*p), pairs))
+    out = Image.new(bands[0].mode, size)
+    for (top, _), part in zip(pairs, bands):
+        out.paste(part, (0, top))
+    return out
+
+
+class PillowBackend(Backend):
+    """Pillow resampling back-end with strip-parallel resizing."""
+
+    name = "cpu-pillow"
+    supports_stages = True
+
+    def __init__(self, mode: str | None = None, *, threads: int | None = None, stub: bool = False) -> None:
+        """Initialise the backend.
+
+        Parameters
+        ----------
+        mode:
+            ``nearest``, ``bilinear``, ``bicubic`` or ``lanczos`` (default,
+            or ``SCALEFORGE_PILLOW_MODE``).
+        threads:
+            Strip worker threads; defaults to the CPU count.
+        stub:
+            Accepted for parity with the other backends; resampling is cheap
+            enough to run for real.
+        """
+
+        mode = (mode or os.getenv("SCALEFORGE_PILLOW_MODE") or "lanczos").lower()
+        if mode not in RESAMPLE_MODES:
+            raise ValueError(f"Invalid resample mode: {mode} (choose from {', '.join(RESAMPLE_MODES)})")
+        self.mode = mode
+        self.resample = RESAMPLE_MODES[mode]
+        self.threads = max(1, int(threads or os.cpu_count() or 1))
+        self.stub = stub
+        self._executor: ThreadPoolExecutor | None = None
+
+    def is_available(self) -> bool:
+        return True
+
+    def description(self) -> str:
+        return f"Pillow {self.mode} resampling ({self.threads} threads)"
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+    def decode(self, src: Path, job: Any = None, *, scale: float | None = None) -> tuple["Image.Image", tuple[int, int]]:
+        """Load ``src`` and work out its output size from the job metadata."""
+
+        meta = getattr(job, "metadata", None) or {}
+        target = meta.get("target")
+        img = Image.open(src)
+        mode = getattr(img, "mode", "RGB")
+        if mode not in ("RGB", "RGBA", "L", "LA"):
+            has_alpha = "A" in mode or "transparency" in getattr(img, "info", {})
+            img = img.convert("RGBA" if has_alpha else "RGB")
+        size = output_size(
+            (img.width, img.height),
+            scale=normalize_scale(scale or meta.get("scale")),
+            target=Target(**target) if target else None,
+        )
+        return img, size
+
+    def infer(self, decoded: tuple["Image.Image", tuple[int, int]]) -> "Image.Image":
+        img, size = decoded
+        if size == (img.width, img.height):
+            return img
+        if self.threads == 1 or size[0] * size[1] < MIN_PARALLEL_PIXELS:
+            return img.resize(size, self.resample)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="sf-pillow")
+        return resize_strips(img, size, self.resample, strips=self.threads, executor=self._executor)
+
+    def encode(self, result: "Image.Image", dst: Path) -> None:
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        result.save(dst)
+
+    # ------------------------------------------------------------------
+    async def upscale(
+        self,
+        src: Path,
+        dst: Path,
+        scale: float | None = None,
+        tile: int | None = None,
+        job: Any = None,
+    ) -> None:
+        """Resize ``src`` by ``scale`` (or the job's scale/target) into ``dst``."""
+
+        decoded = await asyncio.to_thread(self.decode, src, job, scale=scale)
+        result = await asyncio.to_thread(self.infer, decoded)
+        await asyncio.to_thread(self.encode, result, dst)
+
+
+__all__ = ["PillowBackend", "RESAMPLE_MODES", "resize_strips"]
@@ -0,0 +1,146 @@
+"""INT8 quantization of the Torch networks for CPU inference.
+
+Two modes are supported:
+
+``dynamic``
+    Convolution weights are stored as int8 and activations are quantized on
+    the fly per forward pass.  No calibration data is needed.
+``static``
+    The model is prepared with FX graph-mode quantization, observers are
+    calibrated on sample images (or synthetic noise when none are given)
+    and weights *and* activations run in int8.  Faster, but quality depends
+    on the calibration set.
+
+Quantizing is not free, so the resulting state dict is cached next to the
+fp32 weights and reloaded into a freshly prepared skeleton on later runs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from pathlib import Path
+from typing import Iterable, Sequence
+
+logger = logging.getLogger(__name__)
+
+QUANT_MODES = ("dynamic", "static")
+DEFAULT_QUANT_MODE = "dynamic"
+CALIBRATION_SIZE = 64
+
+
+def normalize_quant_mode(mode: str | None) -> str:
+    """Return the canonical quantization mode, defaulting to ``dynamic``."""
+    if not mode:
+        return DEFAULT_QUANT_MODE
+    value = mode.lower()
+    if value not in QUANT_MODES:
+        raise ValueError(f"Invalid quantization mode: {mode} (choose from {', '.join(QUANT_MODES)})")
+    return value
+
+
+def calibration_tag(images: Sequence[Path] | None) -> str:
+    """Short stable tag identifying a calibration set (``synthetic`` if empty)."""
+    if not images:
+        return "synthetic"
+    digest = hashlib.sha256()
+    for path in sorted(Path(p) for p in images):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}".encode())
+    return digest.hexdigest()[:8]
+
+
+def quantized_weights_path(model_path: Path, mode: str, images: Sequence[Path] | None = None) -> Path:
+    """Where the quantized state dict for ``model_path`` is cached."""
+    tag = "dynamic" if mode == "dynamic" else f"static-{calibration_tag(images)}"
+    return Path(model_path).with_name(f"{Path(model_path).stem}.int8-{tag}.pth")
+
+
+def _calibration_batches(torch, images: Sequence[Path] | None) -> Iterable:
+    """Yield ``1x3xHxW`` float tensors for observer calibration."""
+    if not images:
+        generator = torch.Generator().manual_seed(0)
+        for _ in range(4):
+            yield torch.rand(1, 3, CALIBRATION_SIZE, CALIBRATION_SIZE, generator=generator)
+        return
+
+    import numpy as np
+    from PIL import Image
+
+    for path in images:
+        img = Image.open(path).convert("RGB")
+        img.thumbnail((CALIBRATION_SIZE * 4, CALIBRATION_SIZE * 4))
+        arr = np.asarray(img, dtype=np.float32) / 255.0
+        yield torch.from_numpy(arr.transpose(2, 0, 1).copy())[None]
+
+
+def _skeleton(torch, model, mode: str):
+    """Return ``model`` prepared for ``mode`` (observers not yet calibrated)."""
+    if mode == "dynamic":
+        from torch.ao.nn.quantized import dynamic as nnqd
+        from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic
+
+        return quantize_dynamic(
+            model,
+            qconfig_spec={torch.nn.Conv2d: default_dynamic_qconfig},
+            mapping={torch.nn.Conv2d: nnqd.Conv2d},
+            dtype=torch.qint8,
+        )
+
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx
+
+    example = torch.zeros(1, 3, CALIBRATION_SIZE, CALIBRATION_SIZE)
+    return prepare_fx(model, get_default_qconfig_mapping("x86"), (example,))
+
+
+def quantize_model(
+    torch,
+    model,
+    model_path: Path,
+    mode: str = DEFAULT_QUANT_MODE,
+    calibration_images: Sequence[Path] | None = None,
+):
+    """Return an int8 version of the fp32 ``model`` loaded from ``model_path``.
+
+    The quantized state dict is cached beside ``model_path``; when it exists
+    the calibration pass is skipped entirely.
+    """
+    mode = normalize_quant_mode(mode)
+    model = model.float().eval()
+    cache = quantized_weights_path(model_path, mode, calibration_images)
+
+    prepared = _skeleton(torch, model, mode)
+    if mode == "static":
+        from torch.ao.quantization.quantize_fx import convert_fx
+
+        if not cache.exists():
+            logger.info("Calibrating static INT8 quantization for %s", Path(model_path).name)
+            with torch.inference_mode():
+                for batch in _calibration_batches(torch, calibration_images):
+                    prepared(batch)
+        prepared = convert_fx(prepared)
+
+    if cache.exists():
+        try:
+            prepared.load_state_dict(torch.load(str(cache), map_location="cpu"))
+            logger.info("Loaded cached INT8 weights %s", cache.name)
+            return prepared.eval()
+        except Exception as exc:  # noqa: BLE001 - stale cache from another torch
+            logger.warning("Discarding unusable INT8 cache %s: %s", cache, exc)
+            cache.unlink(missing_ok=True)
+            return quantize_model(torch, model, model_path, mode, calibration_images)
+
+    tmp = cache.with_suffix(".tmp")
+    torch.save(prepared.state_dict(), str(tmp))
+    tmp.replace(cache)
+    return prepared.eval()
+
+
+__all__ = [
+    "QUANT_MODES",
+    "calibration_tag",
+    "normalize_quant_mode",
+    "quantize_model",
+    "quantized_weights_path",
+]
@@ -5,13 +5,23 @@ stubbed) and a placeholder VulkanBackend.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+import threading
 import warnings
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
 
 from scaleforge.backend.base import Backend
-from scaleforge.backend.spec import BackendSpec, parse_alias
+from scaleforge.backend.compiled_backend import TorchCompiledBackend
+from scaleforge.backend.numpy_backend import NumpySRVGGBackend
+from scaleforge.backend.onnx_backend import OnnxRuntimeBackend
+from scaleforge.backend.pillow_backend import PillowBackend
+from scaleforge.backend.spec import BackendSpec, normalize_precision, parse_alias
 from scaleforge.backend.torch_backend import TorchBackend
+from scaleforge.backend.tuner import QUICK_TILES, autotune_enabled, load_tuning, tune_backend
 from scaleforge.backend.vulkan_backend import VulkanBackend
 
 logger = logging.getLogger(__name__)
@@ -70,7 +80,7 @@ def get_backend_alias(backend: str | BackendSpec | None = None, *, debug: bool =
 
     device_override = os.getenv("SCALEFORGE_DEVICE")
     if device_override:
-        spec = BackendSpec(spec.vendor, spec.engine, device_override)
+        spec = BackendSpec(spec.vendor, spec.engine, device_override, spec.precision)
         reasons.append(f"SCALEFORGE_DEVICE={device_override}")
 
     return spec.alias, reasons
@@ -81,18 +91,244 @@ def detect_backend(debug: bool = False) -> tuple[BackendSpec, list[str]]:
     return parse_alias(alias), reasons
 
 
+@dataclass
+class _CacheEntry:
+    backend: Backend
+    leases: int = 0
+
+
+class BackendCache:
+    """Process-wide LRU cache of constructed backends.
+
+    Keeps at most ``max_items`` backends and, when ``max_bytes`` is set, at
+    most that much model memory (as reported by
+    :meth:`Backend.memory_footprint`).
+
+    :meth:`get` and :meth:`put` with ``lease=True`` hand out a lease on the
+    backend, returned with :meth:`release`.  Eviction only drops the entry:
+    a backend is closed, freeing its worker processes, shared memory and
+    device weights, once it is out of the cache and its last lease has been
+    released.
+    """
+
+    def __init__(self, max_items: int = 4, max_bytes: int = 0) -> None:
+        self.max_items = max(1, int(max_items))
+        self.max_bytes = max(0, int(max_bytes))
+        self._items: OrderedDict[Hashable, _CacheEntry] = OrderedDict()
+        # Backends dropped from the cache while still leased, by id().
+        self._retired: dict[int, _CacheEntry] = {}
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable, *, lease: bool = False) -> Backend | None:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            self._items.move_to_end(key)
+            entry.leases += lease
+            return entry.backend
+
+    def put(self, key: Hashable, backend: Backend, *, lease: bool = False) -> None:
+        with self._lock:
+            self._items[key] = _CacheEntry(backend, int(lease))
+            self._items.move_to_end(key)
+            closing = [entry.backend for entry in self._evict() if self._retire(entry)]
+        for old in closing:
+            old.close()
+
+    def release(self, target: Hashable | Backend) -> bool:
+        """Return a lease on ``target`` (a key or a backend) and drop it from the cache.
+
+        The backend is closed once no other lease holds it.
+        """
+        with self._lock:
+            entry = self._retired.get(id(target))
+            if entry is None or entry.backend is not target:
+                entry = None
+                for key, cached in list(self._items.items()):
+                    if key == target or cached.backend is target:
+                        entry = self._items.pop(key)
+                        break
+            if entry is None:
+                return False
+            entry.leases = max(0, entry.leases - 1)
+            close = self._retire(entry)
+        if close:
+            entry.backend.close()
+        return True
+
+    def clear(self) -> None:
+        """Drop every entry, closing the backends no lease holds."""
+        with self._lock:
+            closing = [entry for entry in self._items.values() if self._retire(entry)]
+            self._items.clear()
+        for entry in closing:
+            entry.backend.close()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(entry.backend.memory_footprint() for entry in self._items.values())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _retire(self, entry: _CacheEntry) -> bool:
+        """Forget an entry that left the cache; ``True`` when it should be closed now."""
+        if entry.leases:
+            self._retired[id(entry.backend)] = entry
+            return False
+        self._retired.pop(id(entry.backend), None)
+        return True
+
+    def _evict(self) -> list[_CacheEntry]:
+        """Drop least recently used entries over the limits and return them."""
+        evicted = []
+        while len(self._items) > self.max_items or (
+            self.max_bytes and len(self._items) > 1 and self.total_bytes() > self.max_bytes
+        ):
+            key, entry = self._items.popitem(last=False)
+            logger.info("Evicting cached backend %s", key)
+            evicted.append(entry)
+        return evicted
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r", name, os.getenv(name))
+        return default
+
+
+_CACHE = BackendCache(
+    max_items=_env_int("SCALEFORGE_BACKEND_CACHE_SIZE", 4),
+    max_bytes=_env_int("SCALEFORGE_BACKEND_CACHE_MB", 0) * 1024 * 1024,
+)
+
+
+def release(target: Hashable | Backend) -> bool:
+    """Return a backend obtained from :func:`get_backend` once done with it.
+
+    The backend leaves the cache and is closed when no other caller holds it.
+    """
+    return _CACHE.release(target)
+
+
+def clear_backend_cache() -> None:
+    """Forget every cached backend, closing those no caller holds."""
+    _CACHE.clear()
+
+
+def _tuned_kwargs(alias: str, model_name: str | None) -> dict:
+    """Constructor overrides from a stored ``scaleforge tune`` result."""
+    tuning = load_tuning(alias, model_name)
+    if not tuning:
+        return {}
+    kwargs = {"tile": int(tuning.get("tile", 0)), "batch_size": int(tuning.get("batch_size", 1))}
+    # An explicit worker count in the environment beats the tuned one.
+    if alias.endswith("-cpu") and alias.startswith("torch-") and not os.getenv("SCALEFORGE_CPU_WORKERS"):
+        kwargs["workers"] = int(tuning.get("workers", 1))
+    logger.debug("Applying tuned settings for %s/%s: %s", alias, model_name, kwargs)
+    return kwargs
+
+
+def _build_backend(
+    alias: str, model_name: str | None, precision: str, use_stub: bool, tuned: dict | None = None
+) -> Backend:
+    tuned = dict(tuned or {})
+    batch_size = tuned.pop("batch_size", 1)
+    backend = _construct_backend(alias, model_name, precision, use_stub, tuned)
+    if batch_size > 1 and backend.supports_batch:
+        backend.batch_size_hint = batch_size
+    return backend
+
+
+def _construct_backend(alias: str, model_name: str | None, precision: str, use_stub: bool, tuned: dict) -> Backend:
+    if alias.startswith("cpu-numpy"):
+        logger.info("Using NumPy backend (%s)", alias)
+        return NumpySRVGGBackend(model_name=model_name, stub=use_stub, precision=precision, **tuned)
+    if alias.startswith("cpu-pillow"):
+        logger.info("Using Pillow resampling backend (%s)", alias)
+        return PillowBackend(stub=use_stub)
+    if alias.startswith("torch-compiled"):
+        logger.info("Using compiled Torch backend (%s, %s)", alias, precision)
+        return TorchCompiledBackend(model_name=model_name, stub=use_stub, precision=precision, **tuned)
+    if alias.startswith("onnx-"):
+        logger.info("Using ONNX Runtime backend (%s)", alias)
+        tuned.pop("workers", None)
+        return OnnxRuntimeBackend(model_name=model_name, stub=use_stub, precision=precision, **tuned)
+    if alias.startswith("torch-"):
+        logger.info("Using Torch backend (%s, %s)", alias, precision)
+        return TorchBackend(model_name=model_name, stub=use_stub, precision=precision, **tuned)
+    if "vulkan" in alias or alias.startswith("ncnn-"):
+        logger.info("Using Vulkan backend (%s)", alias)
+        return VulkanBackend(tile=tuned.get("tile"), model_name=model_name)
+    logger.warning("Unknown backend '%s' – defaulting to Vulkan backend", alias)
+    return VulkanBackend(tile=tuned.get("tile"), model_name=model_name)
+
+
+def _first_run_tune(instance: Backend, alias: str, model_name: str | None) -> None:
+    """Tune a freshly built backend once, before it serves a user job."""
+    if not autotune_enabled() or getattr(instance, "stub", False) or not instance.is_available():
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:  # the sweep needs its own event loop; tune later via ``scaleforge tune``
+        logger.info("Skipping autotune for %s inside a running event loop", alias)
+        return
+    logger.info("No tuned settings for %s/%s; running a quick tuning pass", alias, model_name)
+    try:
+        settings, _results = tune_backend(
+            instance, alias, model_name, tiles=QUICK_TILES, batch_sizes=(1,), image_size=(384, 384), runs=1
+        )
+    except Exception as exc:  # noqa: BLE001 - tuning is best effort
+        logger.warning("Autotune failed for %s: %s", alias, exc)
+        return
+    if settings and hasattr(instance, "tile"):
+        instance.tile = settings["tile"]
+
+
 def get_backend(
     model_name: str | None = None,
     backend: str | BackendSpec | None = None,
+    precision: str | None = None,
+    *,
+    cache: bool = True,
 ) -> Backend:
-    """Return a Backend instance following the selection rules."""
+    """Return a Backend instance following the selection rules.
+
+    ``precision`` (``fp32``/``fp16``/``bf16``) falls back to the precision of
+    a given :class:`BackendSpec`, then ``SCALEFORGE_PRECISION``.  Backends
+    downgrade it when the device cannot run it.
+
+    Instances are cached per (model, backend alias, precision) so repeated
+    calls return a warm backend; pass ``cache=False`` for a private one.
+    Each call takes a lease on the cached backend: hand it back with
+    :func:`release` so it can be closed once evicted.
+
+    Settings stored by ``scaleforge tune`` (see :mod:`scaleforge.backend.tuner`)
+    are passed to the constructor.  Without them, a newly cached backend is
+    tuned once on synthetic images when ``SCALEFORGE_AUTOTUNE=1``.
+    """
     use_stub = os.getenv("SF_STUB_UPSCALE", "0") == "1"
+    if precision is None and isinstance(backend, BackendSpec):
+        precision = backend.precision
+    precision = normalize_precision(precision or os.getenv("SCALEFORGE_PRECISION"))
     alias, _reasons = get_backend_alias(backend)
-    if alias.startswith("torch-"):
-        logger.info("Using Torch backend (%s)", alias)
-        return TorchBackend(model_name=model_name, stub=use_stub)
-    if "vulkan" in alias or alias.startswith("ncnn-"):
-        logger.info("Using Vulkan backend (%s)", alias)
-        return VulkanBackend()
-    logger.warning("Unknown backend '%s' – defaulting to Vulkan backend", alias)
-    return VulkanBackend()
+    tuned = None if use_stub else _tuned_kwargs(alias, model_name)
+    if not cache:
+        return _build_backend(alias, model_name, precision, use_stub, tuned)
+
+    spec = parse_alias(alias)
+    key = (model_name, spec.device, precision, f"{spec.vendor}-{spec.engine}", use_stub)
+    instance = _CACHE.get(key, lease=True)
+    if instance is None:
+        instance = _build_backend(alias, model_name, precision, use_stub, tuned)
+        if not use_stub and not tuned:
+            _first_run_tune(instance, alias, model_name)
+        _CACHE.put(key, instance, lease=True)
+    else:
+        logger.debug("Reusing cached backend %s", key)
+    return instance
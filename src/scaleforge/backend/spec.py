@@ -2,6 +2,20 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 
+PRECISIONS = ("fp32", "fp16", "bf16", "int8")
+DEFAULT_PRECISION = "fp32"
+
+
+def normalize_precision(precision: str | None) -> str:
+    """Return the canonical precision name, defaulting to ``fp32``."""
+    if not precision:
+        return DEFAULT_PRECISION
+    value = precision.lower()
+    value = {"float32": "fp32", "float16": "fp16", "half": "fp16", "bfloat16": "bf16", "qint8": "int8"}.get(value, value)
+    if value not in PRECISIONS:
+        raise ValueError(f"Invalid precision: {precision} (choose from {', '.join(PRECISIONS)})")
+    return value
+
 
 def canonical_alias(vendor: str, engine: str, device: str | None = None) -> str:
     parts = [vendor, engine]
@@ -15,10 +29,12 @@ class BackendSpec:
     vendor: str
     engine: str
     device: str | None = None
+    precision: str = DEFAULT_PRECISION
     alias: str = field(init=False)
 
     def __post_init__(self) -> None:  # pragma: no cover - simple assignment
         object.__setattr__(self, "alias", canonical_alias(self.vendor, self.engine, self.device))
+        object.__setattr__(self, "precision", normalize_precision(self.precision))
 
 
 def parse_alias(alias: str) -> BackendSpec:
@@ -0,0 +1,170 @@
+"""Content-addressed cache of upscaled tiles.
+
+Sprite sheets, tiled textures and UI captures repeat identical blocks, both
+within one image and across a batch.  :class:`TileCache` maps a digest of a
+padded input tile to the network output for it.  Repeated tiles then run
+the model once.  Entries are kept in a byte-bounded in-memory LRU.  When a
+``spill_dir`` is configured, evicted entries are written there as ``.npy``
+files (again bounded by size, oldest first) and later reloaded from disk.
+
+Keys are namespaced by backend, model, precision, scale and tile padding,
+so a cache never returns output produced under different settings.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - numpy not installed
+    np = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_MB = 256
+# Outputs larger than this share of the budget (e.g. untiled photos) are not
+# cached; they would evict every tile for a single unlikely repeat.
+MAX_ENTRY_SHARE = 4
+
+
+class TileCache:
+    """Thread-safe LRU of tile outputs with optional on-disk spill."""
+
+    def __init__(self, max_bytes: int, *, spill_dir: Path | None = None, spill_bytes: int = 0) -> None:
+        """Create the cache.
+
+        Parameters
+        ----------
+        max_bytes:
+            In-memory budget for cached outputs.
+        spill_dir:
+            Directory receiving entries evicted from memory; ``None`` drops them.
+        spill_bytes:
+            Size bound for ``spill_dir``; the oldest files are removed first.
+        """
+
+        self.max_bytes = max(0, int(max_bytes))
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_bytes = max(0, int(spill_bytes))
+        self._items: OrderedDict[str, "np.ndarray"] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._spilled: OrderedDict[str, int] = OrderedDict()
+        self._spilled_bytes = 0
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            files = sorted(self.spill_dir.glob("*.npy"), key=lambda p: p.stat().st_mtime)
+            self._spilled.update((p.stem, p.stat().st_size) for p in files)
+            self._spilled_bytes = sum(self._spilled.values())
+
+    @staticmethod
+    def key(namespace: str, tile: "np.ndarray") -> str:
+        """Digest of ``tile``'s shape, dtype and pixels under ``namespace``."""
+
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"{namespace}|{tile.shape}|{tile.dtype.str}".encode())
+        h.update(np.ascontiguousarray(tile).data)
+        return h.hexdigest()
+
+    def get(self, key: str) -> "np.ndarray | None":
+        with self._lock:
+            out = self._items.get(key)
+            if out is not None:
+                self._items.move_to_end(key)
+                return out
+            on_disk = key in self._spilled
+        if not on_disk:
+            return None
+        try:
+            out = np.load(self.spill_dir / f"{key}.npy")
+        except (OSError, ValueError):
+            with self._lock:
+                self._spilled_bytes -= self._spilled.pop(key, 0)
+            return None
+        self.put(key, out)
+        return out
+
+    def put(self, key: str, out: "np.ndarray") -> None:
+        if out.nbytes * MAX_ENTRY_SHARE > self.max_bytes:
+            return
+        out.flags.writeable = False
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return
+            self._items[key] = out
+            self._bytes += out.nbytes
+            evicted = []
+            while self._bytes > self.max_bytes:
+                old_key, old = self._items.popitem(last=False)
+                self._bytes -= old.nbytes
+                evicted.append((old_key, old))
+        for old_key, old in evicted:
+            self._spill(old_key, old)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _spill(self, key: str, out: "np.ndarray") -> None:
+        if self.spill_dir is None or not self.spill_bytes:
+            return
+        path = self.spill_dir / f"{key}.npy"
+        try:
+            if not path.exists():
+                tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp, "wb") as fh:
+                    np.save(fh, out)
+                os.replace(tmp, path)
+            size = path.stat().st_size
+        except OSError as exc:
+            logger.warning("Could not spill tile to %s: %s", path, exc)
+            return
+        with self._lock:
+            self._spilled_bytes += size - self._spilled.get(key, 0)
+            self._spilled[key] = size
+            self._spilled.move_to_end(key)
+            doomed = []
+            while self._spilled_bytes > self.spill_bytes and len(self._spilled) > 1:
+                old, old_size = self._spilled.popitem(last=False)
+                self._spilled_bytes -= old_size
+                doomed.append(old)
+        for old in doomed:
+            (self.spill_dir / f"{old}.npy").unlink(missing_ok=True)
+
+
+def tile_cache_from_env(spill_root: Path | None = None) -> TileCache | None:
+    """Build the cache configured by the environment, or ``None`` if disabled.
+
+    ``SCALEFORGE_TILE_CACHE_MB`` sizes the in-memory LRU (default 256, ``0``
+    disables deduplication).  ``SCALEFORGE_TILE_CACHE_DISK_MB`` > 0 enables
+    spilling to ``spill_root`` up to that size.
+    """
+
+    def env_mb(name: str, default: int) -> int:
+        try:
+            return int(float(os.getenv(name, default)) * 1024 * 1024)
+        except ValueError:
+            logger.warning("Ignoring invalid %s=%r", name, os.getenv(name))
+            return default * 1024 * 1024
+
+    if np is None:
+        return None
+    max_bytes = env_mb("SCALEFORGE_TILE_CACHE_MB", DEFAULT_CACHE_MB)
+    if not max_bytes:
+        return None
+    spill_bytes = env_mb("SCALEFORGE_TILE_CACHE_DISK_MB", 0)
+    return TileCache(max_bytes, spill_dir=spill_root if spill_bytes else None, spill_bytes=spill_bytes)
+
+
+__all__ = ["DEFAULT_CACHE_MB", "TileCache", "tile_cache_from_env"]
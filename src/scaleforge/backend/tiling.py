@@ -0,0 +1,412 @@
+"""Tiled inference helpers.
+
+Large inputs are split into a grid of overlapping tiles which are upscaled
+independently and blended back together.  Each tile is inferred with
+``tile_pad`` pixels of context on every interior edge; inside that overlap
+band neighbouring tiles are cross-faded linearly so no seam is visible.
+
+The tile size can be given explicitly or derived from a memory budget with
+:func:`auto_tile_size`.
+
+Tiles without detail skip the network.  These are tiles whose padded
+region has almost no colour variance, or is fully transparent.  They are
+filled by :func:`upsample_linear` instead, and :func:`flat_tiles` finds them
+with summed-area tables, so the scan costs one pass over the image.
+With a :class:`~scaleforge.backend.tile_cache.TileCache`, tiles whose padded
+input repeats (within an image or across images) are inferred only once.
+
+NumPy is imported lazily by the caller's environment: the planning helpers
+work without it so they can be used by lightweight tooling and tests.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import os
+from collections import Counter
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Iterator
+
+try:  # pragma: no cover - optional dependency
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - numpy not installed
+    np = None  # type: ignore[assignment]
+
+if TYPE_CHECKING:  # pragma: no cover - forward reference only
+    from scaleforge.backend.tile_cache import TileCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TILE_PAD = 10
+MIN_TILE = 64
+TILE_ALIGN = 8
+
+# Rough peak activation footprint per *input* pixel for an fp32 RRDBNet
+# forward pass (body features plus the two upsampling stages).  Backends with
+# lighter networks pass their own figure to :func:`auto_tile_size`.
+DEFAULT_BYTES_PER_PIXEL = 8 * 1024
+
+# Per-channel standard deviation (on the ``[0, 1]`` scale) below which a tile
+# is treated as flat by the network back-ends: under one 8-bit grey level.
+DEFAULT_SKIP_THRESHOLD = 1.0 / 255
+
+
+@dataclass(frozen=True)
+class Tile:
+    """One grid cell.
+
+    ``x0..x1``/``y0..y1`` is the core region owned by the tile and
+    ``px0..px1``/``py0..py1`` the padded region actually fed to the model
+    (clipped to the image bounds).
+    """
+
+    x0: int
+    y0: int
+    x1: int
+    y1: int
+    px0: int
+    py0: int
+    px1: int
+    py1: int
+
+
+def _split(length: int, tile: int) -> list[int]:
+    """Return evenly spaced cut points covering ``length`` in <= ``tile`` steps."""
+
+    count = max(1, math.ceil(length / tile))
+    return [round(i * length / count) for i in range(count + 1)]
+
+
+def plan_tiles(width: int, height: int, tile: int, tile_pad: int = DEFAULT_TILE_PAD) -> list[Tile]:
+    """Return the tile grid for a ``width`` x ``height`` image.
+
+    ``tile`` <= 0 (or a tile larger than the image) yields a single tile
+    covering the whole input.
+    """
+
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid image size {width}x{height}")
+    tile_pad = max(0, int(tile_pad))
+    if tile <= 0 or (tile >= width and tile >= height):
+        return [Tile(0, 0, width, height, 0, 0, width, height)]
+    if tile <= 2 * tile_pad:
+        raise ValueError(f"tile ({tile}) must be larger than twice tile_pad ({tile_pad})")
+
+    xs = _split(width, tile)
+    ys = _split(height, tile)
+    tiles: list[Tile] = []
+    for y0, y1 in zip(ys, ys[1:]):
+        for x0, x1 in zip(xs, xs[1:]):
+            tiles.append(
+                Tile(
+                    x0,
+                    y0,
+                    x1,
+                    y1,
+                    max(0, x0 - tile_pad),
+                    max(0, y0 - tile_pad),
+                    min(width, x1 + tile_pad),
+                    min(height, y1 + tile_pad),
+                )
+            )
+    return tiles
+
+
+def available_memory() -> int | None:
+    """Return the currently available system memory in bytes, if known."""
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):  # pragma: no cover - non-POSIX
+        return None
+
+
+def memory_budget(default: int | None = None) -> int | None:
+    """Return the tiling memory budget in bytes.
+
+    ``SCALEFORGE_TILE_MEMORY_MB`` overrides everything; otherwise ``default``
+    (usually free device memory reported by the backend) is used, falling
+    back to half of the available system memory.
+    """
+
+    env = os.getenv("SCALEFORGE_TILE_MEMORY_MB")
+    if env:
+        try:
+            return int(float(env) * 1024 * 1024)
+        except ValueError:
+            logger.warning("Ignoring invalid SCALEFORGE_TILE_MEMORY_MB=%r", env)
+    if default:
+        return int(default)
+    avail = available_memory()
+    return avail // 2 if avail else None
+
+
+def auto_tile_size(
+    width: int,
+    height: int,
+    budget: int | None,
+    *,
+    scale: int = 4,
+    tile_pad: int = DEFAULT_TILE_PAD,
+    bytes_per_pixel: int = DEFAULT_BYTES_PER_PIXEL,
+) -> int:
+    """Pick a tile size so one forward pass stays within ``budget`` bytes.
+
+    Returns ``0`` (no tiling) when the whole image fits.  The estimate counts
+    the activation footprint of the padded input plus the fp32 output tile.
+    """
+
+    if not budget:
+        return 0
+    per_pixel = bytes_per_pixel + 3 * 4 * scale * scale
+    if width * height * per_pixel <= budget:
+        return 0
+    side = int(math.sqrt(budget / per_pixel)) - 2 * tile_pad
+    side -= side % TILE_ALIGN
+    return max(MIN_TILE, side, 2 * tile_pad + TILE_ALIGN)
+
+
+def tile_skip_threshold(default: float = DEFAULT_SKIP_THRESHOLD) -> float:
+    """Return the flat-tile threshold, honouring ``SCALEFORGE_TILE_SKIP``.
+
+    ``0`` disables tile skipping.
+    """
+
+    env = os.getenv("SCALEFORGE_TILE_SKIP")
+    if env:
+        try:
+            return max(0.0, float(env))
+        except ValueError:
+            logger.warning("Ignoring invalid SCALEFORGE_TILE_SKIP=%r", env)
+    return default
+
+
+def _box_sums(table: "np.ndarray", tiles: list[Tile]) -> "np.ndarray":
+    """Sum of each tile's padded region from a zero-padded summed-area ``table``."""
+
+    py0, py1, px0, px1 = (np.array([getattr(t, a) for t in tiles]) for a in ("py0", "py1", "px0", "px1"))
+    return table[py1, px1] - table[py0, px1] - table[py1, px0] + table[py0, px0]
+
+
+def _integral(arr: "np.ndarray") -> "np.ndarray":
+    out = np.zeros((arr.shape[0] + 1, arr.shape[1] + 1) + arr.shape[2:], dtype=np.float64)
+    np.cumsum(np.cumsum(arr, axis=0, dtype=np.float64), axis=1, out=out[1:, 1:])
+    return out
+
+
+def flat_tiles(
+    img: "np.ndarray",
+    tiles: list[Tile],
+    threshold: float,
+    alpha: "np.ndarray | None" = None,
+) -> list[bool]:
+    """Return, per tile, whether its padded region can skip inference.
+
+    A tile qualifies when every channel's standard deviation is below
+    ``threshold`` or, given an ``HxW`` ``alpha`` mask, when it is fully
+    transparent.
+    """
+
+    if np is None:  # pragma: no cover - optional path
+        raise ImportError("numpy is required for tile classification")
+    area = np.array([(t.py1 - t.py0) * (t.px1 - t.px0) for t in tiles], dtype=np.float64)
+    skip = np.zeros(len(tiles), dtype=bool)
+    if threshold > 0:
+        mean = _box_sums(_integral(img), tiles) / area[:, None]
+        sq = _box_sums(_integral(np.square(img, dtype=np.float32)), tiles) / area[:, None]
+        var = np.maximum(sq - np.square(mean), 0.0)
+        skip |= (var < threshold * threshold).all(axis=1)
+    if alpha is not None:
+        skip |= _box_sums(_integral(alpha > 0), tiles) == 0
+    return skip.tolist()
+
+
+def upsample_linear(arr: "np.ndarray", scale: int) -> "np.ndarray":
+    """Bilinear ``scale``x upsample of an ``HxWxC`` array with edge clamping."""
+
+    def axis(length: int) -> tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        pos = np.clip((np.arange(length * scale, dtype=np.float32) + 0.5) / scale - 0.5, 0, length - 1)
+        lo = pos.astype(np.intp)
+        hi = np.minimum(lo + 1, length - 1)
+        return lo, hi, (pos - lo).astype(np.float32)
+
+    y0, y1, wy = axis(arr.shape[0])
+    x0, x1, wx = axis(arr.shape[1])
+    rows = arr[y0] * (1 - wy)[:, None, None] + arr[y1] * wy[:, None, None]
+    return rows[:, x0] * (1 - wx)[None, :, None] + rows[:, x1] * wx[None, :, None]
+
+
+def _ramp(length: int, lo: float, hi: float, scale: int, fade_in: bool) -> "np.ndarray":
+    """Linear weights over ``length`` output pixels between input coords ``lo``..``hi``."""
+
+    centres = (np.arange(length, dtype=np.float32) + 0.5) / scale
+    w = np.clip((centres - lo) / max(hi - lo, 1e-6), 0.0, 1.0)
+    return w if fade_in else 1.0 - w
+
+
+def _axis_weights(start: int, stop: int, core0: int, core1: int, limit: int, pad: int, scale: int) -> "np.ndarray":
+    """Blend weights along one axis for a padded span ``start..stop``."""
+
+    length = (stop - start) * scale
+    w = np.ones(length, dtype=np.float32)
+    if pad == 0:
+        return w
+    if core0 > 0:
+        w *= _ramp(length, core0 - pad - start, core0 + pad - start, scale, True)
+    if core1 < limit:
+        w *= _ramp(length, core1 - pad - start, core1 + pad - start, scale, False)
+    return w
+
+
+class TiledUpscaler:
+    """Run ``infer`` over overlapping tiles and blend the results.
+
+    ``infer`` receives an ``HxWxC`` float32 array in ``[0, 1]`` and must
+    return the upscaled ``(H*scale)x(W*scale)xC`` array.  With an
+    ``executor``, tiles are inferred concurrently (``infer`` must then be
+    thread-safe) and blended in grid order.  A ``skip_threshold`` > 0 fills
+    flat tiles by :func:`upsample_linear` instead (see :func:`flat_tiles`).
+    A ``cache`` reuses outputs of repeated tiles; ``cache_namespace`` must
+    identify everything besides the pixels and padding that shapes the
+    output (backend, model, precision, scale).
+    """
+
+    def __init__(
+        self,
+        infer: Callable[["np.ndarray"], "np.ndarray"],
+        scale: int,
+        *,
+        tile: int | None = 0,
+        tile_pad: int = DEFAULT_TILE_PAD,
+        executor: Executor | None = None,
+        skip_threshold: float = 0.0,
+        cache: "TileCache | None" = None,
+        cache_namespace: str = "",
+    ) -> None:
+        self.infer = infer
+        self.scale = int(scale)
+        self.tile = tile
+        self.tile_pad = tile_pad
+        self.executor = executor
+        self.skip_threshold = skip_threshold
+        self.cache = cache
+        self.cache_namespace = cache_namespace
+
+    def run(
+        self,
+        img: "np.ndarray",
+        *,
+        tile: int | None = None,
+        tile_pad: int | None = None,
+        alpha: "np.ndarray | None" = None,
+        stats: dict[str, int] | None = None,
+    ) -> "np.ndarray":
+        """Upscale ``img`` (``HxWxC`` float32) and return the blended result.
+
+        Parameters
+        ----------
+        img:
+            Input pixels.
+        tile, tile_pad:
+            Override the engine defaults for this call.
+        alpha:
+            Optional ``HxW`` alpha mask; fully transparent tiles are skipped.
+        stats:
+            When given, ``tiles``, ``skipped``, ``cache_hits`` and
+            ``cache_misses`` counts are added to it.
+        """
+
+        if np is None:  # pragma: no cover - optional path
+            raise ImportError("numpy is required for tiled inference")
+        tile = self.tile if tile is None else tile
+        tile_pad = self.tile_pad if tile_pad is None else tile_pad
+        height, width = img.shape[:2]
+        tiles = plan_tiles(width, height, int(tile or 0), tile_pad)
+        if self.skip_threshold > 0 or alpha is not None:
+            skip = flat_tiles(img, tiles, self.skip_threshold, alpha)
+        else:
+            skip = [False] * len(tiles)
+        if stats is not None:
+            stats["tiles"] = stats.get("tiles", 0) + len(tiles)
+            stats["skipped"] = stats.get("skipped", 0) + sum(skip)
+        if len(tiles) == 1:
+            return next(self._outputs([img], skip, tile_pad, stats))
+
+        s = self.scale
+        channels = img.shape[2]
+        acc = np.zeros((height * s, width * s, channels), dtype=np.float32)
+        norm = np.zeros((height * s, width * s, 1), dtype=np.float32)
+        logger.debug("Tiled inference: %d tiles (tile=%s pad=%s)", len(tiles), tile, tile_pad)
+        logger.debug("Skipping inference for %d flat tiles", sum(skip))
+        crops = [img[t.py0 : t.py1, t.px0 : t.px1] for t in tiles]
+        for t, out in zip(tiles, self._outputs(crops, skip, tile_pad, stats)):
+            wy = _axis_weights(t.py0, t.py1, t.y0, t.y1, height, tile_pad, s)
+            wx = _axis_weights(t.px0, t.px1, t.x0, t.x1, width, tile_pad, s)
+            weight = (wy[:, None] * wx[None, :])[..., None]
+            ys, xs = slice(t.py0 * s, t.py1 * s), slice(t.px0 * s, t.px1 * s)
+            acc[ys, xs] += out * weight
+            norm[ys, xs] += weight
+        return acc / np.maximum(norm, 1e-8)
+
+    def _outputs(
+        self,
+        crops: list["np.ndarray"],
+        skip: list[bool],
+        tile_pad: int,
+        stats: dict[str, int] | None,
+    ) -> Iterator["np.ndarray"]:
+        """Yield the upscaled tile for each crop, in order.
+
+        Flat crops are interpolated.  With a cache, each distinct crop is
+        inferred at most once and cached outputs are reused.
+        """
+
+        cache = self.cache
+        keys: list[str | None] = [None] * len(crops)
+        if cache is not None:
+            from scaleforge.backend.tile_cache import TileCache
+
+            namespace = f"{self.cache_namespace}|pad{tile_pad}"
+            keys = [None if flat else TileCache.key(namespace, crop) for crop, flat in zip(crops, skip)]
+        repeats = Counter(k for k in keys if k is not None)
+        cached = {k: out for k in repeats if (out := cache.get(k)) is not None} if cache is not None else {}
+
+        misses, queued = [], set()
+        for crop, flat, key in zip(crops, skip, keys):
+            if flat or key in cached or key in queued:
+                continue
+            misses.append(crop)
+            if key is not None:
+                queued.add(key)
+        if stats is not None and cache is not None:
+            stats["cache_hits"] = stats.get("cache_hits", 0) + sum(repeats.values()) - len(misses)
+            stats["cache_misses"] = stats.get("cache_misses", 0) + len(misses)
+        inferred = iter(self.executor.map(self.infer, misses) if self.executor is not None else map(self.infer, misses))
+        for crop, flat, key in zip(crops, skip, keys):
+            if flat:
+                yield upsample_linear(crop, self.scale)
+            elif key is None or key not in cached:
+                out = next(inferred)
+                if key is not None:
+                    cache.put(key, out)
+                    if repeats[key] > 1:
+                        cached[key] = out
+                yield out
+            else:
+                yield cached[key]
+
+
+__all__ = [
+    "DEFAULT_SKIP_THRESHOLD",
+    "DEFAULT_TILE_PAD",
+    "Tile",
+    "TiledUpscaler",
+    "auto_tile_size",
+    "flat_tiles",
+    "memory_budget",
+    "plan_tiles",
+    "tile_skip_threshold",
+    "upsample_linear",
+]
@@ -1,8 +1,10 @@
 """Real-ESRGAN Torch backend.
 
-This module provides a lightweight wrapper around the `realesrgan` project.
-Model weights are downloaded on demand and cached under
-``~/.cache/scaleforge/models`` (or ``$SCALEFORGE_CACHE``). Heavy dependencies
+This module runs the Real-ESRGAN networks through ScaleForge's tiled inference
+engine (see :mod:`scaleforge.backend.network`) so arbitrarily large inputs
+are processed with bounded peak memory.  Model weights are downloaded on
+demand and cached under ``~/.cache/scaleforge/models`` (or
+``$SCALEFORGE_CACHE``). Heavy dependencies
 such as :mod:`torch` are imported lazily so the module can be imported on
 systems without GPU wheels installed.
 """
@@ -14,22 +16,21 @@ import importlib
 import logging
 import os
 import urllib.request
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Sequence
 
-try:  # pragma: no cover - optional dependency
-    from basicsr.archs.rrdbnet_arch import RRDBNet  # type: ignore
-except Exception:  # pragma: no cover - basicsr not installed
-    RRDBNet = None  # type: ignore[assignment]
-
-from PIL import Image
-
-from scaleforge.backend.base import Backend
+from scaleforge.backend.archs import arch_for_model, build_model
+from scaleforge.backend.cpu_pool import SharedMemoryPool, default_workers
+from scaleforge.backend.network import NetworkBackend
+from scaleforge.backend.quantize import calibration_tag, normalize_quant_mode, quantize_model
+from scaleforge.backend.spec import normalize_precision
+from scaleforge.backend.tiling import DEFAULT_TILE_PAD
 
 logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:  # pragma: no cover - forward reference only
-    from scaleforge.core.job import Job
+    import numpy as np
 
 
 # ---------------------------------------------------------------------------
@@ -45,7 +46,53 @@ MODEL_URLS = {
 DEFAULT_MODEL = "realesr-general-x4v3"
 
 
-class TorchRealESRGANBackend(Backend):
+def model_cache_dir() -> Path:
+    """Return (and create) the directory holding downloaded model weights."""
+
+    cache_dir = Path(os.getenv("SCALEFORGE_CACHE", "~/.cache/scaleforge/models")).expanduser()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+# int8 models take float32 inputs; quantization happens inside the network.
+_TORCH_DTYPES = {"fp32": "float32", "fp16": "float16", "bf16": "bfloat16", "int8": "float32"}
+
+
+def _cpu_supports_bf16() -> bool:
+    """Return ``True`` when the CPU advertises native bfloat16 instructions."""
+
+    try:
+        flags = set(Path("/proc/cpuinfo").read_text(encoding="utf-8", errors="ignore").split())
+    except OSError:  # pragma: no cover - non-Linux
+        return False
+    return bool(flags & {"avx512_bf16", "amx_bf16", "bf16"})
+
+
+def resolve_precision(torch, device: str, requested: str | None) -> str:
+    """Return the precision that will actually be used on ``device``.
+
+    Unsupported combinations fall back automatically: CUDA without bf16
+    support uses fp16, MPS always uses fp16, and on CPU (where fp16
+    convolutions are slow or missing) reduced precision means bf16 when the
+    CPU supports it natively and fp32 otherwise.  ``int8`` is CPU-only and
+    becomes fp16 on accelerators.
+    """
+
+    requested = normalize_precision(requested)
+    if requested == "fp32":
+        return requested
+    if requested == "int8":
+        return "int8" if device == "cpu" else "fp16"
+    if device == "cuda":
+        if requested == "bf16" and not torch.cuda.is_bf16_supported():
+            return "fp16"
+        return requested
+    if device == "mps":
+        return "fp16"
+    return "bf16" if _cpu_supports_bf16() else "fp32"
+
+
+class TorchRealESRGANBackend(NetworkBackend):
     """Real-ESRGAN back-end powered by PyTorch."""
 
     name = "torch-realesrgan"
@@ -67,118 +114,182 @@ class TorchRealESRGANBackend(Backend):
         stub: bool = False,
         *,
         prefer_gpu: bool = True,
+        precision: str | None = None,
+        tile: int | None = None,
+        tile_pad: int = DEFAULT_TILE_PAD,
+        memory_budget_mb: int | None = None,
+        batch_bucket: int = 32,
+        workers: int | None = None,
+        quantization: str | None = None,
+        calibration_images: Sequence[Path] | None = None,
     ) -> None:
         """Initialise the backend.
 
         Parameters
         ----------
         model_name:
-            Name of the Real-ESRGAN model to load. See :data:`MODEL_URLS`.
+            Name of the Real-ESRGAN model to load. See :data:`MODEL_URLS`;
+            the network is built from its registry architecture (see
+            :mod:`scaleforge.backend.archs`).
         stub:
             When ``True`` heavy dependencies are not imported and no model is
             loaded.  Useful for unit tests.
         prefer_gpu:
             If ``True`` and a CUDA device is available, it will be used.
+        precision:
+            ``fp32`` (default), ``fp16``, ``bf16`` or ``int8`` (CPU only).
+            Falls back to a supported precision on the selected device, see
+            :func:`resolve_precision`.
+        tile:
+            Default tile size in input pixels. ``0`` disables tiling and
+            ``None`` picks a size from the memory budget for every image.
+        tile_pad:
+            Overlap (in input pixels) blended between neighbouring tiles.
+        memory_budget_mb:
+            Peak memory allowed for one forward pass when choosing a tile
+            size automatically. Defaults to free device memory.
+        batch_bucket:
+            When micro-batching, inputs are padded up to a multiple of this
+            many pixels so nearby sizes share one forward pass. ``0`` only
+            batches images of identical size.
+        workers:
+            On CPU, run inference in this many forked worker processes that
+            share the loaded weights (see :mod:`scaleforge.backend.cpu_pool`).
+            Defaults to ``SCALEFORGE_CPU_WORKERS``; ``0``/``1`` keeps
+            inference in-process.
+        quantization:
+            INT8 mode, ``dynamic`` or ``static`` (see
+            :mod:`scaleforge.backend.quantize`). Defaults to
+            ``SCALEFORGE_QUANT_MODE`` or ``dynamic``; ignored unless
+            ``precision`` is ``int8``.
+        calibration_images:
+            Sample images for the static INT8 calibration pass. Synthetic
+            noise is used when omitted.
         """
 
-        super().__init__()
+        super().__init__(
+            stub=stub,
+            precision=precision,
+            tile=tile,
+            tile_pad=tile_pad,
+            memory_budget_mb=memory_budget_mb,
+            batch_bucket=batch_bucket,
+        )
         self.model_name = model_name or DEFAULT_MODEL
-        self.stub = stub
         self.device = "cpu"
+        self.workers = default_workers() if workers is None else max(0, int(workers))
+        self.arch = arch_for_model(self.model_name)
+        self._default_scale = self.arch.scale
+        self.bytes_per_pixel = self.arch.bytes_per_pixel
+        self.quantization: str | None = None
+        quant_mode = normalize_quant_mode(quantization or os.getenv("SCALEFORGE_QUANT_MODE"))
+        if self.precision == "int8":
+            self.quantization = quant_mode
+            if quant_mode == "static":
+                self.quantization += f"-{calibration_tag(calibration_images)}"
+        self._companion_options = {
+            "prefer_gpu": prefer_gpu,
+            "workers": self.workers,
+            "quantization": quant_mode,
+            "calibration_images": calibration_images,
+        }
 
         if stub:
-            self._default_scale = 4
             return
 
         torch = self._lazy_import("torch")
-        realesrgan_mod = self._lazy_import("realesrgan")
+        self._torch = torch
 
         self.device = "cuda" if prefer_gpu and torch.cuda.is_available() else "cpu"
+        effective = resolve_precision(torch, self.device, self.precision)
+        if effective != self.precision:
+            logger.info("Precision %s not supported on %s; using %s", self.precision, self.device, effective)
+        self.precision = effective
+        if effective != "int8":
+            self.quantization = None
+        self._dtype = getattr(torch, _TORCH_DTYPES[effective])
         self.model_path = self._ensure_model()
 
-        if RRDBNet is None:  # pragma: no cover - optional path
-            raise ImportError(
-                "basicsr not installed; set SF_HEAVY_TESTS=1 and install extras to run this path"
-            )
-
-        model = RRDBNet(
-            num_in_ch=3,
-            num_out_ch=3,
-            num_feat=64,
-            num_block=23,
-            num_grow_ch=32,
-        )
-
+        model = build_model(torch, self.arch)
         state_dict = torch.load(str(self.model_path), map_location="cpu")
-        if "params" in state_dict:  # handle older checkpoints
-            state_dict = state_dict["params"]
+        for key in ("params_ema", "params"):  # released checkpoints nest the weights
+            if key in state_dict:
+                state_dict = state_dict[key]
+                break
 
         missing_keys, unexpected_keys = model.load_state_dict(state_dict, strict=False)
         if missing_keys:
-            logger.warning(f"Missing keys in state_dict: {missing_keys}")
+            raise RuntimeError(
+                f"Checkpoint {self.model_path.name} does not match architecture "
+                f"'{self.arch.name}'; missing keys: {missing_keys}"
+            )
         if unexpected_keys:
             logger.warning(f"Unexpected keys in state_dict: {unexpected_keys}")
 
-        model.to(self.device)
-        self._upsampler = realesrgan_mod.RealESRGANer(
-            scale=4,
-            model_path=str(self.model_path),
-            model=model,
-            tile=0,
-            tile_pad=10,
-            pre_pad=0,
-            half=False,
-        )
-        self._default_scale = 4
+        model.eval()
+        if self.precision == "int8":
+            model = quantize_model(torch, model, self.model_path, quant_mode, calibration_images)
+        self._model = model.to(self.device, dtype=self._dtype)
+        self._init_engine()
+        if self.device == "cpu" and self.workers > 1:
+            # Fork now, before the parent touches any intra-op thread pool.
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            self._pool = SharedMemoryPool(
+                self._pool_task,
+                self.workers,
+                out_shape=self._pool_out_shape,
+                initializer=partial(torch.set_num_threads, threads),
+            )
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
-    def is_available(self) -> bool:
-        """Return ``True`` if the backend is ready for use."""
-
-        return not self.stub and hasattr(self, "_upsampler")
-
     def description(self) -> str:
         """Human readable description for CLI output."""
 
         if self.stub:
             return "Stub mode (no actual upscaling)"
-        return f"PyTorch ({self.device}) - {self.model_name}"
+        precision = f"int8 {self.quantization}" if self.quantization else self.precision
+        return f"PyTorch ({self.device}, {precision}) - {self.model_name}"
 
-    async def upscale(  # type: ignore[override] - base declares async
-        self,
-        src: Path,
-        dst: Path,
-        *,
-        scale: int = 4,
-        tile: int | None = None,
-        job: "Job" | None = None,
-    ) -> None:
-        """Upscale ``src`` to ``dst`` using the configured model."""
-        if self.stub:
-            logger.info("Stub mode: copying %s -> %s", src, dst)
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            Image.open(src).save(dst)
-            return
+    def memory_footprint(self) -> int:
+        """Bytes used by the model weights and buffers."""
 
-        if job and job.metadata and "scale" in job.metadata:
-            scale = int(job.metadata["scale"])
+        model = getattr(self, "_model", None)
+        if model is None:
+            return 0
+        # state_dict() also covers the packed weights of quantized modules.
+        tensors = [t for t in model.state_dict().values() if hasattr(t, "element_size")]
+        return sum(t.numel() * t.element_size() for t in tensors)
 
-        if scale not in (2, 4):
-            logger.warning(f"Invalid scale {scale}, defaulting to {self._default_scale}")
-            scale = self._default_scale
+    def close(self) -> None:
+        """Drop the loaded model and return cached device memory."""
 
-        logger.info(f"Upscaling to {scale}x using model '{self.model_name}'")
-        img = Image.open(src).convert("RGB")
+        super().close()
+        self.__dict__.pop("_model", None)
+        torch = getattr(self, "_torch", None)
+        if torch is not None and self.device == "cuda":
+            torch.cuda.empty_cache()
 
-        import asyncio  # Lazy import to keep startup light
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+    def _device_free_memory(self) -> int | None:
+        if self.device != "cuda":
+            return None
+        try:
+            return int(self._torch.cuda.mem_get_info()[0] * 0.8)
+        except Exception:  # pragma: no cover - driver specific
+            return None
 
-        result = await asyncio.to_thread(self._upsampler.predict, img)
+    def _forward_batch(self, arr: "np.ndarray") -> "np.ndarray":
+        """Run the network on an ``NxHxWxC`` float32 batch."""
 
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        result.save(dst)
-        logger.info(f"Saved upscaled image to: {dst}")
+        torch = self._torch
+        tensor = torch.from_numpy(arr.transpose(0, 3, 1, 2).copy()).to(self.device, dtype=self._dtype)
+        with torch.inference_mode():
+            out = self._model(tensor).clamp_(0, 1)
+        return out.permute(0, 2, 3, 1).float().cpu().numpy()
 
     # ------------------------------------------------------------------
     # Helpers
@@ -191,20 +302,36 @@ class TorchRealESRGANBackend(Backend):
     def _get_model_url(self) -> str:
         """Return the download URL for the selected model."""
 
-        return MODEL_URLS[self.model_name]
+        return self._model_source(self.model_name)[0][0]
+
+    @classmethod
+    def _model_source(cls, model_name: str) -> tuple[list[str], str | None]:
+        """Return the download URLs and sha256 of ``model_name``.
+
+        A registry entry's ``info`` block takes precedence over the built-in
+        :data:`MODEL_URLS` and :attr:`_MODEL_SHA256`.
+        """
+
+        from scaleforge.models.registry import load_effective_registry
+
+        entry = (load_effective_registry().get("models") or {}).get(model_name) or {}
+        info = entry.get("info") or {}
+        urls = info.get("urls") or ([info["url"]] if info.get("url") else [])
+        if urls:
+            return [str(u) for u in urls], info.get("sha256")
+        builtin = MODEL_URLS.get(model_name)
+        return ([builtin] if builtin else []), cls._MODEL_SHA256.get(model_name)
 
     def _ensure_model(self) -> Path:
         """Ensure the model file is present and passes checksum validation."""
 
-        cache_dir = Path(os.getenv("SCALEFORGE_CACHE", "~/.cache/scaleforge/models")).expanduser()
-        cache_dir.mkdir(parents=True, exist_ok=True)
-
-        model_path = cache_dir / self._get_model_file()
-        expected = self._MODEL_SHA256[self.model_name]
+        model_path = model_cache_dir() / self._get_model_file()
+        urls, expected = self._model_source(self.model_name)
+        if not urls or expected is None:
+            raise RuntimeError(f"No download URL and sha256 known for model '{self.model_name}'")
 
         if not model_path.exists() or self._sha256(model_path) != expected:
-            url = self._get_model_url()
-            self._download(url, model_path)
+            self._download_first(urls, model_path)
             if self._sha256(model_path) != expected:  # pragma: no cover - network
                 raise RuntimeError("Model checksum verification failed")
 
@@ -228,6 +355,19 @@ class TorchRealESRGANBackend(Backend):
             fp.write(response.read())
         tmp.rename(dest)
 
+    @classmethod
+    def _download_first(cls, urls: Sequence[str], dest: Path) -> None:
+        """Download ``dest`` from the first of ``urls`` that responds."""
+
+        for idx, url in enumerate(urls):
+            try:
+                cls._download(url, dest)
+                return
+            except OSError as exc:  # pragma: no cover - network
+                if idx == len(urls) - 1:
+                    raise
+                logger.warning("Download from %s failed (%s); trying the next URL", url, exc)
+
     @staticmethod
     def _lazy_import(name: str):
         try:
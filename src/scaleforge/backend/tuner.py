@@ -0,0 +1,394 @@
+"""Tile / batch / worker autotuner backed by the capability cache.
+
+:func:`tune_backend` runs a short sweep on synthetic images: tile sizes
+first, then batch sizes and CPU worker counts at the best tile.  Each run
+measures throughput in input megapixels per second and peak memory: device
+memory on CUDA, otherwise the growth of the process's resident set, sampled
+while the runs execute.  The fastest setting that fits the memory budget is stored in
+``gpu_caps.json`` under ``tuning["<backend alias>:<model>"]``.  The
+selector passes those settings to the backend constructors, so later runs
+start tuned.  A warm-up pass before every measurement means one-off costs
+such as graph compilation or cuDNN autotuning are paid during tuning rather
+than on a user job.  With ``SCALEFORGE_AUTOTUNE=1`` the selector also runs a
+quick sweep the first time it builds an untuned backend.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from scaleforge.backend.base import Backend, BatchItem
+from scaleforge.backend.detector import detect_gpu_caps, load_caps, save_caps
+from scaleforge.backend.tiling import memory_budget
+
+logger = logging.getLogger(__name__)
+
+# Whole-image runs (tile 0) are not swept: a synthetic image says nothing
+# about the memory a large user image needs untiled.
+DEFAULT_TILES = (128, 192, 256, 384, 512)
+DEFAULT_BATCH_SIZES = (1, 2, 4)
+DEFAULT_WORKERS = (1, 2, 4)
+QUICK_TILES = (192, 384)
+
+
+@dataclass
+class TuneResult:
+    """One measured configuration."""
+
+    tile: int
+    batch_size: int = 1
+    workers: int = 1
+    mp_per_s: float = 0.0
+    peak_mb: float | None = None  # None when memory could not be measured
+    error: str | None = None
+
+
+def caps_path() -> Path:
+    """Location of the capability cache (``SCALEFORGE_CAPS`` overrides)."""
+
+    env = os.getenv("SCALEFORGE_CAPS")
+    if env:
+        return Path(env).expanduser()
+    from scaleforge.config.loader import APP_ROOT
+
+    return APP_ROOT / "gpu_caps.json"
+
+
+def tuning_key(alias: str, model: str | None) -> str:
+    return f"{alias}:{model or 'default'}"
+
+
+def load_tuning(alias: str, model: str | None, path: Path | None = None) -> dict[str, Any] | None:
+    """Return the stored settings for (``alias``, ``model``), if any."""
+
+    try:
+        caps = load_caps(path or caps_path())
+    except (OSError, ValueError):
+        return None
+    return (caps.get("tuning") or {}).get(tuning_key(alias, model))
+
+
+def save_tuning(alias: str, model: str | None, settings: dict[str, Any], path: Path | None = None) -> dict:
+    """Merge ``settings`` into the capability cache and return the new caps."""
+
+    path = path or caps_path()
+    try:
+        caps = load_caps(path)
+    except (OSError, ValueError):
+        caps = detect_gpu_caps()
+    caps.setdefault("tuning", {})[tuning_key(alias, model)] = settings
+    path.parent.mkdir(parents=True, exist_ok=True)
+    save_caps(caps, path)
+    return caps
+
+
+def autotune_enabled() -> bool:
+    """First-run tuning is opt-in with ``SCALEFORGE_AUTOTUNE=1``."""
+
+    return os.getenv("SCALEFORGE_AUTOTUNE", "0").strip().lower() in {"1", "true", "yes", "on"}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+
+def _synthetic_image(path: Path, size: tuple[int, int]) -> None:
+    """Write a noisy gradient PNG so encoders and models see realistic data."""
+
+    from PIL import Image
+
+    try:
+        import numpy as np
+
+        h, w = size[1], size[0]
+        grad = np.linspace(0, 255, w, dtype=np.float32)[None, :, None]
+        noise = np.random.default_rng(0).normal(0, 24, (h, w, 3))
+        img = Image.fromarray(np.clip(grad + noise, 0, 255).astype(np.uint8))
+    except (ImportError, AttributeError):  # numpy missing or minimal PIL
+        img = Image.new("RGB", size, (128, 128, 128))
+    img.save(path)
+
+
+def _proc_tree(pid: int) -> list[int]:
+    """``pid`` and all its descendants, from ``/proc/<pid>/task/*/children``."""
+
+    pids, idx = [pid], 0
+    while idx < len(pids):
+        for task in Path(f"/proc/{pids[idx]}/task").glob("*/children"):
+            try:
+                pids += [int(child) for child in task.read_text().split()]
+            except (OSError, ValueError):  # the task exited meanwhile
+                pass
+        idx += 1
+    return pids
+
+
+def _rss_mb() -> float | None:
+    """Resident set size of this process and its children in MiB.
+
+    Children count because CPU worker pools run in forked processes.  Pages
+    they share with the parent are counted once per process, which errs
+    towards over-estimating.  Returns ``None`` where RSS cannot be read.
+    """
+
+    try:
+        import psutil  # type: ignore
+
+        proc = psutil.Process()
+        total = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:  # exited between listing and reading
+                pass
+        return total / (1024 * 1024)
+    except Exception:  # noqa: BLE001 - psutil missing or unsupported
+        pass
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            pages = int(fh.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    for pid in _proc_tree(os.getpid())[1:]:
+        try:
+            with open(f"/proc/{pid}/statm", "rb") as fh:
+                pages += int(fh.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            pass
+    try:
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _RssSampler:
+    """Record the peak resident set size on a background thread.
+
+    ``ru_maxrss`` is a process-lifetime high-water mark (and in different
+    units per platform), so it cannot isolate one configuration; sampling
+    the current RSS can.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        self.baseline = _rss_mb()
+        self.peak = self.baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="sf-tune-rss", daemon=True)
+
+    def __enter__(self) -> "_RssSampler":
+        if self.baseline is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            rss = _rss_mb()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    @property
+    def growth_mb(self) -> float | None:
+        """Peak RSS above the level at construction, ``None`` if unmeasurable."""
+
+        if self.baseline is None:
+            return None
+        return max(0.0, self.peak - self.baseline)
+
+
+def _device_peak(backend: Backend, reset: bool = False) -> float | None:
+    """Peak accelerator memory in MiB for CUDA backends, else ``None``."""
+
+    torch = getattr(backend, "_torch", None)
+    if torch is None or getattr(backend, "device", "cpu") != "cuda":
+        return None
+    if reset:
+        torch.cuda.reset_peak_memory_stats()
+        return 0.0
+    return torch.cuda.max_memory_allocated() / (1024 * 1024)
+
+
+async def _measure(
+    backend: Backend,
+    srcs: list[Path],
+    out_dir: Path,
+    *,
+    tile: int,
+    batch_size: int,
+    runs: int,
+    megapixels: float,
+    rss: _RssSampler | None = None,
+) -> tuple[float, float | None]:
+    """Return (MP/s, peak MiB or ``None``) for ``runs`` passes after one warm-up.
+
+    ``rss`` is a sampler already running, e.g. one started before ``backend``
+    was built so that its worker processes count; by default one starts here.
+    """
+
+    async def once() -> None:
+        if batch_size > 1:
+            items = [BatchItem(src, out_dir / f"{i}.png") for i, src in enumerate(srcs[:batch_size])]
+            errors = await backend.upscale_batch(items)
+            for error in errors:
+                if error is not None:
+                    raise error
+        else:
+            await backend.upscale(srcs[0], out_dir / "0.png", tile=tile)
+
+    if hasattr(backend, "tile"):
+        backend.tile = tile
+    # The sampler starts before the warm-up: memory the warm-up allocates and
+    # keeps (workspaces, allocator pools) still belongs to this configuration.
+    with _RssSampler() if rss is None else contextlib.nullcontext(rss) as rss:
+        await once()  # warm-up: compilation, allocator growth, autotuning
+        _device_peak(backend, reset=True)
+        start = time.perf_counter()
+        for _ in range(runs):
+            await once()
+        elapsed = max(time.perf_counter() - start, 1e-9)
+    device = _device_peak(backend)
+    peak = device if device is not None else rss.growth_mb
+    return megapixels * batch_size * runs / elapsed, peak
+
+
+def _best(results: Iterable[TuneResult], budget_mb: float | None) -> TuneResult | None:
+    ok = [r for r in results if r.error is None]
+    fitting = [r for r in ok if budget_mb is None or r.peak_mb is None or r.peak_mb <= budget_mb] or ok
+    return max(fitting, key=lambda r: r.mp_per_s, default=None)
+
+
+def tune_backend(
+    backend: Backend,
+    alias: str,
+    model: str | None = None,
+    *,
+    tiles: Iterable[int] = DEFAULT_TILES,
+    batch_sizes: Iterable[int] = DEFAULT_BATCH_SIZES,
+    workers: Iterable[int] = (),
+    factory: Callable[..., Backend] | None = None,
+    image_size: tuple[int, int] = (768, 768),
+    runs: int = 2,
+    save: bool = True,
+    path: Path | None = None,
+) -> tuple[dict[str, Any] | None, list[TuneResult]]:
+    """Sweep settings on ``backend`` and persist the best for (``alias``, ``model``).
+
+    ``workers`` is only swept when ``factory(workers=n)`` can build fresh
+    backends, because the CPU pool is forked at construction.  Returns the
+    stored settings (``None`` if every run failed) and all measurements.
+    """
+
+    return asyncio.run(
+        _tune(
+            backend,
+            alias,
+            model,
+            tiles=list(tiles),
+            batch_sizes=list(batch_sizes),
+            workers=list(workers),
+            factory=factory,
+            image_size=image_size,
+            runs=max(1, int(runs)),
+            save=save,
+            path=path,
+        )
+    )
+
+
+async def _tune(backend, alias, model, *, tiles, batch_sizes, workers, factory, image_size, runs, save, path):
+    budget = memory_budget()
+    budget_mb = budget / (1024 * 1024) if budget else None
+    megapixels = image_size[0] * image_size[1] / 1e6
+    results: list[TuneResult] = []
+
+    async def probe(target: Backend, result: TuneResult, srcs, out_dir, rss=None) -> TuneResult:
+        try:
+            result.mp_per_s, result.peak_mb = await _measure(
+                target,
+                srcs,
+                out_dir,
+                tile=result.tile,
+                batch_size=result.batch_size,
+                runs=runs,
+                megapixels=megapixels,
+                rss=rss,
+            )
+        except Exception as exc:  # noqa: BLE001 - e.g. out of memory at this tile
+            result.error = f"{type(exc).__name__}: {exc}"
+        logger.info("Tune %s: %s", alias, result)
+        results.append(result)
+        return result
+
+    original_tile = getattr(backend, "tile", None)
+    with tempfile.TemporaryDirectory(prefix="sf-tune-") as tmp:
+        tmp_dir = Path(tmp)
+        srcs = []
+        for i in range(max([1, *batch_sizes])):
+            src = tmp_dir / f"synthetic-{i}.png"
+            _synthetic_image(src, image_size)
+            srcs.append(src)
+        out_dir = tmp_dir / "out"
+        out_dir.mkdir()
+
+        tile_results = [await probe(backend, TuneResult(tile), srcs, out_dir) for tile in tiles]
+        best = _best(tile_results, budget_mb)
+        if best is not None and getattr(backend, "supports_batch", False):
+            for size in batch_sizes:
+                if size > 1:
+                    await probe(backend, TuneResult(best.tile, batch_size=size), srcs, out_dir)
+        if best is not None and factory is not None:
+            for count in workers:
+                if count <= 1:
+                    continue
+                # Sample from before construction so the forked pool counts.
+                with _RssSampler() as rss:
+                    candidate = factory(workers=count)
+                    try:
+                        await probe(candidate, TuneResult(best.tile, workers=count), srcs, out_dir, rss)
+                    finally:
+                        candidate.close()
+    if hasattr(backend, "tile"):
+        backend.tile = original_tile
+
+    best = _best(results, budget_mb)
+    if best is None:
+        return None, results
+    settings = {
+        "tile": best.tile,
+        "batch_size": best.batch_size,
+        "workers": best.workers,
+        "mp_per_s": round(best.mp_per_s, 3),
+        "peak_mb": None if best.peak_mb is None else round(best.peak_mb, 1),
+        "tuned_at": datetime.now(timezone.utc).isoformat(),
+        "sweep": [asdict(r) for r in results],
+    }
+    if save:
+        save_tuning(alias, model, settings, path)
+    return settings, results
+
+
+__all__ = [
+    "TuneResult",
+    "autotune_enabled",
+    "caps_path",
+    "load_tuning",
+    "save_tuning",
+    "tune_backend",
+    "tuning_key",
+]
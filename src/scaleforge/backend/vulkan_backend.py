@@ -2,23 +2,107 @@
 
 import asyncio
 import logging
+import os
+import shutil
+import tempfile
 from pathlib import Path
+from typing import Any, Hashable, Sequence
 
-from scaleforge.backend.base import Backend, BackendError
+from PIL import Image
+
+from scaleforge.backend.base import Backend, BackendError, BatchItem
+from scaleforge.pipeline.planner import ScalePlan, Target, normalize_scale, plan_scale
 
 logger = logging.getLogger(__name__)
 
+BINARY = "realesrgan-ncnn-vulkan"
+DEFAULT_MODEL = "realesrgan"
+# ``-s`` values the binary accepts; anything else is planned onto these.
+NATIVE_SCALES = (2, 3, 4)
+
+
+def _parse_threads(value: str | None) -> str | None:
+    """Validate a ``-j`` ``load:proc:save`` spec (each part may be ``a,b`` per GPU)."""
+    if not value:
+        return None
+    parts = value.split(":")
+    if len(parts) != 3 or not all(p and p.replace(",", "").isdigit() for p in parts):
+        raise ValueError(f"Invalid Vulkan thread spec: {value} (expected load:proc:save, e.g. 1:2:2)")
+    return value
+
+
+def _stage_input(src: Path, dst: Path) -> None:
+    """Hardlink ``src`` to ``dst``, copying when linking is not possible."""
+    try:
+        os.link(src, dst)
+    except OSError:  # other filesystem, or links unsupported
+        shutil.copyfile(src, dst)
+
 
 class VulkanBackend(Backend):
-    """NCNN-vulkan-based Real-ESRGAN back-end using external binary."""
+    """NCNN-vulkan-based Real-ESRGAN back-end using external binary.
+
+    Every process start re-initialises Vulkan and reloads the model, so
+    :meth:`upscale_batch` links a whole batch into a scratch directory and
+    runs the binary once over it.
+
+    The binary only scales by :data:`NATIVE_SCALES`.  Fractional factors and
+    target sizes run the planned native passes and are resampled to the
+    exact output size afterwards.
+    """
 
     name = "vulkan"
+    supports_batch = True
+    # Process start-up dominates for small images; amortise it over many.
+    batch_size_hint = 16
+
+    def __init__(
+        self,
+        tile: int | None = None,
+        *,
+        model_name: str | None = None,
+        threads: str | None = None,
+        gpus: Sequence[int] | str | None = None,
+        procs_per_gpu: int | None = None,
+    ) -> None:
+        """Initialise the backend.
+
+        Parameters
+        ----------
+        tile:
+            ``-t`` tile size; ``None``/``0`` lets the binary choose.  A job's
+            ``tile`` metadata overrides it.
+        model_name:
+            ``-n`` model used when a job names none (``SCALEFORGE_VULKAN_MODEL``).
+        threads:
+            ``-j`` ``load:proc:save`` thread counts, e.g. ``"1:2:2"``
+            (``SCALEFORGE_VULKAN_THREADS``).
+        gpus:
+            GPU ids to spread processes over, e.g. ``[0, 1]`` or ``"0,1"``
+            (``SCALEFORGE_VULKAN_GPUS``).  ``None`` leaves ``-g`` unset.
+        procs_per_gpu:
+            Processes allowed to run at once on each GPU
+            (``SCALEFORGE_VULKAN_PROCS``, default 2).  Bounds VRAM use when
+            several ``JobQueue`` workers share the backend.
+        """
+        self.tile = tile
+        self.model_name = model_name or os.getenv("SCALEFORGE_VULKAN_MODEL") or DEFAULT_MODEL
+        self.threads = _parse_threads(threads or os.getenv("SCALEFORGE_VULKAN_THREADS"))
+        gpus = os.getenv("SCALEFORGE_VULKAN_GPUS") if gpus is None else gpus
+        if isinstance(gpus, str):
+            gpus = [int(g) for g in gpus.split(",") if g.strip()]
+        self.gpus: list[int | None] = list(gpus) if gpus else [None]
+        procs = procs_per_gpu or os.getenv("SCALEFORGE_VULKAN_PROCS") or 2
+        self.procs_per_gpu = max(1, int(procs))
+        self._busy = dict.fromkeys(self.gpus, 0)
+        self._slots: dict[int | None, asyncio.Semaphore] = {}
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
 
     def is_available(self) -> bool:
         """Check if backend is available (binary exists and Vulkan works)."""
         try:
             import subprocess
-            result = subprocess.run(["realesrgan-ncnn-vulkan", "-h"], 
+            result = subprocess.run([BINARY, "-h"],
                                   capture_output=True,
                                   check=False)
             return result.returncode == 0
@@ -29,30 +113,175 @@ class VulkanBackend(Backend):
         """Return backend description."""
         return "NCNN-Vulkan (external binary)"
 
+    @staticmethod
+    def _job_scale(job: Any, default: int = 2) -> Any:
+        meta = getattr(job, "metadata", None) or {}
+        return meta.get("scale") or default
+
+    def plan_for(self, src: Path, scale: Any = None, job: Any = None) -> ScalePlan:
+        """Plan the native passes for ``src`` from ``scale`` or job metadata."""
+        meta = getattr(job, "metadata", None) or {}
+        target = Target(**meta["target"]) if meta.get("target") else None
+        img = Image.open(src)
+        return plan_scale((img.width, img.height), scale=scale or self._job_scale(job), target=target, native_scales=NATIVE_SCALES)
+
+    def _native_scale(self, scale: Any, job: Any) -> int | None:
+        """Return the ``-s`` value when one plain pass serves the job, else ``None``."""
+        meta = getattr(job, "metadata", None) or {}
+        if meta.get("target"):
+            return None
+        value = normalize_scale(scale or self._job_scale(job))
+        return value if value in NATIVE_SCALES else None
+
+    def _job_options(self, job: Any) -> tuple[str, int | None]:
+        """Return the ``(model, tile)`` a job asks for, falling back to the defaults."""
+        meta = getattr(job, "metadata", None) or {}
+        tile = meta.get("tile")
+        return meta.get("model") or self.model_name, self.tile if tile is None else tile
+
+    def _command(
+        self, src: Path, dst: Path, scale: Any, *, model: str, tile: int | None, gpu: int | None
+    ) -> list[str]:
+        cmd = [
+            BINARY,
+            "-i", str(src),
+            "-o", str(dst),
+            "-s", f"{float(scale):g}",
+            "-n", model,
+        ]
+        if tile:
+            cmd += ["-t", str(int(tile))]
+        if self.threads:
+            cmd += ["-j", self.threads]
+        if gpu is not None:
+            cmd += ["-g", str(gpu)]
+        return cmd
+
+    def _gpu_slots(self) -> dict[int | None, asyncio.Semaphore]:
+        # Semaphores belong to one event loop; recreate them for a new one.
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots = {gpu: asyncio.Semaphore(self.procs_per_gpu) for gpu in self.gpus}
+            self._busy = dict.fromkeys(self.gpus, 0)
+            self._slots_loop = loop
+        return self._slots
+
+    async def _run(self, src: Path, dst: Path, scale: Any, *, model: str, tile: int | None) -> tuple[int, str]:
+        """Run the binary on the least busy GPU and return its exit code and output."""
+        slots = self._gpu_slots()
+        gpu = min(self.gpus, key=lambda g: self._busy[g])
+        self._busy[gpu] += 1
+        try:
+            async with slots[gpu]:
+                cmd = self._command(src, dst, scale, model=model, tile=tile, gpu=gpu)
+                if src.is_dir():
+                    cmd += ["-f", "png"]
+                logger.debug("Running Vulkan backend command: %s", cmd)
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                stdout, stderr = await process.communicate()
+        finally:
+            self._busy[gpu] -= 1
+        output = stderr.decode("utf-8", errors="ignore") or stdout.decode("utf-8", errors="ignore")
+        return process.returncode, output.strip()
 
     async def upscale(
         self,
         src: Path,
         dst: Path,
-        scale: int = 2,
+        scale: int | None = None,
+        tile: int | None = None,
+        job: Any = None,
         **kwargs,
     ) -> None:
-        """Upscale one image using realesrgan-ncnn-vulkan binary."""
-        cmd = [
-            "realesrgan-ncnn-vulkan",
-            "-i", str(src),
-            "-o", str(dst),
-            "-s", str(scale),
-            "-n", "realesrgan",
-        ]
-        logger.debug("Running Vulkan backend command: %s", cmd)
+        """Upscale one image using realesrgan-ncnn-vulkan binary.
+
+        A native factor is a single run straight into ``dst``; anything else
+        chains the planned passes through scratch files and resamples the
+        last one with Lanczos.
+        """
+        model, job_tile = self._job_options(job)
+        tile = job_tile if tile is None else tile
         dst.parent.mkdir(parents=True, exist_ok=True)
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, stderr = await process.communicate()
-        if process.returncode != 0:
-            output = stderr.decode("utf-8", errors="ignore") or stdout.decode("utf-8", errors="ignore")
-            raise BackendError(f"Vulkan backend failed (code {process.returncode}): {output.strip()}")
+        native = self._native_scale(scale, job)
+        if native is not None:
+            await self._run_checked(src, dst, native, model=model, tile=tile)
+            return
+
+        plan = self.plan_for(src, scale, job)
+        with tempfile.TemporaryDirectory(prefix=".sf-vulkan-", dir=dst.parent) as scratch:
+            current = src
+            for idx, factor in enumerate(plan.passes):
+                out = Path(scratch, f"pass{idx}.png")
+                await self._run_checked(current, out, factor, model=model, tile=tile)
+                current = out
+            img = Image.open(current)
+            if plan.resample:
+                img = img.resize(plan.size, Image.LANCZOS)
+            img.save(dst)
+
+    async def _run_checked(self, src: Path, dst: Path, scale: int, *, model: str, tile: int | None) -> None:
+        code, output = await self._run(src, dst, scale, model=model, tile=tile)
+        if code != 0:
+            raise BackendError(f"Vulkan backend failed (code {code}): {output}")
+
+    # ------------------------------------------------------------------
+    def batch_key(self, src: Path, job: Any = None) -> Hashable | None:
+        """Images sharing scale, model and tile run in one process.
+
+        Targets and non-native factors need per-image planning and run alone.
+        """
+        scale = self._native_scale(None, job)
+        if scale is None:
+            return None
+        return ("vulkan", scale, *self._job_options(job))
+
+    async def upscale_batch(self, items: Sequence[BatchItem]) -> list[BaseException | None]:
+        """Run one ``realesrgan-ncnn-vulkan`` process over all ``items``.
+
+        Inputs are hardlinked into a scratch directory next to the first
+        output, and each result is moved to its destination.  An item without
+        an output fails on its own; only a run that produced nothing at all
+        fails every item with :class:`BackendError`.
+        """
+        scale = self._native_scale(None, items[0].job)
+        if len(items) == 1 or scale is None:
+            return await super().upscale_batch(items)
+        model, tile = self._job_options(items[0].job)
+        parent = items[0].dst.parent
+        parent.mkdir(parents=True, exist_ok=True)
+        results: list[BaseException | None] = []
+        with tempfile.TemporaryDirectory(prefix=".sf-vulkan-", dir=parent) as scratch:
+            in_dir, out_dir = Path(scratch, "in"), Path(scratch, "out")
+            in_dir.mkdir()
+            out_dir.mkdir()
+            staged: list[Path | BaseException] = []
+            for idx, item in enumerate(items):
+                link = in_dir / f"{idx:06d}{item.src.suffix}"
+                try:
+                    _stage_input(item.src, link)
+                except OSError as exc:
+                    staged.append(exc)
+                else:
+                    # Directory mode names outputs after the input stem.
+                    staged.append(out_dir / f"{idx:06d}.png")
+
+            code, output = await self._run(in_dir, out_dir, scale, model=model, tile=tile)
+            produced = [p for p in staged if isinstance(p, Path) and p.exists()]
+            if code != 0 and not produced:
+                error = BackendError(f"Vulkan backend failed (code {code}): {output}")
+                return [error] * len(items)
+            for item, out in zip(items, staged):
+                if isinstance(out, BaseException):
+                    results.append(out)
+                elif out.exists():
+                    item.dst.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.move(out, item.dst)
+                    results.append(None)
+                else:
+                    results.append(RuntimeError(f"Vulkan backend produced no output for {item.src}: {output}"))
+        logger.debug("Vulkan batch of %d: %d failed", len(items), sum(r is not None for r in results))
+        return results
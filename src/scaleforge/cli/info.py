@@ -6,7 +6,8 @@ from .main import _CFG, cli, load_config
 
 
 @cli.command("info")
-def info() -> None:
+@click.option("--benchmark", is_flag=True, help="Time CPU engines and remember the faster one.")
+def info(benchmark: bool) -> None:
     """Show system and configuration information."""
     import platform
     from importlib import metadata as im
@@ -37,6 +38,7 @@ def info() -> None:
     pkgs = {
         "torch": _pkg_version("torch"),
         "onnxruntime": _pkg_version("onnxruntime"),
+        "numpy": _pkg_version("numpy"),
         "pillow": _pkg_version("Pillow"),
     }
 
@@ -69,6 +71,11 @@ def info() -> None:
         if caps["mps"]:
             available.add("torch-eager-mps")
         available.add("torch-eager-cpu")
+        available.add("torch-compiled-cpu")
+    if pkgs["onnxruntime"] != "not installed":
+        available.add("onnx-ort-cpu")
+    if pkgs["numpy"] != "not installed":
+        available.add("cpu-numpy")
     try:
         from scaleforge.backend.vulkan_backend import VulkanBackend
 
@@ -82,6 +89,14 @@ def info() -> None:
     click.echo(f"  available: {', '.join(sorted(available))}")
     click.echo()
 
+    if benchmark:
+        from scaleforge.backend.onnx_backend import benchmark_cpu_engines
+
+        click.echo("CPU benchmark (s per 128x128 tile):")
+        for name, secs in sorted(benchmark_cpu_engines().items(), key=lambda kv: kv[1]):
+            click.echo(f"  {name}: {secs:.3f}")
+        click.echo()
+
     if cfg is not None:
         click.echo("Cache:")
         click.echo(f"  database: {cfg.database_path}")
@@ -36,11 +36,11 @@ def cli(dev: bool) -> None:
     if load_config is None:
         from scaleforge.config.loader import load_config as _load_config
         load_config = _load_config
-    from scaleforge.db.models import get_conn, init_db
+    from scaleforge.db.models import get_conn
 
     _CFG = load_config()
-    with get_conn(_CFG.database_path) as conn:
-        init_db(conn)
+    with get_conn(_CFG.database_path):  # applies pending schema migrations
+        pass
 
 
 # ---------------------------------------------------------------------------
@@ -126,15 +126,27 @@ def gui() -> None:
 @click.argument("input_path", type=click.Path(exists=True, path_type=str))
 @click.option("--output", "-o", type=click.Path(path_type=str), required=True, help="Output directory")
 @click.option("--scale", type=float, default=2.0, show_default=True, help="Upscale factor")
+@click.option(
+    "--precision",
+    type=click.Choice(["fp32", "fp16", "bf16", "int8"], case_sensitive=False),
+    default="fp32",
+    show_default=True,
+    help="Inference precision (falls back when the device lacks support)",
+)
+@click.option("--target", default=None, help="Output size as WIDTHxHEIGHT or a named resolution (overrides --scale)")
 @click.option("--dry-run", is_flag=True, help="Check pipeline without running heavy steps")
 @click.option("--resume", is_flag=True, help="Resume if partial outputs exist")
+@click.option("--paranoid-hash", is_flag=True, help="Re-hash every source even if its size and mtime are unchanged")
 @click.option("--verbose", is_flag=True, help="Verbose logging")
 def run_cmd(
     input_path: str,
     output: str,
     scale: float,
+    precision: str,
+    target: str | None,
     dry_run: bool,
     resume: bool,
+    paranoid_hash: bool,
     verbose: bool,
 ) -> None:
     """Run the ScaleForge pipeline."""
@@ -143,7 +155,8 @@ def run_cmd(
     Path(output).mkdir(parents=True, exist_ok=True)
     if dry_run:
         click.echo(
-            f"[dry-run] input={input_path} output={output} scale={scale} resume={resume} verbose={verbose}"
+            f"[dry-run] input={input_path} output={output} scale={scale} target={target} precision={precision} "
+            f"resume={resume} verbose={verbose}"
         )
         return
 
@@ -159,10 +172,87 @@ def run_cmd(
         scale=scale,
         resume=resume,
         verbose=verbose,
+        precision=precision.lower(),
+        target=target,
+        paranoid=paranoid_hash or None,
     )
     raise SystemExit(0 if ok else 1)
 
 
+@cli.command("tune")
+@click.option("--backend", "backend_alias", default=None, help="Backend alias to tune (default: auto-detect)")
+@click.option("--model", default=None, help="Model name (default: the backend's default model)")
+@click.option("--quick", is_flag=True, help="Only try a couple of tile sizes")
+def tune_cmd(backend_alias: str | None, model: str | None, quick: bool) -> None:
+    """Measure tile, batch and worker settings and store the fastest."""
+    from scaleforge.backend import tuner
+    from scaleforge.backend.selector import get_backend, get_backend_alias
+    from scaleforge.backend.torch_backend import TorchBackend
+
+    alias, _ = get_backend_alias(backend_alias)
+    backend = get_backend(model, alias, cache=False)
+    if not backend.is_available():
+        raise click.ClickException(f"Backend {alias} is not available")
+
+    factory = None
+    if alias.startswith("torch-eager") and alias.endswith("-cpu") and not quick:
+
+        def factory(workers: int):
+            return TorchBackend(model_name=model, precision=getattr(backend, "precision", None), workers=workers)
+
+    click.echo(f"Tuning {alias} ({model or 'default model'}) ...")
+    try:
+        settings, results = tuner.tune_backend(
+            backend,
+            alias,
+            model,
+            tiles=tuner.QUICK_TILES if quick else tuner.DEFAULT_TILES,
+            batch_sizes=(1,) if quick else tuner.DEFAULT_BATCH_SIZES,
+            workers=tuner.DEFAULT_WORKERS,
+            factory=factory,
+        )
+    finally:
+        backend.close()
+    for r in results:
+        peak = "n/a" if r.peak_mb is None else f"{r.peak_mb:.0f} MiB"
+        status = r.error or f"{r.mp_per_s:.3f} MP/s, peak {peak}"
+        click.echo(f"  tile={r.tile} batch={r.batch_size} workers={r.workers}: {status}")
+    if settings is None:
+        raise click.ClickException("Every configuration failed")
+    click.echo(
+        f"Best: tile={settings['tile']} batch={settings['batch_size']} workers={settings['workers']} "
+        f"({settings['mp_per_s']} MP/s) -> {tuner.caps_path()}"
+    )
+
+
+@cli.group("queue")
+def queue_cmd() -> None:
+    """Inspect the job queue."""
+
+
+@queue_cmd.command("status")
+@click.argument("database", required=False, type=click.Path(exists=True, path_type=Path))
+def queue_status(database: Path | None) -> None:
+    """Print job counts per status.
+
+    DATABASE is a queue database or a ``run`` output directory (default: the
+    configured database).
+    """
+    from scaleforge.db.models import Job, get_conn
+
+    if database is None:
+        database = _CFG.database_path
+    elif database.is_dir():
+        database = database / "pipeline.db"
+    if not database.exists():
+        raise click.ClickException(f"No queue database at {database}")
+    with get_conn(database) as conn:
+        counts = Job.counts(conn)
+    for status, n in counts.items():
+        click.echo(f"{status:<14}{n:>10}")
+    click.echo(f"{'total':<14}{sum(counts.values()):>10}")
+
+
 # Global configuration populated during ``cli`` invocation
 _CFG = None
 
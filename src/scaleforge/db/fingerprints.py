@@ -0,0 +1,139 @@
+"""Stat-based cache of source file content hashes.
+
+Job hashes cover the full SHA-256 of each source (see
+:func:`scaleforge.utils.hash.hash_params`), so re-enqueuing a large library
+would read every byte again.  The ``fingerprints`` table remembers each
+file's hash together with its ``(size, mtime_ns, inode)``.  While those stay
+the same the stored hash is reused.  Paranoid mode re-reads every file
+anyway and logs any file whose content changed without its stat changing.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from scaleforge.utils.hash import file_sha256
+
+logger = logging.getLogger(__name__)
+
+# Pending fingerprint updates written per transaction.
+FLUSH_EVERY = 1000
+
+
+def paranoid_from_env() -> bool:
+    """``True`` when ``SCALEFORGE_PARANOID_HASH`` asks to re-hash every file."""
+
+    return os.getenv("SCALEFORGE_PARANOID_HASH", "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+class FingerprintCache:
+    """Look up and record source file hashes on an open database connection."""
+
+    def __init__(self, conn: sqlite3.Connection, *, paranoid: bool | None = None) -> None:
+        """Create the cache.
+
+        Parameters
+        ----------
+        conn:
+            Connection to a database at schema version 4 or later.
+        paranoid:
+            Always hash file contents, ignoring the stored fingerprint.
+            ``None`` reads ``SCALEFORGE_PARANOID_HASH``.
+        """
+
+        self.conn = conn
+        self.paranoid = paranoid_from_env() if paranoid is None else bool(paranoid)
+        self.hits = 0
+        self.misses = 0
+        self._pending: list[tuple[str, int, int, int, str]] = []
+
+    def sha256(self, path: Path | str) -> str:
+        """Return the SHA-256 of ``path``, reading the file only when needed."""
+
+        key, stat, known = self._lookup(path)
+        if known is not None and not self.paranoid:
+            self.hits += 1
+            return known
+        return self._record(key, stat, known, file_sha256(Path(key)))
+
+    def sha256_many(self, paths: Iterable[Path | str], workers: int = 1) -> Iterator[tuple[Path, str]]:
+        """Yield ``(path, sha256)`` for each of ``paths``, in order.
+
+        Files that need reading are hashed on ``workers`` threads (``hashlib``
+        releases the GIL), at most a few per worker ahead of the consumer.
+        Database access stays on the calling thread.
+        """
+
+        if workers <= 1:
+            for path in paths:
+                yield Path(path), self.sha256(path)
+            return
+
+        ahead = 4 * workers
+        window: deque[tuple[Path, str, tuple[int, int, int], str | None, Future | None]] = deque()
+
+        def settle() -> tuple[Path, str]:
+            path, key, stat, known, fut = window.popleft()
+            return path, known if fut is None else self._record(key, stat, known, fut.result())
+
+        with ThreadPoolExecutor(workers, thread_name_prefix="sf-hash") as pool:
+            try:
+                for path in paths:
+                    key, stat, known = self._lookup(path)
+                    if known is not None and not self.paranoid:
+                        self.hits += 1
+                        window.append((Path(path), key, stat, known, None))
+                    else:
+                        window.append((Path(path), key, stat, known, pool.submit(file_sha256, Path(key))))
+                    while window and (len(window) > ahead or window[0][4] is None or window[0][4].done()):
+                        yield settle()
+                while window:
+                    yield settle()
+            finally:
+                for *_, fut in window:
+                    if fut is not None:
+                        fut.cancel()
+
+    def _lookup(self, path: Path | str) -> tuple[str, tuple[int, int, int], str | None]:
+        """Return ``path``'s key, stat tuple and stored hash if the stat still matches."""
+
+        key = str(Path(path).absolute())
+        st = os.stat(key)
+        stat = (st.st_size, st.st_mtime_ns, st.st_ino)
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, inode, sha256 FROM fingerprints WHERE path=?", (key,)
+        ).fetchone()
+        return key, stat, row[3] if row is not None and tuple(row[:3]) == stat else None
+
+    def _record(self, key: str, stat: tuple[int, int, int], known: str | None, digest: str) -> str:
+        """Count a file that was read and queue its fingerprint update."""
+
+        self.misses += 1
+        if known is not None and known != digest:
+            logger.warning("Contents of %s changed without a size or mtime change", key)
+        if digest != known:
+            self._pending.append((key, *stat, digest))
+            if len(self._pending) >= FLUSH_EVERY:
+                self.flush()
+        return digest
+
+    def flush(self) -> None:
+        """Write pending fingerprints to the database."""
+
+        if not self._pending:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO fingerprints (path, size, mtime_ns, inode, sha256) VALUES (?,?,?,?,?)",
+            self._pending,
+        )
+        self.conn.commit()
+        self._pending.clear()
+
+
+__all__ = ["FingerprintCache", "paranoid_from_env"]
@@ -5,27 +5,34 @@ from __future__ import annotations
 import json
 import sqlite3
 from contextlib import contextmanager
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Iterator, Any, Mapping
+from typing import Callable, Iterable, Iterator, Any, Mapping
 
 
 # ---------------------------------------------------------------------------
 # Schema management
 # ---------------------------------------------------------------------------
 
-SCHEMA_VERSION = 2
+SCHEMA_VERSION = 5
 
-DB_SCHEMA = """
-PRAGMA journal_mode=WAL;
-PRAGMA busy_timeout=5000;
+# Rows per transaction in :meth:`Job.bulk_create`.
+BULK_CHUNK = 5000
 
-CREATE TABLE IF NOT EXISTS schema_info (
-    version INTEGER PRIMARY KEY,
-    updated_at TEXT NOT NULL
-);
+# Failed jobs are retried until they have failed this many times.
+MAX_ATTEMPTS = 3
+
+# Jobs a worker may claim.  Queries spell this out literally (no bound
+# parameters) so SQLite can prove they match the ``jobs_claimable`` index.
+CLAIMABLE = f"(status='pending' OR (status='failed' AND attempts<{MAX_ATTEMPTS}))"
 
+# Incremental schema migrations, keyed by the version they upgrade to.  Each
+# script must be idempotent: two processes may race to apply the same step.
+# Version 2 is the baseline every older database is brought up to.
+MIGRATIONS: dict[int, str] = {
+    2: """
 CREATE TABLE IF NOT EXISTS jobs (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     src_path TEXT NOT NULL,
@@ -58,7 +65,59 @@ CREATE TABLE IF NOT EXISTS resolutions (
     mode TEXT NOT NULL,
     created_at TEXT NOT NULL
 );
-"""
+""",
+    3: f"""
+CREATE INDEX IF NOT EXISTS jobs_claimable ON jobs(id) WHERE {CLAIMABLE};
+
+CREATE TABLE IF NOT EXISTS job_counts (
+    status TEXT PRIMARY KEY,
+    n INTEGER NOT NULL
+);
+INSERT OR REPLACE INTO job_counts (status, n) SELECT status, COUNT(*) FROM jobs GROUP BY status;
+
+CREATE TRIGGER IF NOT EXISTS jobs_count_insert AFTER INSERT ON jobs BEGIN
+    INSERT INTO job_counts (status, n) VALUES (NEW.status, 1)
+        ON CONFLICT(status) DO UPDATE SET n = n + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS jobs_count_delete AFTER DELETE ON jobs BEGIN
+    UPDATE job_counts SET n = n - 1 WHERE status = OLD.status;
+END;
+
+CREATE TRIGGER IF NOT EXISTS jobs_count_update AFTER UPDATE OF status ON jobs
+WHEN OLD.status IS NOT NEW.status BEGIN
+    UPDATE job_counts SET n = n - 1 WHERE status = OLD.status;
+    INSERT INTO job_counts (status, n) VALUES (NEW.status, 1)
+        ON CONFLICT(status) DO UPDATE SET n = n + 1;
+END;
+""",
+    4: """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+""",
+    5: """
+CREATE INDEX IF NOT EXISTS jobs_claimed ON jobs(updated_at) WHERE status='upscaled_raw';
+""",
+}
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    """Open a long-lived connection, initializing schema if required.
+
+    The caller owns the connection and must close it.  Prefer this over
+    :func:`get_conn` in loops, where reconnecting and re-checking the schema
+    per operation would dominate.
+    """
+
+    conn = sqlite3.connect(db_path)
+    if not check_schema(conn):
+        init_db(conn)
+    return conn
 
 
 @contextmanager
@@ -72,36 +131,67 @@ def get_conn(db_path: Path | sqlite3.Connection) -> Iterator[sqlite3.Connection]
         yield conn
         return
 
-    conn = sqlite3.connect(db_path)
+    conn = connect(db_path)
     try:
-        if not check_schema(conn):
-            init_db(conn)
         yield conn
     finally:
         conn.close()
 
 
-def check_schema(conn: sqlite3.Connection) -> bool:
-    """Return True if database schema matches ``SCHEMA_VERSION``."""
+def schema_version(conn: sqlite3.Connection) -> int:
+    """Return the schema version recorded in ``conn`` (``0`` for a new database)."""
 
     try:
-        cur = conn.execute("SELECT version FROM schema_info")
-        row = cur.fetchone()
-        return bool(row) and row[0] == SCHEMA_VERSION
+        row = conn.execute("SELECT MAX(version) FROM schema_info").fetchone()
     except sqlite3.OperationalError:
-        return False
+        return 0
+    return int(row[0] or 0)
 
 
-def init_db(conn: sqlite3.Connection) -> None:
-    """Initialize or upgrade the database schema."""
+def check_schema(conn: sqlite3.Connection) -> bool:
+    """Return True if database schema matches ``SCHEMA_VERSION``."""
+
+    return schema_version(conn) == SCHEMA_VERSION
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply the :data:`MIGRATIONS` newer than the database; return the final version.
+
+    Each step runs in its own write transaction together with the
+    ``schema_info`` update, so an interrupted upgrade resumes where it
+    stopped.  An up-to-date database is left untouched.
+    """
 
-    conn.executescript(DB_SCHEMA)
-    conn.execute("DELETE FROM schema_info")
+    current = schema_version(conn)
+    pending = sorted(v for v in MIGRATIONS if current < v <= SCHEMA_VERSION)
+    if not pending:
+        return current
+    conn.commit()
+    conn.execute("PRAGMA journal_mode=WAL")
     conn.execute(
-        "INSERT INTO schema_info (version, updated_at) VALUES (?, ?)",
-        (SCHEMA_VERSION, datetime.now(timezone.utc).isoformat()),
+        "CREATE TABLE IF NOT EXISTS schema_info (version INTEGER PRIMARY KEY, updated_at TEXT NOT NULL)"
     )
-    conn.commit()
+    for version in pending:
+        try:
+            conn.executescript(
+                f"BEGIN IMMEDIATE;\n{MIGRATIONS[version]}\n"
+                "DELETE FROM schema_info;\n"
+                f"INSERT INTO schema_info (version, updated_at) VALUES ({version}, "
+                f"'{datetime.now(timezone.utc).isoformat()}');\n"
+                "COMMIT;"
+            )
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        current = version
+    return current
+
+
+def init_db(conn: sqlite3.Connection) -> None:
+    """Initialize or upgrade the database schema."""
+
+    migrate(conn)
 
 
 def reset_db(db_path: Path) -> None:
@@ -178,6 +268,62 @@ class Job:
         conn.commit()
         return cls(id=job_id, **data)
 
+    @staticmethod
+    def bulk_create(
+        conn: sqlite3.Connection,
+        rows: Iterable[Mapping[str, Any]],
+        chunk_size: int = BULK_CHUNK,
+        *,
+        first_chunk: int | None = None,
+        on_commit: Callable[[int], None] | None = None,
+    ) -> tuple[int, int]:
+        """Insert ``rows`` whose hash is not present; return ``(inserted, skipped)``.
+
+        Rows take the same keys as :meth:`create_or_skip`.  They are written
+        with ``INSERT OR IGNORE`` in transactions of ``chunk_size`` rows, so
+        one commit covers a whole chunk and ``rows`` may be a lazy iterator.
+
+        ``first_chunk`` starts with smaller transactions that double up to
+        ``chunk_size``, so consumers see the first rows of a slow iterator
+        early.  ``on_commit`` is called with the number of rows each commit
+        added.
+        """
+
+        inserted = skipped = 0
+        chunk_size = max(1, int(chunk_size))
+        size = min(chunk_size, max(1, int(first_chunk or chunk_size)))
+        it = iter(rows)
+        while chunk := list(islice(it, size)):
+            size = min(chunk_size, size * 2)
+            now = datetime.now(timezone.utc).isoformat()
+            try:
+                cur = conn.executemany(
+                    "INSERT OR IGNORE INTO jobs "
+                    "(src_path, hash, status, attempts, error, created_at, updated_at, metadata) "
+                    "VALUES(?,?,?,0,NULL,?,?,?)",
+                    (
+                        (
+                            data["src_path"],
+                            data["hash"],
+                            JobStatus.PENDING,
+                            now,
+                            now,
+                            json.dumps(data.get("metadata")) if data.get("metadata") is not None else None,
+                        )
+                        for data in chunk
+                    ),
+                )
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            added = cur.rowcount  # excludes rows written by triggers
+            inserted += added
+            skipped += len(chunk) - added
+            if on_commit is not None:
+                on_commit(added)
+        return inserted, skipped
+
     @classmethod
     def from_row(cls, row: sqlite3.Row) -> "Job":
         data = dict(row)
@@ -190,13 +336,99 @@ class Job:
         """Return jobs eligible for processing (pending or retryable failed)."""
 
         conn.row_factory = sqlite3.Row
-        cur = conn.execute(
-            "SELECT * FROM jobs WHERE (status=? OR (status=? AND attempts<3)) LIMIT ?",
-            (JobStatus.PENDING, JobStatus.FAILED, limit),
-        )
+        cur = conn.execute(f"SELECT * FROM jobs WHERE {CLAIMABLE} ORDER BY id LIMIT ?", (limit,))
         return [cls.from_row(r) for r in cur.fetchall()]
 
+    @staticmethod
+    def counts(conn: sqlite3.Connection) -> dict[str, int]:
+        """Return the number of jobs per status.
+
+        Reads the trigger-maintained ``job_counts`` table, so the cost does not
+        grow with the size of the queue.
+        """
+
+        return {status: n for status, n in conn.execute("SELECT status, n FROM job_counts ORDER BY status") if n}
+
+    @classmethod
+    def claim(cls, conn: sqlite3.Connection, limit: int = 1) -> list["Job"]:
+        """Atomically mark up to ``limit`` eligible jobs as in progress and return them.
+
+        Eligibility matches :meth:`pending`.  Selection and update happen in
+        one write transaction, so concurrent workers (or processes) sharing
+        the database never claim the same job.
+        """
+
+        now = datetime.now(timezone.utc).isoformat()
+        eligible = f"SELECT id FROM jobs WHERE {CLAIMABLE} ORDER BY id LIMIT ?"
+        args = (limit,)
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            cur = conn.execute(
+                f"UPDATE jobs SET status=?, updated_at=? WHERE id IN ({eligible}) RETURNING *",
+                (JobStatus.UPSCALED_RAW, now, *args),
+            )
+            cur.row_factory = sqlite3.Row
+            rows = cur.fetchall()
+            conn.commit()
+        else:  # pragma: no cover - SQLite without RETURNING
+            conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [row[0] for row in conn.execute(eligible, args)]
+                marks = ",".join("?" * len(ids))
+                rows = []
+                if ids:
+                    conn.execute(
+                        f"UPDATE jobs SET status=?, updated_at=? WHERE id IN ({marks})",
+                        (JobStatus.UPSCALED_RAW, now, *ids),
+                    )
+                    cur = conn.execute(f"SELECT * FROM jobs WHERE id IN ({marks})", ids)
+                    cur.row_factory = sqlite3.Row
+                    rows = cur.fetchall()
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        return sorted((cls.from_row(r) for r in rows), key=lambda job: job.id)
+
+    @staticmethod
+    def release(conn: sqlite3.Connection, ids: list[int]) -> None:
+        """Return claimed but unprocessed jobs to the pending state."""
+
+        if not ids:
+            return
+        conn.execute(
+            f"UPDATE jobs SET status=? WHERE status=? AND id IN ({','.join('?' * len(ids))})",
+            (JobStatus.PENDING, JobStatus.UPSCALED_RAW, *ids),
+        )
+        conn.commit()
+
+    @staticmethod
+    def reclaim(conn: sqlite3.Connection, older_than: float | None = None) -> int:
+        """Return stale claims to the pending state; return how many were reclaimed.
+
+        :meth:`claim` stamps ``updated_at``, so a job still ``upscaled_raw``
+        long after that was claimed by a worker that died.  ``older_than`` is
+        the lease in seconds; ``None`` reclaims every claim, which is only
+        safe when no other process is working on the database.
+        """
+
+        if older_than is None:
+            cur = conn.execute("UPDATE jobs SET status=? WHERE status='upscaled_raw'", (JobStatus.PENDING,))
+        else:
+            cutoff = (datetime.now(timezone.utc) - timedelta(seconds=older_than)).isoformat()
+            cur = conn.execute(
+                "UPDATE jobs SET status=? WHERE status='upscaled_raw' AND updated_at<?",
+                (JobStatus.PENDING, cutoff),
+            )
+        conn.commit()
+        return cur.rowcount
+
     def set_status(self, conn: sqlite3.Connection, status: str, error: str | None = None):
+        """Persist ``status`` along with the job's current metadata.
+
+        Backends may annotate :attr:`metadata` while processing (for example
+        tile-skip statistics); those annotations are saved here.
+        """
         self.status = status
         self.updated_at = datetime.now(timezone.utc).isoformat()
         if error:
@@ -204,8 +436,15 @@ class Job:
         if status == JobStatus.FAILED:
             self.attempts += 1
         conn.execute(
-            "UPDATE jobs SET status=?, attempts=?, error=?, updated_at=? WHERE id=?",
-            (self.status, self.attempts, self.error, self.updated_at, self.id),
+            "UPDATE jobs SET status=?, attempts=?, error=?, updated_at=?, metadata=? WHERE id=?",
+            (
+                self.status,
+                self.attempts,
+                self.error,
+                self.updated_at,
+                json.dumps(self.metadata) if self.metadata is not None else None,
+                self.id,
+            ),
         )
         conn.commit()
 
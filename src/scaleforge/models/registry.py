@@ -51,6 +51,12 @@ def _manual_validate(reg: Dict[str, Any]) -> List[str]:
             errors.append(
                 f"{name}: info must include 'url' or non-empty 'urls'"
             )
+        arch = entry.get("arch")
+        if arch is not None:
+            if not (isinstance(arch, dict) and isinstance(arch.get("name"), str)):
+                errors.append(f"{name}: arch must be an object with a 'name'")
+            elif not isinstance(arch.get("params", {}), dict):
+                errors.append(f"{name}: arch.params must be an object")
     return errors
 
 
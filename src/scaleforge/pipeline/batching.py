@@ -0,0 +1,96 @@
+"""Cross-job micro-batching between :class:`JobQueue` and a backend.
+
+Workers submit single images; the :class:`MicroBatcher` groups them into
+buckets using :meth:`Backend.batch_key` and hands each bucket to
+:meth:`Backend.upscale_batch` once it is full or its oldest item has waited
+``max_wait`` seconds.  Per-item results are fanned back out to the waiting
+submitters.  With ``atlas=True`` the same machinery groups small images by
+:meth:`Backend.atlas_key` and runs them through :meth:`Backend.upscale_atlas`.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Hashable
+
+from scaleforge.backend.base import Backend, BatchItem
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Collect images into same-shape batches with bounded latency."""
+
+    def __init__(self, backend: Backend, max_batch: int = 8, max_wait: float = 0.05, *, atlas: bool = False):
+        self.backend = backend
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self._key_fn = backend.atlas_key if atlas else backend.batch_key
+        self._run_fn = backend.upscale_atlas if atlas else backend.upscale_batch
+        self._buckets: dict[Hashable, list[tuple[BatchItem, asyncio.Future]]] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    # ------------------------------------------------------------------
+    async def submit(self, item: BatchItem, *, key: Hashable | None = None) -> None:
+        """Queue ``item`` and wait until its batch has run.
+
+        ``key`` is the item's bucket if the caller already computed it.
+        Raises the per-item error reported by the backend, if any.
+        """
+        if key is None:
+            key = await asyncio.to_thread(self._key_fn, item.src, item.job)
+        if key is None:
+            result = (await self._run_fn([item]))[0]
+            if result is not None:
+                raise result
+            return
+
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        bucket = self._buckets.setdefault(key, [])
+        bucket.append((item, fut))
+        if len(bucket) >= self.max_batch:
+            self._flush(key)
+        elif len(bucket) == 1:
+            self._timers[key] = loop.call_later(self.max_wait, self._flush, key)
+        await fut
+
+    async def drain(self) -> None:
+        """Flush every pending bucket and wait for in-flight batches."""
+        for key in list(self._buckets):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        entries = self._buckets.pop(key, None)
+        if not entries:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(key, entries))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable, entries: list[tuple[BatchItem, asyncio.Future]]) -> None:
+        logger.debug("Running batch of %d for bucket %s", len(entries), key)
+        try:
+            results = await self._run_fn([item for item, _ in entries])
+        except Exception as exc:  # noqa: BLE001 - whole batch failed
+            results = [exc] * len(entries)
+        for (_, fut), result in zip(entries, results):
+            if fut.done():
+                continue
+            if result is None:
+                fut.set_result(None)
+            else:
+                fut.set_exception(result)
+        for _, fut in entries:
+            if not fut.done():
+                fut.set_exception(RuntimeError("backend returned no result for batch item"))
+
+
+__all__ = ["MicroBatcher"]
@@ -3,20 +3,28 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import os
 import shutil
 from pathlib import Path
-from typing import Sequence
+from typing import Iterator
 
 from scaleforge.backend.base import Backend
 from scaleforge.backend.torch_backend import TorchBackend
 from scaleforge.db.models import Job, JobStatus, get_conn
+from .planner import output_suffix, parse_target
 from .queue import JobQueue
 
 
-def _collect_inputs(path: Path) -> Sequence[Path]:
-    if path.is_dir():
-        return sorted(p for p in path.rglob("*.png") if p.is_file())
-    return [path]
+def _iter_inputs(path: Path) -> Iterator[Path]:
+    """Yield ``.png`` files under ``path`` in sorted order, one directory at a time."""
+    if not path.is_dir():
+        yield path
+        return
+    for root, dirs, names in os.walk(path):
+        dirs.sort()
+        for name in sorted(names):
+            if name.endswith(".png") and os.path.isfile(os.path.join(root, name)):
+                yield Path(root, name)
 
 
 def run_pipeline(
@@ -25,6 +33,9 @@ def run_pipeline(
     scale: float = 2.0,
     resume: bool = False,
     verbose: bool = False,
+    precision: str = "fp32",
+    target: str | None = None,
+    paranoid: bool | None = None,
 ) -> bool:
     """Run the upscaling pipeline using :class:`JobQueue`.
 
@@ -36,12 +47,21 @@ def run_pipeline(
     output_dir:
         Directory where processed images will be written.
     scale:
-        Requested upscale factor. Currently only ``2`` is honoured by the
-        internal :class:`JobQueue` implementation.
+        Requested upscale factor; fractional factors are allowed (see
+        :mod:`scaleforge.pipeline.planner`).
     resume:
         When ``True`` existing database state is re-used allowing resumed jobs.
     verbose:
         Enable verbose logging.
+    precision:
+        Inference precision (``fp32``, ``fp16``, ``bf16`` or ``int8``). Recorded in the
+        job hash so results of different precisions are never mixed.
+    target:
+        Output box as ``WxH`` or a named resolution; overrides ``scale``.
+    paranoid:
+        Re-hash every source instead of trusting unchanged file stats (see
+        :class:`~scaleforge.db.fingerprints.FingerprintCache`).  ``None`` reads
+        ``SCALEFORGE_PARANOID_HASH``.
     """
 
     input_path = Path(input_path)
@@ -51,23 +71,34 @@ def run_pipeline(
     logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO)
 
     # Use the Torch backend in stub mode for now; heavy deps hook in later
-    backend: Backend = TorchBackend(stub=True)
+    backend: Backend = TorchBackend(stub=True, precision=precision)
 
     db_path = output_dir / "pipeline.db"
     queue = JobQueue(db_path, backend)
 
-    files = _collect_inputs(input_path)
+    with get_conn(db_path) as conn:
+        box = parse_target(target, conn) if target else None
+
+    # Discovery and hashing stream into the queue while workers already run.
+    files: list[Path] = []
+
+    def discover() -> Iterator[Path]:
+        for src in _iter_inputs(input_path):
+            files.append(src)
+            yield src
+
+    added = asyncio.run(
+        queue.run_streaming(discover(), resume=resume, scale=scale, target=box, paranoid=paranoid)
+    )
     if not files:
         logging.warning("No input files found for %s", input_path)
         return False
-
-    queue.enqueue(files, scale=int(scale))
-
-    asyncio.run(queue.run(resume=resume))
+    logging.info("Queued %d new job(s); %d already queued", added.inserted, added.skipped)
 
     # Move outputs to requested directory
+    suffix = output_suffix(scale, box)
     for src in files:
-        produced = src.with_suffix(src.suffix + ".x2.png")
+        produced = src.with_suffix(src.suffix + suffix)
         if produced.exists():
             shutil.move(str(produced), str(output_dir / produced.name))
 
@@ -0,0 +1,209 @@
+"""Scale planning: from a requested factor or target size to model passes.
+
+A :class:`ScalePlan` lists the native model passes to run (e.g. ``(2, 4)``
+for x8) followed by an optional final resample to the exact output size.
+:func:`plan_scale` picks the cheapest chain of the model scales a backend
+offers.  Cost is the number of input pixels each pass processes, so smaller
+factors run first: x8 is x2 then x4, not x4 then x2.  Fractional factors
+overshoot to the next native chain and downscale afterwards, and a source
+that already meets the target skips inference entirely.
+
+Targets are either explicit ``(width, height)`` pairs or named rows of the
+``resolutions`` table (see :func:`get_resolution` / :func:`add_resolution`).
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping
+
+# How a target box is applied to the source aspect ratio.
+FIT_MODES = ("fit", "fill", "stretch")
+DEFAULT_FIT_MODE = "fit"
+MAX_PASSES = 4
+
+# Named targets available even when the ``resolutions`` table has no row.
+PRESET_RESOLUTIONS = {
+    "hd": (1280, 720),
+    "fhd": (1920, 1080),
+    "qhd": (2560, 1440),
+    "4k": (3840, 2160),
+    "8k": (7680, 4320),
+}
+
+
+@dataclass(frozen=True)
+class Target:
+    """Requested output box."""
+
+    width: int
+    height: int
+    mode: str = DEFAULT_FIT_MODE
+
+    def __post_init__(self) -> None:
+        if self.width <= 0 or self.height <= 0:
+            raise ValueError(f"Invalid target size: {self.width}x{self.height}")
+        if self.mode not in FIT_MODES:
+            raise ValueError(f"Invalid fit mode: {self.mode} (choose from {', '.join(FIT_MODES)})")
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"width": self.width, "height": self.height, "mode": self.mode}
+
+
+@dataclass(frozen=True)
+class ScalePlan:
+    """Model passes to run and the final output size."""
+
+    passes: tuple[int, ...]
+    size: tuple[int, int]
+    resample: bool
+
+    @property
+    def native(self) -> int:
+        """Total upscale produced by the model passes alone."""
+        return math.prod(self.passes)
+
+
+def normalize_scale(scale: float | None) -> float | int:
+    """Return ``scale`` (default 2) as an ``int`` when it is a whole number.
+
+    Keeps job hashes stable whether callers pass ``2`` or ``2.0``.
+    """
+
+    value = float(scale or 2)
+    if value <= 0 or not math.isfinite(value):
+        raise ValueError(f"Invalid scale: {scale}")
+    return int(value) if value.is_integer() else value
+
+
+def output_size(src: tuple[int, int], *, scale: float | None = None, target: Target | None = None) -> tuple[int, int]:
+    """Return the final ``(width, height)`` for ``src``."""
+
+    width, height = src
+    if target is None:
+        factor = normalize_scale(scale)
+        return max(1, round(width * factor)), max(1, round(height * factor))
+    if target.mode == "stretch":
+        return target.width, target.height
+    ratios = (target.width / width, target.height / height)
+    factor = min(ratios) if target.mode == "fit" else max(ratios)
+    return max(1, round(width * factor)), max(1, round(height * factor))
+
+
+def _chain_cost(chain: Iterable[int]) -> float:
+    """Relative compute of ``chain``: input pixels of every pass."""
+
+    cost, area = 0.0, 1.0
+    for factor in chain:
+        cost += area
+        area *= factor * factor
+    return cost
+
+
+def plan_scale(
+    src: tuple[int, int],
+    *,
+    scale: float | None = None,
+    target: Target | None = None,
+    native_scales: Iterable[int] = (4,),
+) -> ScalePlan:
+    """Plan how to turn a ``src``-sized image into the requested output."""
+
+    size = output_size(src, scale=scale, target=target)
+    needed = max(size[0] / src[0], size[1] / src[1])
+    natives = sorted({int(s) for s in native_scales if int(s) > 1})
+    if needed <= 1 or not natives:
+        return ScalePlan((), size, size != tuple(src))
+
+    best: tuple[float, int, float, tuple[int, ...]] | None = None
+    for depth in range(1, MAX_PASSES + 1):
+        for chain in itertools.combinations_with_replacement(natives, depth):
+            total = math.prod(chain)
+            if total < needed - 1e-9:
+                continue
+            # Cheapest first, then fewer passes, then least overshoot.
+            key = (_chain_cost(chain), depth, total, chain)
+            if best is None or key < best:
+                best = key
+    if best is None:  # beyond MAX_PASSES: run the largest model repeatedly
+        chain = (natives[-1],) * MAX_PASSES
+    else:
+        chain = best[3]
+    native_size = (src[0] * math.prod(chain), src[1] * math.prod(chain))
+    return ScalePlan(tuple(chain), size, native_size != size)
+
+
+def output_suffix(scale: float | None = None, target: Target | Mapping[str, Any] | None = None) -> str:
+    """File suffix identifying an output, e.g. ``.x2.png`` or ``.1920x1080.png``."""
+
+    if target is not None:
+        if isinstance(target, Mapping):
+            target = Target(**target)
+        mode = "" if target.mode == DEFAULT_FIT_MODE else f"-{target.mode}"
+        return f".{target.width}x{target.height}{mode}.png"
+    return f".x{normalize_scale(scale):g}.png"
+
+
+# ---------------------------------------------------------------------------
+# ``resolutions`` table
+# ---------------------------------------------------------------------------
+
+
+def parse_target(value: str, conn: sqlite3.Connection | None = None, mode: str | None = None) -> Target:
+    """Parse ``WxH`` or look ``value`` up by name in the ``resolutions`` table."""
+
+    width, sep, height = value.lower().partition("x")
+    if sep and width.isdigit() and height.isdigit():
+        return Target(int(width), int(height), mode or DEFAULT_FIT_MODE)
+    if conn is None:
+        raise ValueError(f"Invalid target: {value} (expected WIDTHxHEIGHT or a named resolution)")
+    target = get_resolution(conn, value)
+    if target is None:
+        raise ValueError(f"Unknown resolution: {value}")
+    return Target(target.width, target.height, mode or target.mode)
+
+
+def get_resolution(conn: sqlite3.Connection, name: str) -> Target | None:
+    """Return the named resolution, or ``None`` if it is not defined.
+
+    Rows in the table take precedence over :data:`PRESET_RESOLUTIONS`.
+    """
+
+    row = conn.execute(
+        "SELECT width, height, mode FROM resolutions WHERE name=? ORDER BY id DESC LIMIT 1", (name,)
+    ).fetchone()
+    if row is None:
+        preset = PRESET_RESOLUTIONS.get(name.lower())
+        return Target(*preset) if preset else None
+    return Target(int(row[0]), int(row[1]), row[2] or DEFAULT_FIT_MODE)
+
+
+def add_resolution(conn: sqlite3.Connection, name: str, width: int, height: int, mode: str = DEFAULT_FIT_MODE) -> Target:
+    """Define (or redefine) a named resolution."""
+
+    target = Target(width, height, mode)
+    conn.execute("DELETE FROM resolutions WHERE name=?", (name,))
+    conn.execute(
+        "INSERT INTO resolutions (name, width, height, mode, created_at) VALUES (?,?,?,?,?)",
+        (name, width, height, mode, datetime.now(timezone.utc).isoformat()),
+    )
+    conn.commit()
+    return target
+
+
+__all__ = [
+    "FIT_MODES",
+    "ScalePlan",
+    "Target",
+    "add_resolution",
+    "get_resolution",
+    "normalize_scale",
+    "output_size",
+    "output_suffix",
+    "parse_target",
+    "plan_scale",
+]
@@ -4,89 +4,528 @@ from __future__ import annotations
 import asyncio
 import inspect
 import logging
+import os
 import random
+import sqlite3
+import threading
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Callable, Hashable, Iterable, Iterator
 
-from scaleforge.backend.base import Backend, BackendError
-from scaleforge.db.models import Job, JobStatus, get_conn
+from scaleforge.backend.base import Backend, BackendError, BatchItem
+from scaleforge.backend.tiling import DEFAULT_TILE_PAD
+from scaleforge.db.fingerprints import FingerprintCache
+from scaleforge.db.models import BULK_CHUNK, Job, JobStatus, connect, get_conn
 from scaleforge.utils.hash import hash_params
 
+from .batching import MicroBatcher
+from .planner import Target, normalize_scale, output_suffix, parse_target
+from .stages import StagePipeline
+
 logger = logging.getLogger(__name__)
 
+# Seconds after which a job still marked in progress is assumed abandoned by
+# a crashed or killed worker and handed out again.
+DEFAULT_CLAIM_LEASE = 3600.0
+
+
+@dataclass
+class EnqueueResult:
+    """Outcome of :meth:`JobQueue.enqueue`."""
+
+    inserted: int = 0
+    skipped: int = 0  # already queued with the same hash
+
+    @property
+    def total(self) -> int:
+        return self.inserted + self.skipped
+
+
+class _JobSource:
+    """A worker's database connection, feeding from the queue's claimed-job deque."""
+
+    def __init__(self, db_path: Path, claim_size: int, claimed: deque[Job]):
+        self.conn: sqlite3.Connection = connect(db_path)
+        self.claim_size = claim_size
+        self.claimed = claimed
+
+    def take(self, limit: int) -> list[Job]:
+        """Return up to ``limit`` jobs, claiming a new batch when the deque runs low."""
+        if len(self.claimed) < limit:
+            self.claimed.extend(Job.claim(self.conn, max(self.claim_size, limit - len(self.claimed))))
+        return [self.claimed.popleft() for _ in range(min(limit, len(self.claimed)))]
+
+    def put_back(self, jobs: list[Job]) -> None:
+        """Return unstarted ``jobs`` to the front of the deque, in order."""
+        self.claimed.extendleft(reversed(jobs))
+
+    def close(self) -> None:
+        self.conn.close()
+
 
 class JobQueue:
     """Manage persistent jobs with retry / resume logic."""
 
-    def __init__(self, db_path: Path, backend: Backend, concurrency: int = 1):
+    def __init__(
+        self,
+        db_path: Path,
+        backend: Backend,
+        concurrency: int = 1,
+        *,
+        batch_size: int | None = None,
+        batch_max_wait: float = 0.05,
+        decode_workers: int = 1,
+        infer_workers: int | None = None,
+        encode_workers: int = 1,
+        prefetch: int = 2,
+        claim_size: int = 16,
+        claim_lease: float | None = DEFAULT_CLAIM_LEASE,
+    ):
+        """Create a queue backed by the SQLite database at ``db_path``.
+
+        When ``batch_size`` > 1 and the backend advertises
+        :attr:`Backend.supports_batch`, workers claim up to ``batch_size``
+        jobs at a time and a :class:`MicroBatcher` groups same-shape images
+        across workers, waiting at most ``batch_max_wait`` seconds for a
+        bucket to fill.  ``None`` uses the backend's tuned
+        :attr:`Backend.batch_size_hint`.
+
+        Otherwise, backends advertising :attr:`Backend.supports_stages` run
+        through a :class:`StagePipeline`.  ``decode_workers``,
+        ``infer_workers`` (default ``concurrency``) and ``encode_workers`` size
+        its thread pools, and ``prefetch`` bounds each inter-stage queue.
+
+        Each worker keeps one database connection and claims ``claim_size``
+        jobs per round trip with an atomic :meth:`Job.claim`.  Claimed jobs
+        wait in an in-memory deque shared by the workers; any left unstarted
+        when :meth:`run` returns are released.  Claims left behind by a crash
+        are reclaimed when :meth:`run` starts: all of them with
+        ``resume=True``, otherwise those older than ``claim_lease`` seconds
+        (``None`` never reclaims them without ``resume``).
+
+        Backends with an :attr:`Backend.atlas_capacity` additionally get
+        small images packed onto shared atlas canvases (see
+        :meth:`Backend.atlas_key`); larger images take the paths above.
+        """
         self.db_path = Path(db_path)
         self.backend = backend
         self.concurrency = max(1, int(concurrency or 1))
+        self.batch_size = max(1, int(batch_size or getattr(backend, "batch_size_hint", 1)))
+        self.batch_max_wait = batch_max_wait
+        self.decode_workers = max(1, int(decode_workers))
+        self.infer_workers = max(1, int(infer_workers or self.concurrency))
+        self.encode_workers = max(1, int(encode_workers))
+        self.prefetch = max(1, int(prefetch))
+        self.claim_size = max(1, int(claim_size))
+        self.claim_lease = claim_lease
+        self._claimed: deque[Job] = deque()
+        self._batcher: MicroBatcher | None = None
+        self._atlas: MicroBatcher | None = None
+        # Atlas keys of jobs put back on the deque, so they are not re-read.
+        self._atlas_key_memo: dict[int, Hashable | None] = {}
+        # Set by run_streaming while a producer thread is still adding jobs.
+        self._feeding = False
+        self._more: asyncio.Event | None = None
 
     # ------------------------------------------------------------------
-    def enqueue(self, inputs: Iterable[Path], model: str = None, scale: int = None):
-        """Add new source files to the *jobs* table if not present."""
+    def enqueue(
+        self,
+        inputs: Iterable[Path],
+        model: str = None,
+        scale: float = None,
+        tile: int | None = None,
+        tile_pad: int | None = None,
+        target: Target | str | None = None,
+        *,
+        chunk_size: int = BULK_CHUNK,
+        paranoid: bool | None = None,
+        hash_workers: int | None = None,
+    ) -> EnqueueResult:
+        """Add new source files to the *jobs* table if not present.
+
+        ``scale`` may be fractional (default 2).  ``target`` is a
+        :class:`~scaleforge.pipeline.planner.Target`, a ``WxH`` string or the
+        name of a row in the ``resolutions`` table and replaces ``scale``.
+
+        ``tile``/``tile_pad`` are stored in the job metadata and override the
+        backend's tiling defaults for these jobs; they do not affect the job
+        hash because blended tiling does not change the result.  A ``tile``
+        not larger than twice the padding raises :class:`ValueError`.
+
+        Jobs are inserted with :meth:`Job.bulk_create`, committing every
+        ``chunk_size`` files.  Returns how many jobs were added and how many
+        were skipped because the same work was already queued.
+
+        Source hashes come from a :class:`FingerprintCache`, so files whose
+        size, mtime and inode are unchanged since they were last seen are not
+        read again.  ``paranoid=True`` (or ``SCALEFORGE_PARANOID_HASH=1``)
+        re-hashes every file.  Files that must be read are hashed on
+        ``hash_workers`` threads (default: one per core, at most 8).
+        """
+        return self._enqueue(
+            inputs,
+            dict(model=model, scale=scale, tile=tile, tile_pad=tile_pad, target=target),
+            chunk_size=chunk_size,
+            paranoid=paranoid,
+            hash_workers=hash_workers,
+        )
+
+    def _enqueue(
+        self,
+        inputs: Iterable[Path],
+        options: dict[str, Any],
+        *,
+        chunk_size: int = BULK_CHUNK,
+        paranoid: bool | None = None,
+        hash_workers: int | None = None,
+        first_chunk: int | None = None,
+        on_commit: Callable[[int], None] | None = None,
+        stop: threading.Event | None = None,
+    ) -> EnqueueResult:
+        """:meth:`enqueue` with hooks for :meth:`run_streaming`.
+
+        ``first_chunk``/``on_commit`` are passed to :meth:`Job.bulk_create`;
+        discovery ends early once ``stop`` is set.
+        """
+        target = options.get("target")
+        if isinstance(target, str):
+            with get_conn(self.db_path) as conn:
+                target = parse_target(target, conn)
+        model = options.get("model")
+        scale = normalize_scale(options.get("scale"))
         params = {
             "backend": self.backend.name,
             "model": model,
-            "scale": scale or 2  # Default to 2x if not specified
+            "scale": scale,
+            "precision": getattr(self.backend, "precision", "fp32"),
         }
-        with get_conn(self.db_path) as conn:
+        if getattr(self.backend, "quantization", None):
+            params["quantization"] = self.backend.quantization
+        metadata = {"model": model, "scale": scale}
+        if target is not None:
+            params["target"] = metadata["target"] = target.as_dict()
+        tile, tile_pad = options.get("tile"), options.get("tile_pad")
+        if tile is not None:
+            metadata["tile"] = tile
+        if tile_pad is not None:
+            metadata["tile_pad"] = tile_pad
+        if tile is not None and tile > 0:
+            pad = tile_pad if tile_pad is not None else getattr(self.backend, "tile_pad", DEFAULT_TILE_PAD)
+            if tile <= 2 * pad:
+                raise ValueError(f"tile ({tile}) must be larger than twice tile_pad ({pad})")
+        if hash_workers is None:
+            hash_workers = min(8, os.cpu_count() or 1)
+
+        def discover() -> Iterator[Path]:
             for p in inputs:
                 p = Path(p)
-                if p.is_dir():
-                    files = list(p.rglob("*.png"))
-                else:
-                    files = [p]
-                for img in files:
-                    Job.create_or_skip(
-                        conn,
-                        {
-                            "src_path": str(img),
-                            "hash": hash_params(img, params),
-                            "metadata": {
-                                "model": model,
-                                "scale": scale
-                            }
-                        },
-                    )
+                for img in p.rglob("*.png") if p.is_dir() else [p]:
+                    if stop is not None and stop.is_set():
+                        return
+                    yield img
+
+        def rows(fingerprints: FingerprintCache) -> Iterator[dict]:
+            for img, file_hash in fingerprints.sha256_many(discover(), hash_workers):
+                digest = hash_params(img, params, file_hash=file_hash)
+                yield {"src_path": str(img), "hash": digest, "metadata": metadata}
+
+        with get_conn(self.db_path) as conn:
+            fingerprints = FingerprintCache(conn, paranoid=paranoid)
+            try:
+                inserted, skipped = Job.bulk_create(
+                    conn, rows(fingerprints), chunk_size, first_chunk=first_chunk, on_commit=on_commit
+                )
+            finally:
+                fingerprints.flush()
+        logger.debug(
+            "Enqueued %d job(s), skipped %d already queued; %d source(s) hashed, %d fingerprint hit(s)",
+            inserted,
+            skipped,
+            fingerprints.misses,
+            fingerprints.hits,
+        )
+        return EnqueueResult(inserted, skipped)
+
+    async def run_streaming(self, inputs: Iterable[Path], *, resume: bool = False, **options) -> EnqueueResult:
+        """Enqueue ``inputs`` in a background thread while workers process them.
+
+        ``options`` are those of :meth:`enqueue`.  Jobs are committed in small
+        batches at first, so the first images start processing as soon as
+        they are hashed rather than after the whole input tree has been
+        discovered.  Workers that run dry wait for the producer instead of
+        exiting.  Returns the enqueue counts once both sides have finished.
+        """
+        loop = asyncio.get_running_loop()
+        stop = threading.Event()
+        self._more = asyncio.Event()
+        self._feeding = True
+
+        def wake(_added: int = 0) -> None:
+            loop.call_soon_threadsafe(self._more.set)
+
+        def finished(_fut: asyncio.Future) -> None:
+            self._feeding = False
+            if self._more is not None:
+                self._more.set()
+
+        enqueue_kwargs = {k: options.pop(k) for k in ("chunk_size", "paranoid", "hash_workers") if k in options}
+        producer = asyncio.ensure_future(
+            asyncio.to_thread(
+                self._enqueue,
+                inputs,
+                options,
+                **enqueue_kwargs,
+                first_chunk=self.claim_size,
+                on_commit=wake,
+                stop=stop,
+            )
+        )
+        producer.add_done_callback(finished)
+        try:
+            await self.run(resume=resume)
+        finally:
+            stop.set()  # workers only stop early on fatal errors
+            result = await producer
+            self._more = None
+            self._feeding = False
+        return result
+
+    async def _wait_for_jobs(self) -> bool:
+        """Wait for :meth:`run_streaming`'s producer; ``False`` once no more jobs can arrive."""
+        if not self._feeding:
+            return False
+        self._more.clear()
+        await self._more.wait()
+        return True
 
     # ------------------------------------------------------------------
     async def run(self, *, resume: bool = False):  # noqa: D401
-        """Process pending jobs with *concurrency* async workers."""
-        workers = [asyncio.create_task(self._worker(wid)) for wid in range(self.concurrency)]
-        await asyncio.gather(*workers)
+        """Process pending jobs with *concurrency* async workers.
+
+        ``resume=True`` first returns every job left in progress by an
+        interrupted run to the queue; see ``claim_lease``.
+        """
+        if resume or self.claim_lease is not None:
+            with get_conn(self.db_path) as conn:
+                reclaimed = Job.reclaim(conn, None if resume else self.claim_lease)
+            if reclaimed:
+                logger.info("Reclaimed %d job(s) left in progress by an earlier run", reclaimed)
+        capacity = getattr(self.backend, "atlas_capacity", 0)
+        if capacity:
+            self._atlas = MicroBatcher(self.backend, capacity, self.batch_max_wait, atlas=True)
+        try:
+            if self.batch_size > 1 and getattr(self.backend, "supports_batch", False):
+                self._batcher = MicroBatcher(self.backend, self.batch_size, self.batch_max_wait)
+            elif getattr(self.backend, "supports_stages", False):
+                await self._run_staged()
+                return
+            workers = [asyncio.create_task(self._worker(wid)) for wid in range(self.concurrency)]
+            await asyncio.gather(*workers)
+        finally:
+            for batcher in (self._batcher, self._atlas):
+                if batcher is not None:
+                    await batcher.drain()
+            self._batcher = self._atlas = None
+            self._atlas_key_memo.clear()
+            if self._claimed:
+                with get_conn(self.db_path) as conn:
+                    Job.release(conn, [job.id for job in self._claimed])
+                self._claimed.clear()
 
     # ------------------------------------------------------------------
+    @staticmethod
+    def _dst_for(job: Job) -> Path:
+        src = Path(job.src_path)
+        meta = job.metadata or {}
+        return src.with_suffix(src.suffix + output_suffix(meta.get("scale"), meta.get("target")))
+
+    async def _atlas_keys(self, jobs: list[Job]) -> list:
+        """Atlas group of each job, or ``None`` for jobs that run on their own."""
+        if self._atlas is None or not jobs:
+            return [None] * len(jobs)
+
+        def keys() -> list:
+            out = []
+            for job in jobs:
+                if job.id in self._atlas_key_memo:
+                    out.append(self._atlas_key_memo.pop(job.id))
+                    continue
+                try:
+                    out.append(self.backend.atlas_key(Path(job.src_path), job))
+                except Exception:  # noqa: BLE001 – the regular path reports it
+                    out.append(None)
+            return out
+
+        return await asyncio.to_thread(keys)
+
+    async def _take(self, source: _JobSource, limit: int) -> tuple[list[Job], list]:
+        """Take one round of jobs and their atlas keys.
+
+        A round holds up to the atlas capacity of packable jobs but at most
+        ``limit`` others.  It looks at most twice the capacity ahead for
+        packable jobs; the surplus goes back on the deque for other workers.
+        """
+        if self._atlas is None:
+            jobs = source.take(limit)
+            return jobs, [None] * len(jobs)
+        capacity = self._atlas.max_batch
+        packable: list[tuple[Job, Hashable]] = []
+        others: list[Job] = []
+        surplus: list[tuple[Job, Hashable | None]] = []
+        window, seen = 2 * capacity + limit, 0
+        while len(packable) < capacity and seen < window:
+            jobs = source.take(min(capacity - len(packable) + limit, window - seen))
+            if not jobs:
+                break
+            seen += len(jobs)
+            for job, key in zip(jobs, await self._atlas_keys(jobs)):
+                if key is not None and len(packable) < capacity:
+                    packable.append((job, key))
+                elif key is None and len(others) < limit:
+                    others.append(job)
+                else:
+                    surplus.append((job, key))
+        if surplus:
+            self._atlas_key_memo.update((job.id, key) for job, key in surplus)
+            source.put_back([job for job, _ in surplus])
+        return [job for job, _ in packable] + others, [key for _, key in packable] + [None] * len(others)
+
+    async def _process(self, jobs: list[Job], keys: list | None = None) -> list[BaseException | None]:
+        """Run ``jobs`` through the backend and return one error per job."""
+        if keys is None:
+            keys = await self._atlas_keys(jobs)
+        if not any(keys):
+            return await self._process_single(jobs)
+        packed = asyncio.gather(
+            *(
+                self._atlas.submit(BatchItem(Path(j.src_path), self._dst_for(j), j), key=key)
+                for j, key in zip(jobs, keys)
+                if key is not None
+            ),
+            return_exceptions=True,
+        )
+        rest = iter(await self._process_single([j for j, key in zip(jobs, keys) if key is None]))
+        atlas = iter(await packed)
+        return [next(atlas) if key is not None else next(rest) for key in keys]
+
+    async def _process_single(self, jobs: list[Job]) -> list[BaseException | None]:
+        """Run ``jobs`` through the micro-batcher or one by one."""
+        if self._batcher is not None:
+            return await asyncio.gather(
+                *(self._batcher.submit(BatchItem(Path(j.src_path), self._dst_for(j), j)) for j in jobs),
+                return_exceptions=True,
+            )
+        results: list[BaseException | None] = []
+        for job in jobs:
+            kwargs = {}
+            if "job" in inspect.signature(self.backend.upscale).parameters:
+                kwargs["job"] = job
+            try:
+                await self.backend.upscale(Path(job.src_path), self._dst_for(job), **kwargs)
+            except Exception as exc:  # noqa: BLE001 – classified by the worker
+                results.append(exc)
+            else:
+                results.append(None)
+        return results
+
+    def _record(self, conn, wid: int | str, job: Job, exc: BaseException | None) -> str | None:
+        """Persist the outcome of ``job``; return ``"fatal"``/``"transient"`` on error."""
+        if exc is None:
+            job.set_status(conn, JobStatus.DONE)
+            return None
+        if isinstance(exc, BackendError):
+            logger.error("Worker %s fatal: %s", wid, exc)
+            job.set_status(conn, JobStatus.FAILED, error=str(exc))
+            return "fatal"
+        logger.warning("Worker %s transient: %s", wid, exc)
+        # mark failed so attempts increments; will be retried by pending()
+        job.set_status(conn, JobStatus.FAILED, error=str(exc))
+        return "transient"
+
+    async def _run_staged(self) -> None:
+        """Feed jobs through decode → infer → encode with bounded prefetch."""
+        pipeline = StagePipeline(
+            self.backend,
+            decode_workers=self.decode_workers,
+            infer_workers=self.infer_workers,
+            encode_workers=self.encode_workers,
+            prefetch=self.prefetch,
+        )
+        source = _JobSource(self.db_path, self.claim_size, self._claimed)
+        conn = source.conn
+        inflight: dict[asyncio.Future, Job] = {}
+        packed: set[asyncio.Future] = set()  # the subset waiting on an atlas
+        atlas_limit = 2 * self._atlas.max_batch if self._atlas is not None else 0
+        claim = max(self.prefetch, atlas_limit // 2)
+
+        def has_room() -> bool:
+            return len(inflight) - len(packed) <= self.prefetch and len(packed) < max(1, atlas_limit)
+
+        delay = 1.0
+        fatal = False
+        try:
+            while not fatal:
+                jobs = source.take(claim) if has_room() else []
+                for job, key in zip(jobs, await self._atlas_keys(jobs)):
+                    item = BatchItem(Path(job.src_path), self._dst_for(job), job)
+                    if key is not None:
+                        fut = asyncio.ensure_future(self._atlas.submit(item, key=key))
+                        packed.add(fut)
+                    else:
+                        fut = await pipeline.submit(item)
+                    inflight[fut] = job
+                if not inflight:
+                    if await self._wait_for_jobs():
+                        continue
+                    return  # nothing left to do
+                if jobs and has_room():
+                    continue  # keep the decode stage and atlas buckets fed
+                done, _ = await asyncio.wait(inflight, return_when=asyncio.FIRST_COMPLETED)
+                outcomes = set()
+                for fut in done:
+                    packed.discard(fut)
+                    outcomes.add(self._record(conn, "stages", inflight.pop(fut), fut.exception()))
+                fatal = "fatal" in outcomes
+                if "transient" in outcomes:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 8) + random.random()
+                elif outcomes:
+                    delay = 1.0
+        finally:
+            await pipeline.close()
+            try:
+                if inflight:
+                    # Let stages finish what they started, then record it.
+                    await asyncio.wait(inflight)
+                    for fut, job in inflight.items():
+                        self._record(conn, "stages", job, fut.exception())
+            finally:
+                source.close()
+
     async def _worker(self, wid: int):  # noqa: C901 – small and contained
         delay = 1.0
-        while True:
-            with get_conn(self.db_path) as conn:
-                pending = Job.pending(conn, limit=1)
-                if not pending:
+        limit = self.batch_size if self._batcher is not None else 1
+        source = _JobSource(self.db_path, self.claim_size, self._claimed)
+        try:
+            while True:
+                jobs, keys = await self._take(source, limit)
+                if not jobs:
+                    if await self._wait_for_jobs():
+                        continue
                     return  # nothing left to do
-                job = pending[0]
-                job.set_status(conn, JobStatus.UPSCALED_RAW)
 
-            try:
-                src = Path(job.src_path)
-                dst = src.with_suffix(src.suffix + ".x2.png")
-                kwargs = {}
-                if "job" in inspect.signature(self.backend.upscale).parameters:
-                    kwargs["job"] = job
-                await self.backend.upscale(src, dst, **kwargs)
-                with get_conn(self.db_path) as conn:
-                    job.set_status(conn, JobStatus.DONE)
-                delay = 1.0  # reset back-off on success
-            except BackendError as exc:
-                logger.error("Worker %s fatal: %s", wid, exc)
-                with get_conn(self.db_path) as conn:
-                    job.set_status(conn, JobStatus.FAILED, error=str(exc))
-                return  # stop worker on fatal backend error
-            except Exception as exc:  # noqa: BLE001 – treat as transient
-                logger.warning("Worker %s transient: %s", wid, exc)
-                # mark failed so attempts increments; will be retried by pending()
-                with get_conn(self.db_path) as conn:
-                    job.set_status(conn, JobStatus.FAILED, error=str(exc))
-                await asyncio.sleep(delay)
-                delay = min(delay * 2, 8) + random.random()
+                results = await self._process(jobs, keys)
+                outcomes = {self._record(source.conn, wid, job, exc) for job, exc in zip(jobs, results)}
+                if "fatal" in outcomes:
+                    return  # stop worker on fatal backend error
+                if "transient" in outcomes:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 8) + random.random()
+                else:
+                    delay = 1.0  # reset back-off on success
+        finally:
+            source.close()
+
+
+__all__ = ["DEFAULT_CLAIM_LEASE", "EnqueueResult", "JobQueue"]
@@ -0,0 +1,114 @@
+"""Decode → infer → encode stage pipeline between :class:`JobQueue` and a backend.
+
+Backends that set :attr:`Backend.supports_stages` split one upscale into
+three synchronous steps: ``decode(src, job)``, ``infer(decoded)`` and
+``encode(result, dst)``.  :class:`StagePipeline` runs each step on its own
+thread pool, and bounded queues connect the steps.  While the model works on
+image *n*, image *n + 1* is already being decoded and image *n - 1* encoded.
+A full queue blocks :meth:`StagePipeline.submit`, so memory use stays
+bounded.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from scaleforge.backend.base import Backend, BatchItem
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class StagePipeline:
+    """Run items through the backend's decode, infer and encode stages."""
+
+    def __init__(
+        self,
+        backend: Backend,
+        *,
+        decode_workers: int = 1,
+        infer_workers: int = 1,
+        encode_workers: int = 1,
+        prefetch: int = 2,
+    ):
+        self.backend = backend
+        self.sizes = {
+            "decode": max(1, int(decode_workers)),
+            "infer": max(1, int(infer_workers)),
+            "encode": max(1, int(encode_workers)),
+        }
+        self.prefetch = max(1, int(prefetch))
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self._queues: dict[str, asyncio.Queue] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    # ------------------------------------------------------------------
+    async def submit(self, item: BatchItem) -> asyncio.Future:
+        """Queue ``item`` for decoding; waits while the decode queue is full.
+
+        Returns a future that resolves once the item has been encoded, or
+        carries the error raised by whichever stage failed.
+        """
+        if not self._tasks:
+            self._start()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queues["decode"].put((item, None, fut))
+        return fut
+
+    async def close(self) -> None:
+        """Let queued items finish, then stop the stage workers and pools."""
+        if not self._tasks:
+            return
+        for stage in ("decode", "infer", "encode"):
+            for _ in range(self.sizes[stage]):
+                await self._queues[stage].put(_STOP)
+            await asyncio.gather(*[t for t in self._tasks if t.get_name().startswith(stage)])
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
+        self._tasks.clear()
+        self._executors.clear()
+
+    # ------------------------------------------------------------------
+    def _start(self) -> None:
+        backend = self.backend
+        steps: dict[str, tuple[Callable[[BatchItem, Any], Any], str | None]] = {
+            "decode": (lambda item, _: backend.decode(item.src, item.job), "infer"),
+            "infer": (lambda _item, data: backend.infer(data), "encode"),
+            "encode": (lambda item, data: backend.encode(data, item.dst), None),
+        }
+        for stage, size in self.sizes.items():
+            self._executors[stage] = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"sf-{stage}")
+            self._queues[stage] = asyncio.Queue(maxsize=self.prefetch)
+        loop = asyncio.get_running_loop()
+        for stage, (step, nxt) in steps.items():
+            for idx in range(self.sizes[stage]):
+                task = loop.create_task(self._stage_worker(stage, step, nxt), name=f"{stage}-{idx}")
+                self._tasks.append(task)
+        logger.debug("Started stage pipeline %s (prefetch %d)", self.sizes, self.prefetch)
+
+    async def _stage_worker(self, stage: str, step: Callable[[BatchItem, Any], Any], nxt: str | None) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queues[stage]
+        executor = self._executors[stage]
+        while True:
+            entry = await queue.get()
+            if entry is _STOP:
+                return
+            item, data, fut = entry
+            if fut.done():  # cancelled by the submitter
+                continue
+            try:
+                result = await loop.run_in_executor(executor, step, item, data)
+            except Exception as exc:  # noqa: BLE001 - reported to the submitter
+                fut.set_exception(exc)
+                continue
+            if nxt is None:
+                fut.set_result(None)
+            else:
+                await self._queues[nxt].put((item, result, fut))
+
+
+__all__ = ["StagePipeline"]
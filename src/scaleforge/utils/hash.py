@@ -10,10 +10,10 @@ import json
 from pathlib import Path
 from typing import Any, Mapping
 
-__all__ = ["hash_params"]
+__all__ = ["file_sha256", "hash_params"]
 
 
-def _file_sha256(path: Path) -> str:
+def file_sha256(path: Path) -> str:
     """Return the SHA-256 of *path*'s contents."""
     h = hashlib.sha256()
     with path.open("rb") as fh:
@@ -22,13 +22,17 @@ def _file_sha256(path: Path) -> str:
     return h.hexdigest()
 
 
-def hash_params(path: Path | str, params: Mapping[str, Any] | None = None) -> str:
+def hash_params(
+    path: Path | str, params: Mapping[str, Any] | None = None, *, file_hash: str | None = None
+) -> str:
     """Return a unique 64-char hash for *path* + *params*.
 
     Algorithm: SHA-256 over JSON blob {"sha256": <file>, "params": {...}}.
+    Pass *file_hash* when the file's SHA-256 is already known (see
+    :class:`~scaleforge.db.fingerprints.FingerprintCache`) to skip reading it.
     """
-    p = Path(path)
-    file_hash = _file_sha256(p)
+    if file_hash is None:
+        file_hash = file_sha256(Path(path))
     blob = {"sha256": file_hash, "params": params or {}}
     data = json.dumps(blob, sort_keys=True).encode()
     return hashlib.sha256(data).hexdigest()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import pytest
+
+from scaleforge.backend.archs import MODEL_ARCHS, arch_for_model, build_model
+from scaleforge.backend.tiling import DEFAULT_BYTES_PER_PIXEL
+
+
+def test_builtin_compact_models_use_srvgg():
+    empty = {"models": {}}
+    for name in ("realesr-general-x4v3", "realesr-animevideov3"):
+        spec = arch_for_model(name, empty)
+        assert spec.name == "srvgg"
+        assert spec.scale == 4
+    assert arch_for_model("realesrgan-x4plus", empty).name == "rrdbnet"
+
+
+def test_registry_entry_overrides_builtin():
+    registry = {
+        "models": {
+            "realesr-general-x4v3": {"info": {}, "arch": {"name": "srvgg", "params": {"num_conv": 8, "upscale": 2}}},
+        }
+    }
+    spec = arch_for_model("realesr-general-x4v3", registry)
+    assert spec.params["num_conv"] == 8
+    assert spec.scale == 2
+
+
+def test_unknown_model_defaults_to_rrdbnet():
+    assert arch_for_model("mystery", {"models": {}}) == MODEL_ARCHS["realesrgan-x4plus"]
+
+
+def test_compact_models_get_smaller_tile_footprint():
+    assert MODEL_ARCHS["realesr-general-x4v3"].bytes_per_pixel < DEFAULT_BYTES_PER_PIXEL
+    assert MODEL_ARCHS["realesrgan-x4plus"].bytes_per_pixel == DEFAULT_BYTES_PER_PIXEL
+
+
+def test_build_model_rejects_unknown_arch():
+    from scaleforge.backend.archs import ArchSpec
+
+    with pytest.raises(ValueError):
+        build_model(None, ArchSpec("transformer"))
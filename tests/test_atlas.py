@@ -0,0 +1,157 @@
+import asyncio
+import types
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from scaleforge.backend.archs import MODEL_ARCHS
+from scaleforge.backend.base import Backend
+from scaleforge.backend.network import ATLAS_MAX_SIDE, NetworkBackend, pack_shelves
+
+needs_pillow = pytest.mark.skipif(not hasattr(Image, "fromarray"), reason="requires real Pillow")
+
+
+def test_pack_shelves_frames_do_not_overlap():
+    sizes = [(32, 32), (128, 64), (100, 128), (48, 20)] * 6
+    positions, (width, height) = pack_shelves(sizes, 512, 8)
+
+    boxes = [(x, y, x + w + 16, y + h + 16) for (x, y), (w, h) in zip(positions, sizes)]
+    assert width <= 512 and all(x1 <= width and y1 <= height for _, _, x1, y1 in boxes)
+    for i, a in enumerate(boxes):
+        for b in boxes[i + 1 :]:
+            assert a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1]
+
+
+def test_gutter_covers_the_receptive_field():
+    assert MODEL_ARCHS["realesr-general-x4v3"].receptive_radius == 34
+    assert MODEL_ARCHS["realesr-animevideov3"].receptive_radius == 18
+
+    def capacity(gutter):
+        backend = types.SimpleNamespace(stub=False, atlas_max_side=ATLAS_MAX_SIDE, atlas_gutter=gutter)
+        return NetworkBackend.atlas_capacity.fget(backend)
+
+    assert capacity(18) == 36
+    assert capacity(None) == 0  # unknown architecture
+    assert capacity(MODEL_ARCHS["realesrgan-x4plus"].receptive_radius) == 0  # RRDBNet: one image per canvas
+
+
+def _shift_srvgg(np, num_conv, upscale):
+    """SRVGG weights whose every conv moves the image one pixel down-right.
+
+    Each output pixel then copies the input pixel ``num_conv + 2`` away
+    diagonally, the very edge of the receptive field.
+    """
+    state = {}
+    shift = np.zeros((3, 3, 3, 3), dtype=np.float32)
+    shift[range(3), range(3), 0, 0] = 1.0
+    for idx in range(num_conv + 1):
+        state[f"body.{2 * idx}.weight"] = shift
+        state[f"body.{2 * idx}.bias"] = np.zeros(3, dtype=np.float32)
+        state[f"body.{2 * idx + 1}.weight"] = np.ones(3, dtype=np.float32)
+    last = np.zeros((3 * upscale * upscale, 3, 3, 3), dtype=np.float32)
+    for out_ch in range(last.shape[0]):
+        last[out_ch, out_ch // (upscale * upscale), 0, 0] = 1.0
+    state[f"body.{2 * num_conv + 2}.weight"] = last
+    state[f"body.{2 * num_conv + 2}.bias"] = np.zeros(last.shape[0], dtype=np.float32)
+    return state
+
+
+@needs_pillow
+def test_small_jobs_share_one_atlas(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    from scaleforge.backend import numpy_backend as nb
+    from scaleforge.db.models import JobStatus, get_conn
+    from scaleforge.pipeline.queue import JobQueue
+
+    monkeypatch.setenv("SCALEFORGE_CACHE", str(tmp_path))
+    monkeypatch.setenv("SCALEFORGE_TILE_CACHE_MB", "0")
+    # The real depth of realesr-animevideov3: 16 body convs, 18 in all.
+    np.savez(tmp_path / "realesr-animevideov3.npz", **_shift_srvgg(np, num_conv=16, upscale=4))
+    rng = np.random.default_rng(1)
+    srcs = []
+    for i, (w, h) in enumerate([(32, 32), (48, 40), (64, 17), (100, 100), (300, 200)]):
+        src = tmp_path / f"{i}.png"
+        # Below half range so the shifted copy plus the upsampled input stays unclipped.
+        Image.fromarray(rng.integers(0, 128, (h, w, 3), dtype=np.uint8)).save(src)
+        srcs.append(src)
+
+    backend = nb.NumpySRVGGBackend("realesr-animevideov3", threads=1)
+    canvases = []
+    forward = backend._engine.run
+    monkeypatch.setattr(backend._engine, "run", lambda arr, **kw: canvases.append(arr.shape) or forward(arr, **kw))
+    queue = JobQueue(tmp_path / "sf.db", backend, batch_max_wait=0.01)
+    queue.enqueue(srcs, scale=4)
+    asyncio.run(queue.run())
+
+    with get_conn(tmp_path / "sf.db") as conn:
+        assert {row[0] for row in conn.execute("SELECT status FROM jobs")} == {JobStatus.DONE}
+    assert len(canvases) == 2  # one atlas plus the large image
+    radius = backend.atlas_gutter
+    assert radius == 18
+    for src in srcs[:4]:
+        arr = np.asarray(Image.open(src), dtype=np.float32) / 255.0
+        # Every output pixel, border included, sees only the image's own
+        # replicated edge, never a neighbour or the empty canvas.
+        framed = forward(np.pad(arr, ((radius, radius), (radius, radius), (0, 0)), mode="edge"), tile=0, tile_pad=0)
+        expected = np.asarray(backend._to_image(framed[radius * 4 : -radius * 4, radius * 4 : -radius * 4]), dtype=int)
+        packed = np.asarray(Image.open(src.with_suffix(".png.x4.png")), dtype=int)
+        assert packed.shape == expected.shape
+        assert np.abs(packed - expected).max() <= 1  # GEMM rounding only
+
+
+class _Packing(Backend):
+    """Packs files named ``small*``; records each call's sources."""
+
+    name = "packing"
+    atlas_capacity = 4
+
+    def __init__(self):
+        self.calls = []
+
+    def atlas_key(self, src, job=None):
+        return "atlas" if src.name.startswith("small") else None
+
+    async def upscale(self, src, dst, scale=2, tile=None):
+        self.calls.append([src.name])
+        dst.write_bytes(b"x")
+
+    async def upscale_atlas(self, items):
+        self.calls.append([item.src.name for item in items])
+        for item in items:
+            item.dst.write_bytes(b"x")
+        return [None] * len(items)
+
+
+def test_worker_round_takes_atlas_jobs_up_to_capacity_and_one_other(tmp_path):
+    from scaleforge.db.models import JobStatus, get_conn
+    from scaleforge.pipeline.batching import MicroBatcher
+    from scaleforge.pipeline.queue import JobQueue, _JobSource
+
+    srcs = []
+    for name in ["big0", "small0", "big1", "small1", "big2", "small2", "big3"]:
+        (tmp_path / f"{name}.png").write_bytes(name.encode())
+        srcs.append(tmp_path / f"{name}.png")
+    backend = _Packing()
+    queue = JobQueue(tmp_path / "sf.db", backend, batch_max_wait=0.01)
+    queue.enqueue(srcs)
+
+    async def first_round():
+        queue._atlas = MicroBatcher(backend, backend.atlas_capacity, 0.01, atlas=True)
+        source = _JobSource(queue.db_path, queue.claim_size, queue._claimed)
+        try:
+            return await queue._take(source, 1)
+        finally:
+            source.close()
+
+    jobs, keys = asyncio.run(first_round())
+    assert [Path(j.src_path).stem for j in jobs] == ["small0", "small1", "small2", "big0"]
+    assert keys == ["atlas"] * 3 + [None]
+    assert [Path(j.src_path).stem for j in queue._claimed] == ["big1", "big2", "big3"]  # left for other workers
+    queue._atlas = None
+
+    backend.calls.clear()
+    asyncio.run(JobQueue(tmp_path / "sf.db", backend, concurrency=2, batch_max_wait=0.01).run(resume=True))
+    with get_conn(tmp_path / "sf.db") as conn:
+        assert {row[0] for row in conn.execute("SELECT status FROM jobs")} == {JobStatus.DONE}
+    assert max(len(call) for call in backend.calls) == 3  # the small images shared one atlas
@@ -2,6 +2,10 @@ from unittest.mock import patch
 
 import pytest
 
+from scaleforge.backend.compiled_backend import TorchCompiledBackend
+from scaleforge.backend.numpy_backend import NumpySRVGGBackend
+from scaleforge.backend.onnx_backend import OnnxRuntimeBackend
+from scaleforge.backend.pillow_backend import PillowBackend
 from scaleforge.backend.selector import get_backend
 from scaleforge.backend.torch_backend import TorchBackend
 from scaleforge.backend.vulkan_backend import VulkanBackend
@@ -14,6 +18,11 @@ from scaleforge.backend.vulkan_backend import VulkanBackend
         ("torch-eager-rocm", TorchBackend),
         ("torch-eager-mps", TorchBackend),
         ("torch-eager-cpu", TorchBackend),
+        ("torch-compiled-cpu", TorchCompiledBackend),
+        ("torch-compiled-cuda", TorchCompiledBackend),
+        ("onnx-ort-cpu", OnnxRuntimeBackend),
+        ("cpu-pillow", PillowBackend),
+        ("cpu-numpy", NumpySRVGGBackend),
         ("ncnn-ncnn-vulkan", VulkanBackend),
     ],
 )
@@ -41,3 +50,98 @@ def test_env_override(monkeypatch, code, expected):
         backend = get_backend()
     assert isinstance(backend, expected)
     mock_detect.assert_not_called()
+
+
+def test_get_backend_returns_cached_instance(monkeypatch):
+    from scaleforge.backend.selector import clear_backend_cache, release
+
+    monkeypatch.setenv("SCALEFORGE_BACKEND", "torch-eager-cpu")
+    monkeypatch.setenv("SF_STUB_UPSCALE", "1")
+    clear_backend_cache()
+    first = get_backend("realesr-general-x4v3")
+    assert get_backend("realesr-general-x4v3") is first
+    assert get_backend("realesr-general-x4v3", precision="fp16") is not first
+    assert get_backend("realesr-general-x4v3", cache=False) is not first
+    assert release(first)
+    assert get_backend("realesr-general-x4v3") is not first
+    clear_backend_cache()
+
+
+def test_backend_cache_lru_eviction():
+    from scaleforge.backend.selector import BackendCache
+
+    class Sized(VulkanBackend):
+        def __init__(self, size):
+            self.size = size
+            self.closed = False
+
+        def memory_footprint(self):
+            return self.size
+
+        def close(self):
+            self.closed = True
+
+    cache = BackendCache(max_items=2)
+    a, b, c = Sized(1), Sized(1), Sized(1)
+    cache.put("a", a)
+    cache.put("b", b)
+    assert cache.get("a") is a  # "b" is now least recently used
+    cache.put("c", c)
+    assert cache.get("b") is None and cache.get("a") is a and cache.get("c") is c
+    assert b.closed and not a.closed and not c.closed
+
+    cache = BackendCache(max_items=10, max_bytes=100)
+    big = Sized(80)
+    cache.put("big", big)
+    cache.put("other", Sized(50))
+    assert cache.get("big") is None and len(cache) == 1
+    assert big.closed
+
+    assert cache.release("other") and len(cache) == 0
+
+
+def test_evicted_backend_stays_open_while_leased():
+    from scaleforge.backend.selector import BackendCache
+
+    class Leased(VulkanBackend):
+        def __init__(self):
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    cache = BackendCache(max_items=1)
+    held, other = Leased(), Leased()
+    cache.put("held", held, lease=True)
+    assert cache.get("held", lease=True) is held  # a second user
+    cache.put("other", other)
+
+    assert cache.get("held") is None and not held.closed  # evicted, still in use
+    assert cache.release(held) and not held.closed
+    assert cache.release(held) and held.closed  # the last user let go
+    assert not cache.release(held)
+
+    cache.clear()
+    assert other.closed
+
+
+def test_get_backend_survives_eviction_until_released(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    from scaleforge.backend import selector
+
+    from .test_numpy_backend import _random_srvgg
+
+    monkeypatch.setenv("SCALEFORGE_CACHE", str(tmp_path))
+    monkeypatch.setenv("SCALEFORGE_TILE_CACHE_MB", "0")
+    np.savez(tmp_path / "realesr-animevideov3.npz", **_random_srvgg(np.random.default_rng(0), upscale=4))
+    monkeypatch.setattr(selector, "_CACHE", selector.BackendCache(max_items=1))
+
+    backend = get_backend("realesr-animevideov3", "cpu-numpy")
+    get_backend("realesr-animevideov3", "cpu-numpy", precision="fp16")  # evicts the first
+    get_backend("realesr-animevideov3", "cpu-numpy", precision="bf16")
+
+    img = np.random.default_rng(1).random((8, 8, 3), dtype=np.float32)
+    assert backend._engine.run(img, tile=0, tile_pad=0).shape == (32, 32, 3)
+    assert selector.release(backend)
+    assert not hasattr(backend, "_engine")  # closed by the last release
+    selector.clear_backend_cache()
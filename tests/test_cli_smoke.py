@@ -38,3 +38,17 @@ def test_cli_run_stub(tmp_path, monkeypatch):
     r = CliRunner().invoke(cli, ["run", str(img), "-o", str(out_dir)])
     assert r.exit_code == 0
     assert (out_dir / "sample.png.x2.png").exists()
+
+
+def test_cli_queue_status(tmp_path, monkeypatch):
+    img = tmp_path / "sample.png"
+    Image.new("RGB", (4, 4), "white").save(img)
+    out_dir = tmp_path / "out"
+    monkeypatch.setattr(
+        "scaleforge.cli.main.load_config",
+        lambda: AppConfig(database_path=tmp_path / "db.sqlite", log_dir=tmp_path / "logs", model_dir=tmp_path / "models"),
+    )
+    assert CliRunner().invoke(cli, ["run", str(img), "-o", str(out_dir)]).exit_code == 0
+    r = CliRunner().invoke(cli, ["queue", "status", str(out_dir)])
+    assert r.exit_code == 0
+    assert r.output.split() == ["done", "1", "total", "1"]
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from scaleforge.backend.cpu_pool import SharedMemoryPool  # noqa: E402
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in mp.get_all_start_methods(), reason="requires fork start method"
+)
+
+
+def _double(arr, factor):
+    if factor < 0:
+        raise ValueError("negative factor")
+    return arr.repeat(2, axis=0).repeat(2, axis=1) * factor
+
+
+def _out_shape(shape, factor):
+    return (shape[0] * 2, shape[1] * 2) + tuple(shape[2:])
+
+
+def test_pool_round_trip():
+    pool = SharedMemoryPool(_double, 2, out_shape=_out_shape)
+    try:
+        arrays = [np.full((4, 5, 3), i, dtype=np.float32) for i in range(6)]
+        with ThreadPoolExecutor(4) as ex:
+            results = list(ex.map(lambda a: pool.run(a, 3.0), arrays))
+        for i, res in enumerate(results):
+            assert res.shape == (8, 10, 3)
+            assert np.all(res == i * 3.0)
+    finally:
+        pool.close()
+
+
+def test_pool_reports_worker_errors():
+    pool = SharedMemoryPool(_double, 1, out_shape=_out_shape)
+    try:
+        with pytest.raises(RuntimeError, match="negative factor"):
+            pool.run(np.zeros((2, 2, 3), dtype=np.float32), -1.0)
+        # the worker survives and keeps serving requests
+        assert pool.run(np.ones((2, 2, 3), dtype=np.float32), 1.0).sum() == 48
+    finally:
+        pool.close()
@@ -0,0 +1,81 @@
+import os
+
+from scaleforge.backend.torch_backend import TorchBackend
+from scaleforge.db import fingerprints as fp
+from scaleforge.db.fingerprints import FingerprintCache
+from scaleforge.db.models import get_conn
+from scaleforge.pipeline.queue import JobQueue
+from scaleforge.utils.hash import file_sha256
+
+
+def _count_reads(monkeypatch):
+    reads = []
+
+    def counting(path):
+        reads.append(path.name)
+        return file_sha256(path)
+
+    monkeypatch.setattr(fp, "file_sha256", counting)
+    return reads
+
+
+def test_unchanged_stat_reuses_hash(tmp_path, monkeypatch):
+    reads = _count_reads(monkeypatch)
+    src = tmp_path / "a.png"
+    src.write_bytes(b"123")
+    with get_conn(tmp_path / "sf.db") as conn:
+        first = FingerprintCache(conn, paranoid=False)
+        digest = first.sha256(src)
+        first.flush()
+        second = FingerprintCache(conn, paranoid=False)
+        assert second.sha256(src) == digest
+        assert (second.hits, reads) == (1, ["a.png"])
+
+        src.write_bytes(b"4567")
+        assert second.sha256(src) == file_sha256(src) != digest
+        assert reads == ["a.png", "a.png"]
+
+
+def test_paranoid_rehashes_and_detects_silent_change(tmp_path, monkeypatch, caplog):
+    reads = _count_reads(monkeypatch)
+    src = tmp_path / "a.png"
+    src.write_bytes(b"123")
+    with get_conn(tmp_path / "sf.db") as conn:
+        cache = FingerprintCache(conn, paranoid=False)
+        cache.sha256(src)
+        cache.flush()
+        st = os.stat(src)
+        src.write_bytes(b"456")  # same size; restore the old mtime
+        os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        assert FingerprintCache(conn, paranoid=False).sha256(src) != file_sha256(src)
+        monkeypatch.setenv("SCALEFORGE_PARANOID_HASH", "1")
+        assert FingerprintCache(conn).sha256(src) == file_sha256(src)
+    assert len(reads) == 2
+    assert "changed without a size or mtime change" in caplog.text
+
+
+def test_enqueue_skips_reading_known_sources(tmp_path, monkeypatch):
+    reads = _count_reads(monkeypatch)
+    srcs = []
+    for name in ("a.png", "b.png"):
+        srcs.append(tmp_path / name)
+        srcs[-1].write_bytes(name.encode())
+    queue = JobQueue(tmp_path / "q.db", TorchBackend(stub=True))
+    assert queue.enqueue(srcs).inserted == 2
+    assert queue.enqueue(srcs).skipped == 2
+    assert sorted(reads) == ["a.png", "b.png"]
+
+
+def test_parallel_hashing_keeps_order(tmp_path):
+    srcs = []
+    for i in range(20):
+        srcs.append(tmp_path / f"{i}.png")
+        srcs[-1].write_bytes(bytes([i]) * (1000 * (20 - i)))
+    with get_conn(tmp_path / "sf.db") as conn:
+        cache = FingerprintCache(conn, paranoid=False)
+        cache.sha256(srcs[3])
+        cache.flush()
+        out = list(cache.sha256_many(srcs, workers=4))
+    assert out == [(p, file_sha256(p)) for p in srcs]
+    assert (cache.hits, cache.misses) == (1, 20)
@@ -73,9 +73,23 @@ def test_fallback_mps():
     assert caps["mps"] and not caps["cuda"] and not caps["rocm"]
 
 
-def test_cpu_only():
+@pytest.fixture
+def no_vulkan_or_onnx(monkeypatch):
+    monkeypatch.setattr("scaleforge.backend.vulkan_backend.VulkanBackend.is_available", lambda self: False)
+    monkeypatch.setattr("scaleforge.backend.onnx_backend.onnx_available", lambda: False)
+
+
+def test_cpu_with_torch(no_vulkan_or_onnx):
+    caps = _caps_with_torch(_mock_torch())
+    assert caps["backend"] == "torch-eager-cpu"
+    assert caps["vendor"] == "cpu"
+
+
+@pytest.mark.parametrize("has_numpy, backend", [(True, "cpu-numpy"), (False, "cpu-pillow")])
+def test_cpu_only(no_vulkan_or_onnx, monkeypatch, has_numpy, backend):
+    monkeypatch.setattr("scaleforge.backend.numpy_backend.numpy_available", lambda: has_numpy)
     with patch.dict(sys.modules, {"scaleforge.backend.selector": None, "torch": None}):
         caps = detect_gpu_caps()
-    assert caps["backend"] == "torch-eager-cpu"
+    assert caps["backend"] == backend
     assert caps["vendor"] == "cpu"
     assert not any((caps["cuda"], caps["rocm"], caps["mps"]))
@@ -65,3 +65,111 @@ def test_attempts_increment(tmp_path):
     assert j.attempts == 0
     j.set_status(conn, JobStatus.FAILED, "boom")
     assert j.attempts == 1
+
+
+def test_set_status_persists_metadata(tmp_path):
+    conn = _make_conn(tmp_path)
+    job = Job.create_or_skip(conn, {"src_path": "a.png", "hash": "h", "metadata": {"scale": 2}})
+    job.metadata["tile_skip"] = {"tiles": 4, "skipped": 1}
+    job.set_status(conn, JobStatus.DONE)
+    conn.row_factory = sqlite3.Row
+    stored = Job.from_row(conn.execute("SELECT * FROM jobs").fetchone())
+    assert stored.metadata == {"scale": 2, "tile_skip": {"tiles": 4, "skipped": 1}}
+
+
+def test_claim_is_exclusive_across_connections(tmp_path):
+    import threading
+
+    from scaleforge.db.models import connect
+
+    conn = _make_conn(tmp_path)
+    for i in range(60):
+        Job.create_or_skip(conn, {"src_path": f"f{i}", "hash": f"h{i}"})
+    claimed: list[list[int]] = [[], [], []]
+
+    def worker(out):
+        own = connect(tmp_path / "sf.db")
+        while jobs := Job.claim(own, 4):
+            assert all(j.status == JobStatus.UPSCALED_RAW for j in jobs)
+            out.extend(j.id for j in jobs)
+        own.close()
+
+    threads = [threading.Thread(target=worker, args=(out,)) for out in claimed]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    ids = [i for out in claimed for i in out]
+    assert sorted(ids) == list(range(1, 61))
+    assert Job.pending(conn) == []
+
+
+def test_release_returns_claimed_jobs(tmp_path):
+    conn = _make_conn(tmp_path)
+    for i in range(3):
+        Job.create_or_skip(conn, {"src_path": f"f{i}", "hash": f"h{i}"})
+    jobs = Job.claim(conn, 2)
+    assert [j.id for j in jobs] == [1, 2]
+    Job.release(conn, [jobs[1].id])
+    assert [j.id for j in Job.pending(conn)] == [2, 3]
+
+
+def test_bulk_create_counts_inserted_and_skipped(tmp_path):
+    conn = _make_conn(tmp_path)
+    Job.create_or_skip(conn, {"src_path": "f0", "hash": "h0"})
+    rows = [{"src_path": f"f{i}", "hash": f"h{i}", "metadata": {"scale": 2}} for i in range(7)]
+    rows.append({"src_path": "f6-copy", "hash": "h6"})
+    assert Job.bulk_create(conn, iter(rows), chunk_size=3) == (6, 2)
+    assert Job.bulk_create(conn, rows) == (0, 8)
+    jobs = Job.pending(conn)
+    assert [j.src_path for j in jobs] == [f"f{i}" for i in range(7)]
+    assert jobs[1].metadata == {"scale": 2}
+
+
+def test_migration_from_v2_backfills_counts_and_index(tmp_path):
+    from scaleforge.db.models import MIGRATIONS
+
+    db = tmp_path / "sf.db"
+    conn = sqlite3.connect(db)
+    conn.executescript(MIGRATIONS[2])
+    conn.execute("CREATE TABLE schema_info (version INTEGER PRIMARY KEY, updated_at TEXT NOT NULL)")
+    conn.execute("INSERT INTO schema_info VALUES (2, 'old')")
+    conn.executemany(
+        "INSERT INTO jobs (src_path, hash, status, created_at, updated_at) VALUES ('f', ?, ?, 'x', 'x')",
+        [("h1", "pending"), ("h2", "pending"), ("h3", "done")],
+    )
+    conn.commit()
+
+    with get_conn(conn):
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM jobs WHERE "
+                            "(status='pending' OR (status='failed' AND attempts<3)) ORDER BY id").fetchall()
+        assert "jobs_claimable" in str(plan)
+        assert Job.counts(conn) == {"done": 1, "pending": 2}
+
+
+def test_counts_follow_status_changes(tmp_path):
+    conn = _make_conn(tmp_path)
+    Job.bulk_create(conn, [{"src_path": f"f{i}", "hash": f"h{i}"} for i in range(4)])
+    jobs = Job.claim(conn, 3)
+    jobs[0].set_status(conn, JobStatus.DONE)
+    jobs[1].set_status(conn, JobStatus.FAILED, "boom")
+    assert Job.counts(conn) == {"done": 1, "failed": 1, "pending": 1, "upscaled_raw": 1}
+    conn.execute("DELETE FROM jobs WHERE status='done'")
+    assert Job.counts(conn) == {"failed": 1, "pending": 1, "upscaled_raw": 1}
+
+
+def test_reclaim_returns_stale_claims(tmp_path):
+    conn = _make_conn(tmp_path)
+    for i in range(3):
+        Job.create_or_skip(conn, {"src_path": f"f{i}", "hash": f"h{i}"})
+    stale, fresh = Job.claim(conn, 2)
+    conn.execute("UPDATE jobs SET updated_at='2000-01-01T00:00:00+00:00' WHERE id=?", (stale.id,))
+    conn.commit()
+    plan = str(conn.execute("EXPLAIN QUERY PLAN SELECT id FROM jobs WHERE status='upscaled_raw' AND updated_at<'x'").fetchall())
+    assert "jobs_claimed" in plan
+
+    assert Job.reclaim(conn, older_than=3600) == 1
+    assert [j.id for j in Job.pending(conn)] == [stale.id, 3]
+    assert Job.reclaim(conn) == 1  # resume: every claim
+    assert [j.id for j in Job.pending(conn)] == [1, 2, 3]
@@ -1,8 +1,11 @@
 import asyncio
 from pathlib import Path
 
+import pytest
+
 from scaleforge.pipeline.queue import JobQueue
 from scaleforge.backend.base import Backend
+from scaleforge.db.models import Job, JobStatus, get_conn
 
 
 class RecordingBackend(Backend):
@@ -27,3 +30,29 @@ def test_metadata_propagation(tmp_path):
 
     assert backend.received_job is not None
     assert backend.received_job.metadata == {"model": "realesrgan", "scale": 4}
+
+
+def test_enqueue_rejects_tile_smaller_than_padding(tmp_path):
+    src = tmp_path / "in.png"
+    src.write_bytes(b"123")
+    queue = JobQueue(tmp_path / "sf.db", RecordingBackend())
+    with pytest.raises(ValueError):
+        queue.enqueue([src], tile=16, tile_pad=8)
+    assert queue.enqueue([src], tile=32, tile_pad=8).inserted == 1
+
+
+def test_resume_reclaims_jobs_left_in_progress(tmp_path):
+    src = tmp_path / "in.png"
+    src.write_bytes(b"123")
+    db = tmp_path / "sf.db"
+    queue = JobQueue(db, RecordingBackend())
+    queue.enqueue([src])
+    with get_conn(db) as conn:
+        Job.claim(conn, 1)  # a worker claimed it, then the process died
+
+    asyncio.run(queue.run())
+    with get_conn(db) as conn:
+        assert Job.counts(conn) == {JobStatus.UPSCALED_RAW: 1}  # lease not expired yet
+    asyncio.run(queue.run(resume=True))
+    with get_conn(db) as conn:
+        assert Job.counts(conn) == {JobStatus.DONE: 1}
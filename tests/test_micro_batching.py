@@ -0,0 +1,90 @@
+import asyncio
+from pathlib import Path
+
+from scaleforge.backend.base import Backend
+from scaleforge.db.models import JobStatus, get_conn
+from scaleforge.pipeline.queue import JobQueue
+
+
+class BatchingBackend(Backend):
+    name = "batching"
+    supports_batch = True
+
+    def __init__(self, fail: set[str] | None = None):
+        self.batches: list[list[str]] = []
+        self.fail = fail or set()
+
+    def batch_key(self, src: Path, job=None):
+        # Files named "<bucket>_<n>.png" share a bucket
+        return src.name.split("_")[0]
+
+    async def upscale(self, src: Path, dst: Path, scale: int = 2, tile: int | None = None):
+        raise AssertionError("batched backend should not be called per image")
+
+    async def upscale_batch(self, items):
+        self.batches.append(sorted(i.src.name for i in items))
+        results = []
+        for item in items:
+            if item.src.name in self.fail:
+                results.append(RuntimeError("boom"))
+            else:
+                item.dst.write_bytes(item.src.read_bytes())
+                results.append(None)
+        return results
+
+
+def _make_inputs(tmp_path, names):
+    paths = []
+    for name in names:
+        p = tmp_path / name
+        p.write_bytes(name.encode())
+        paths.append(p)
+    return paths
+
+
+def _statuses(db):
+    with get_conn(db) as conn:
+        return dict(conn.execute("SELECT src_path, status FROM jobs").fetchall())
+
+
+def test_same_bucket_jobs_run_together(tmp_path):
+    files = _make_inputs(tmp_path, [f"a_{i}.png" for i in range(4)] + ["b_0.png", "b_1.png"])
+    db = tmp_path / "sf.db"
+    backend = BatchingBackend()
+    queue = JobQueue(db, backend, batch_size=8, batch_max_wait=0.01)
+    queue.enqueue(files)
+    asyncio.run(queue.run())
+
+    assert sorted(backend.batches) == [
+        ["a_0.png", "a_1.png", "a_2.png", "a_3.png"],
+        ["b_0.png", "b_1.png"],
+    ]
+    assert set(_statuses(db).values()) == {JobStatus.DONE}
+
+
+def test_batches_capped_at_batch_size(tmp_path):
+    files = _make_inputs(tmp_path, [f"a_{i}.png" for i in range(5)])
+    backend = BatchingBackend()
+    queue = JobQueue(tmp_path / "sf.db", backend, concurrency=2, batch_size=2, batch_max_wait=0.01)
+    queue.enqueue(files)
+    asyncio.run(queue.run())
+
+    assert max(len(b) for b in backend.batches) <= 2
+    assert sum(len(b) for b in backend.batches) == 5
+
+
+def test_batch_item_failure_is_per_job(tmp_path, monkeypatch):
+    files = _make_inputs(tmp_path, ["a_0.png", "a_1.png"])
+    db = tmp_path / "sf.db"
+    backend = BatchingBackend(fail={"a_1.png"})
+    monkeypatch.setattr("scaleforge.pipeline.queue.asyncio.sleep", _no_sleep)
+    queue = JobQueue(db, backend, batch_size=4, batch_max_wait=0.01)
+    queue.enqueue(files)
+    asyncio.run(queue.run())
+
+    statuses = {Path(k).name: v for k, v in _statuses(db).items()}
+    assert statuses == {"a_0.png": JobStatus.DONE, "a_1.png": JobStatus.FAILED}
+
+
+async def _no_sleep(_delay):
+    return None
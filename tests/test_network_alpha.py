@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from PIL import Image
+
+from scaleforge.backend.network import merge_alpha, split_alpha
+
+pytestmark = pytest.mark.skipif(not hasattr(Image, "fromarray"), reason="requires real Pillow")
+
+
+def test_split_alpha_drops_opaque_band():
+    rgb, alpha = split_alpha(Image.new("RGBA", (8, 8), (10, 20, 30, 255)))
+    assert rgb.mode == "RGB" and alpha is None
+    rgb, alpha = split_alpha(Image.new("RGBA", (8, 8), (10, 20, 30, 128)))
+    assert alpha is not None and alpha.getextrema() == (128, 128)
+
+
+def test_merge_alpha_keeps_binary_masks_binary():
+    np = pytest.importorskip("numpy")
+    mask = np.zeros((16, 16), dtype=np.uint8)
+    mask[4:12, 4:12] = 255
+    out = merge_alpha(Image.new("RGB", (64, 64), "red"), Image.fromarray(mask))
+    assert out.mode == "RGBA" and out.size == (64, 64)
+    assert set(np.unique(np.asarray(out)[..., 3])) == {0, 255}
+
+    soft = Image.fromarray(np.linspace(0, 255, 256, dtype=np.uint8).reshape(16, 16))
+    assert len(np.unique(np.asarray(merge_alpha(Image.new("RGB", (64, 64)), soft))[..., 3])) > 2
+
+
+def test_rgba_job_keeps_alpha(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    from scaleforge.backend import numpy_backend as nb
+    from scaleforge.pipeline.queue import JobQueue
+
+    from .test_numpy_backend import _random_srvgg
+
+    monkeypatch.setenv("SCALEFORGE_CACHE", str(tmp_path))
+    monkeypatch.setenv("SCALEFORGE_ATLAS_MAX_SIDE", "0")
+    np.savez(tmp_path / "realesr-animevideov3.npz", **_random_srvgg(np.random.default_rng(0), upscale=4))
+    rng = np.random.default_rng(1)
+    pixels = rng.integers(0, 256, (20, 30, 3), dtype=np.uint8)
+    alpha = rng.integers(1, 256, (20, 30), dtype=np.uint8)
+    Image.fromarray(np.dstack((pixels, alpha)), "RGBA").save(tmp_path / "a.png")
+    Image.fromarray(pixels).save(tmp_path / "b.png")
+
+    queue = JobQueue(tmp_path / "sf.db", nb.NumpySRVGGBackend("realesr-animevideov3", threads=1))
+    queue.enqueue([tmp_path / "a.png", tmp_path / "b.png"], scale=4)
+    asyncio.run(queue.run())
+
+    with_alpha = Image.open(tmp_path / "a.png.x4.png")
+    plain = Image.open(tmp_path / "b.png.x4.png")
+    assert with_alpha.mode == "RGBA" and with_alpha.size == (120, 80)
+    assert np.array_equal(np.asarray(with_alpha)[..., :3], np.asarray(plain))
+    expected = Image.fromarray(alpha).resize((120, 80), Image.BICUBIC)
+    assert np.array_equal(np.asarray(with_alpha)[..., 3], np.asarray(expected))
@@ -0,0 +1,217 @@
+import io
+import os
+import pickle
+import sys
+import types
+import zipfile
+from collections import OrderedDict
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from scaleforge.backend import numpy_backend as nb  # noqa: E402
+
+
+def _reference_conv(x, weight, bias):
+    """Direct NCHW-style convolution used as ground truth."""
+    n, h, w, _ = x.shape
+    xp = np.pad(x, ((0, 0), (1, 1), (1, 1), (0, 0)))
+    out = np.zeros((n, h, w, weight.shape[0]), dtype=np.float64)
+    for ky in range(3):
+        for kx in range(3):
+            out += xp[:, ky : ky + h, kx : kx + w, :] @ weight[:, :, ky, kx].T
+    return out + bias
+
+
+def _random_srvgg(rng, num_feat=4, num_conv=1, upscale=2):
+    state = OrderedDict()
+    chans = [3] + [num_feat] * (num_conv + 1) + [3 * upscale * upscale]
+    idx = 0
+    for i, (cin, cout) in enumerate(zip(chans, chans[1:])):
+        state[f"body.{idx}.weight"] = rng.normal(0, 0.2, (cout, cin, 3, 3)).astype(np.float32)
+        state[f"body.{idx}.bias"] = rng.normal(0, 0.1, cout).astype(np.float32)
+        idx += 1
+        if i < len(chans) - 2:
+            state[f"body.{idx}.weight"] = np.full(cout, 0.25, dtype=np.float32)
+            idx += 1
+    return state
+
+
+def test_conv3x3_matches_direct_convolution(monkeypatch):
+    rng = np.random.default_rng(0)
+    x = rng.random((2, 9, 7, 5), dtype=np.float32)
+    weight = rng.normal(size=(6, 5, 3, 3)).astype(np.float32)
+    bias = rng.normal(size=6).astype(np.float32)
+    monkeypatch.setattr(nb, "IM2COL_BYTES", 4 * 7 * 5 * 9 * 4)  # force row bands
+
+    out = nb.conv3x3(x, nb.gemm_weight(weight), bias)
+
+    np.testing.assert_allclose(out, _reference_conv(x, weight, bias), rtol=1e-5, atol=1e-5)
+
+
+def test_pixel_shuffle_matches_torch_layout():
+    r, c, h, w = 2, 3, 2, 3
+    nchw = np.arange(c * r * r * h * w, dtype=np.float32).reshape(1, c * r * r, h, w)
+    out = nb.pixel_shuffle(nchw.transpose(0, 2, 3, 1), r)
+    for ch in range(c):
+        for i in range(r):
+            for j in range(r):
+                np.testing.assert_array_equal(out[0, i::r, j::r, ch], nchw[0, ch * r * r + i * r + j])
+
+
+def _fake_torch_save(state, path, monkeypatch):
+    """Write ``state`` in torch's zip checkpoint layout using stand-in classes."""
+    torch = types.ModuleType("torch")
+    utils = types.ModuleType("torch._utils")
+
+    class FloatStorage:
+        pass
+
+    def _rebuild_tensor_v2(*args):
+        raise AssertionError("only used for pickling")
+
+    FloatStorage.__module__, FloatStorage.__qualname__ = "torch", "FloatStorage"
+    _rebuild_tensor_v2.__module__, _rebuild_tensor_v2.__qualname__ = "torch._utils", "_rebuild_tensor_v2"
+    torch.FloatStorage = FloatStorage
+    utils._rebuild_tensor_v2 = _rebuild_tensor_v2
+    monkeypatch.setitem(sys.modules, "torch", torch)
+    monkeypatch.setitem(sys.modules, "torch._utils", utils)
+
+    storages = {}
+
+    class Tensor:
+        def __init__(self, arr):
+            self.arr = np.ascontiguousarray(arr, dtype=np.float32)
+
+        def __reduce__(self):
+            key = str(len(storages))
+            storages[key] = self
+            strides = tuple(s // 4 for s in self.arr.strides)
+            return _rebuild_tensor_v2, (self, 0, self.arr.shape, strides, False, OrderedDict())
+
+    class Pickler(pickle.Pickler):
+        def persistent_id(self, obj):
+            if isinstance(obj, Tensor) and obj in storages.values():
+                key = next(k for k, v in storages.items() if v is obj)
+                return ("storage", FloatStorage, key, "cpu", obj.arr.size)
+            return None
+
+    buf = io.BytesIO()
+    Pickler(buf, protocol=2).dump({"params_ema": OrderedDict((k, Tensor(v)) for k, v in state.items())})
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("model/data.pkl", buf.getvalue())
+        for key, tensor in storages.items():
+            archive.writestr(f"model/data/{key}", tensor.arr.astype("<f4").tobytes())
+    monkeypatch.delitem(sys.modules, "torch")
+    monkeypatch.delitem(sys.modules, "torch._utils")
+
+
+def test_load_pth_without_torch(tmp_path, monkeypatch):
+    state = _random_srvgg(np.random.default_rng(1))
+    path = tmp_path / "model.pth"
+    _fake_torch_save(state, path, monkeypatch)
+
+    loaded = nb.load_weights(path)
+
+    assert list(loaded) == list(state)
+    for key, value in state.items():
+        np.testing.assert_array_equal(loaded[key], value)
+
+
+def test_load_pth_rejects_unknown_globals(tmp_path):
+    path = tmp_path / "evil.pth"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("m/data.pkl", pickle.dumps(os.system, protocol=2))
+    with pytest.raises(pickle.UnpicklingError):
+        nb.load_pth(path)
+
+
+def test_backend_threaded_tiles_match_sequential(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCALEFORGE_CACHE", str(tmp_path))
+    state = _random_srvgg(np.random.default_rng(2), upscale=4)
+    np.savez(tmp_path / "realesr-animevideov3.npz", **state)
+
+    backend = nb.NumpySRVGGBackend("realesr-animevideov3", threads=3)
+    img = np.random.default_rng(3).random((40, 50, 3), dtype=np.float32)
+    threaded = backend._engine.run(img, tile=24, tile_pad=4)
+    executor, backend._engine.executor = backend._engine.executor, None
+    sequential = backend._engine.run(img, tile=24, tile_pad=4)
+    backend._engine.executor = executor
+    backend.close()
+
+    assert threaded.shape == (160, 200, 3)
+    np.testing.assert_array_equal(threaded, sequential)
+
+
+def test_rejects_non_srvgg_models():
+    with pytest.raises(ValueError):
+        nb.NumpySRVGGBackend("realesrgan-x4plus", stub=True)
+
+
+def test_srvgg_forward_matches_reference():
+    rng = np.random.default_rng(4)
+    state = _random_srvgg(rng, num_feat=5, num_conv=2, upscale=2)
+    x = rng.random((1, 6, 5, 3), dtype=np.float32)
+
+    out = x.astype(np.float64)
+    for idx in (0, 2, 4):
+        out = _reference_conv(out, state[f"body.{idx}.weight"], state[f"body.{idx}.bias"])
+        alpha = state[f"body.{idx + 1}.weight"]
+        out = np.where(out >= 0, out, alpha * out)
+    out = _reference_conv(out, state["body.6.weight"], state["body.6.bias"])
+    expected = nb.pixel_shuffle(out, 2) + x.repeat(2, axis=1).repeat(2, axis=2)
+
+    np.testing.assert_allclose(nb.SRVGGNumpy(state, upscale=2)(x), expected, rtol=1e-4, atol=1e-5)
+
+
+def test_tiny_explicit_tile_is_clamped_to_padding():
+    backend = nb.NumpySRVGGBackend("realesr-animevideov3", stub=True, tile_pad=10)
+    assert backend.resolve_tile(512, 512, tile=12) == 28
+    assert backend.resolve_tile(512, 512, tile=0) == 0
+
+
+def _registry_with(name, arch, path, sha256):
+    return {"models": {name: {"arch": arch, "info": {"url": path.as_uri(), "sha256": sha256}}}}
+
+
+def test_registry_x2_companion_downloads_its_weights(tmp_path, monkeypatch):
+    import hashlib
+
+    from scaleforge.models import registry
+
+    cache, remote = tmp_path / "cache", tmp_path / "remote"
+    cache.mkdir()
+    remote.mkdir()
+    monkeypatch.setenv("SCALEFORGE_CACHE", str(cache))
+    np.savez(cache / "realesr-animevideov3.npz", **_random_srvgg(np.random.default_rng(4), upscale=4))
+    pth = remote / "tiny-x2.pth"
+    _fake_torch_save(_random_srvgg(np.random.default_rng(5), upscale=2), pth, monkeypatch)
+    arch = {"name": "srvgg", "params": {"num_feat": 4, "num_conv": 1, "upscale": 2}}
+    reg = _registry_with("tiny-x2", arch, pth, hashlib.sha256(pth.read_bytes()).hexdigest())
+    monkeypatch.setattr(registry, "load_effective_registry", lambda: reg)
+
+    backend = nb.NumpySRVGGBackend("realesr-animevideov3", threads=2)
+    assert backend.native_scales() == (2, 4)
+    assert backend.plan_for((10, 8), 8).passes == (2, 4)
+    companion = backend._companion(2)
+    img = np.random.default_rng(6).random((10, 8, 3), dtype=np.float32)
+    out = companion._engine.run(img, tile=0, tile_pad=0)
+    backend.close()
+
+    assert (cache / "tiny-x2.pth").exists()
+    assert companion.threads == 2
+    assert out.shape == (20, 16, 3)
+
+
+def test_registry_weights_with_wrong_checksum_are_rejected(tmp_path, monkeypatch):
+    from scaleforge.models import registry
+
+    monkeypatch.setenv("SCALEFORGE_CACHE", str(tmp_path / "cache"))
+    pth = tmp_path / "tiny-x2.pth"
+    _fake_torch_save(_random_srvgg(np.random.default_rng(7), upscale=2), pth, monkeypatch)
+    arch = {"name": "srvgg", "params": {"num_feat": 4, "num_conv": 1, "upscale": 2}}
+    monkeypatch.setattr(registry, "load_effective_registry", lambda: _registry_with("tiny-x2", arch, pth, "0" * 64))
+
+    with pytest.raises(RuntimeError, match="checksum"):
+        nb.NumpySRVGGBackend("tiny-x2")
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+import types
+
+import pytest
+
+from scaleforge.backend import detector
+from scaleforge.backend import onnx_backend as ob
+
+
+def _fake_ort():
+    class SessionOptions:
+        intra_op_num_threads = 0
+        inter_op_num_threads = 0
+        execution_mode = None
+        graph_optimization_level = None
+
+    return types.SimpleNamespace(
+        SessionOptions=SessionOptions,
+        ExecutionMode=types.SimpleNamespace(ORT_PARALLEL="parallel"),
+        GraphOptimizationLevel=types.SimpleNamespace(
+            **{name: name for name in ob.ORT_OPT_LEVELS.values()}
+        ),
+    )
+
+
+def test_session_options_from_env(monkeypatch):
+    monkeypatch.setenv("SCALEFORGE_ORT_INTRA_THREADS", "3")
+    monkeypatch.setenv("SCALEFORGE_ORT_OPT_LEVEL", "basic")
+    opts = ob.session_options(_fake_ort(), inter_threads=2)
+    assert opts.intra_op_num_threads == 3
+    assert opts.inter_op_num_threads == 2
+    assert opts.execution_mode == "parallel"
+    assert opts.graph_optimization_level == "ORT_ENABLE_BASIC"
+
+
+def test_session_options_rejects_unknown_level():
+    with pytest.raises(ValueError):
+        ob.session_options(_fake_ort(), opt_level="turbo")
+
+
+def test_stub_backend():
+    backend = ob.OnnxRuntimeBackend(stub=True)
+    assert backend.supports_batch
+    assert not backend.is_available()
+
+
+@pytest.mark.parametrize(
+    "timings,expected",
+    [
+        ({"torch-eager-cpu": 1.0, "onnx-ort-cpu": 0.5}, "onnx-ort-cpu"),
+        ({"torch-eager-cpu": 0.5, "onnx-ort-cpu": 1.0}, "torch-eager-cpu"),
+    ],
+)
+def test_detector_prefers_faster_cpu_engine(tmp_path, monkeypatch, timings, expected):
+    monkeypatch.setenv("SCALEFORGE_CACHE", str(tmp_path))
+    (tmp_path / ob.BENCHMARK_FILE).write_text(json.dumps({ob.DEFAULT_MODEL: timings}))
+    monkeypatch.setattr(ob, "onnx_available", lambda: True)
+    monkeypatch.setattr(detector, "get_gpu_info", lambda: {"vendor": "cpu", "torch": True})
+    monkeypatch.setattr("scaleforge.backend.vulkan_backend.VulkanBackend.is_available", lambda self: False)
+    spec, _reasons = detector.detect_backend()
+    assert spec.alias == expected
+
+
+def test_detector_uses_exported_model_without_torch(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCALEFORGE_CACHE", str(tmp_path))
+    monkeypatch.setattr(ob, "onnx_available", lambda: True)
+    monkeypatch.setattr(detector, "get_gpu_info", lambda: {"vendor": "cpu", "torch": False})
+    monkeypatch.setattr("scaleforge.backend.vulkan_backend.VulkanBackend.is_available", lambda self: False)
+    monkeypatch.setattr("scaleforge.backend.numpy_backend.numpy_available", lambda: False)
+    assert detector.detect_backend()[0].alias == "cpu-pillow"
+    monkeypatch.setattr("scaleforge.backend.numpy_backend.numpy_available", lambda: True)
+    assert detector.detect_backend()[0].alias == "cpu-numpy"
+    ob.onnx_model_path().write_bytes(b"onnx")
+    assert detector.detect_backend()[0].alias == "onnx-ort-cpu"
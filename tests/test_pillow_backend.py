@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from PIL import Image
+
+from scaleforge.backend.pillow_backend import RESAMPLE_MODES, PillowBackend, resize_strips
+from scaleforge.db.models import JobStatus, get_conn
+from scaleforge.pipeline.queue import JobQueue
+
+needs_pillow = pytest.mark.skipif(not hasattr(Image.Image, "crop"), reason="requires real Pillow")
+
+
+def test_upscale_uses_job_scale(tmp_path):
+    src = tmp_path / "in.png"
+    Image.new("RGB", (30, 20), "white").save(src)
+    db = tmp_path / "sf.db"
+    queue = JobQueue(db, PillowBackend(threads=2))
+    queue.enqueue([src], scale=1.5)
+    asyncio.run(queue.run())
+
+    out = Image.open(tmp_path / "in.png.x1.5.png")
+    assert (out.width, out.height) == (45, 30)
+    with get_conn(db) as conn:
+        assert conn.execute("SELECT status FROM jobs").fetchone()[0] == JobStatus.DONE
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        PillowBackend("sinc")
+
+
+@needs_pillow
+@pytest.mark.parametrize("mode", sorted(RESAMPLE_MODES))
+@pytest.mark.parametrize("size", [(1203, 905), (150, 113)])
+def test_strips_match_full_resize(mode, size):
+    np = pytest.importorskip("numpy")
+    from concurrent.futures import ThreadPoolExecutor
+
+    pixels = np.random.default_rng(0).integers(0, 256, (301, 401, 3), dtype=np.uint8)
+    img = Image.fromarray(pixels)
+    with ThreadPoolExecutor(3) as pool:
+        strips = resize_strips(img, size, RESAMPLE_MODES[mode], strips=5, executor=pool)
+    full = img.resize(size, RESAMPLE_MODES[mode])
+
+    assert strips.size == size
+    # Only fixed-point rounding may differ at the seams.
+    assert np.abs(np.asarray(strips, dtype=int) - np.asarray(full, dtype=int)).max() <= 1
+
+
+@needs_pillow
+@pytest.mark.parametrize("mode", sorted(RESAMPLE_MODES))
+def test_strips_match_full_resize_at_fractional_scale(mode):
+    np = pytest.importorskip("numpy")
+
+    pixels = np.random.default_rng(1).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    img = Image.fromarray(pixels)
+    strips = np.asarray(resize_strips(img, (960, 720), RESAMPLE_MODES[mode], strips=7), dtype=int)
+    full = np.asarray(img.resize((960, 720), RESAMPLE_MODES[mode]), dtype=int)
+
+    # Nearest-neighbour must pick exactly the same source pixels.
+    assert np.abs(strips - full).max() <= (0 if mode == "nearest" else 1)
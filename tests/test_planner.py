@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import pytest
+
+from scaleforge.backend.torch_backend import TorchBackend
+from scaleforge.db.models import Job, get_conn
+from scaleforge.pipeline.planner import (
+    Target,
+    add_resolution,
+    output_suffix,
+    parse_target,
+    plan_scale,
+)
+from scaleforge.pipeline.queue import EnqueueResult, JobQueue
+
+
+@pytest.mark.parametrize(
+    "scale,natives,passes,resample",
+    [
+        (2, (2, 4), (2,), False),
+        (1.5, (2, 4), (2,), True),
+        (1.5, (4,), (4,), True),
+        (3, (2, 4), (4,), True),
+        (8, (2, 4), (2, 4), False),  # cheaper x2 pass runs first
+        (8, (4,), (4, 4), True),
+        (16, (2, 4), (4, 4), False),
+        (0.5, (4,), (), True),
+    ],
+)
+def test_plan_scale_picks_cheapest_chain(scale, natives, passes, resample):
+    plan = plan_scale((100, 50), scale=scale, native_scales=natives)
+    assert plan.passes == passes
+    assert plan.resample is resample
+    assert plan.size == (round(100 * scale), round(50 * scale))
+
+
+def test_plan_target_fit_and_skip():
+    plan = plan_scale((100, 50), target=Target(1920, 1080), native_scales=(2, 4))
+    assert plan.size == (1920, 960)
+    assert plan.passes == (2, 4, 4)
+    # Source already larger than the box: resample only, no inference.
+    plan = plan_scale((4000, 3000), target=Target(1920, 1080))
+    assert plan.passes == ()
+    assert plan.size == (1440, 1080)
+    assert plan_scale((1920, 1080), target=Target(1920, 1080)).resample is False
+
+
+def test_output_suffix():
+    assert output_suffix(2) == ".x2.png"
+    assert output_suffix(2.0) == ".x2.png"
+    assert output_suffix(1.5) == ".x1.5.png"
+    assert output_suffix(target=Target(640, 480, "fill")) == ".640x480-fill.png"
+
+
+def test_named_resolutions(tmp_path):
+    with get_conn(tmp_path / "r.db") as conn:
+        assert parse_target("fhd", conn) == Target(1920, 1080)
+        add_resolution(conn, "fhd", 1600, 900, "fill")
+        assert parse_target("fhd", conn) == Target(1600, 900, "fill")
+        assert parse_target("800x600") == Target(800, 600)
+        with pytest.raises(ValueError):
+            parse_target("nope", conn)
+
+
+def test_enqueue_target_sets_output_name_and_hash(tmp_path):
+    src = tmp_path / "a.png"
+    src.write_bytes(b"123")
+    db = tmp_path / "q.db"
+    queue = JobQueue(db, TorchBackend(stub=True))
+    assert queue.enqueue([src], scale=2.0).inserted == 1
+    assert queue.enqueue([src, src], target="hd") == EnqueueResult(inserted=1, skipped=1)
+    with get_conn(db) as conn:
+        jobs = Job.pending(conn)
+    assert len(jobs) == 2
+    names = sorted(JobQueue._dst_for(j).name for j in jobs)
+    assert names == ["a.png.1280x720.png", "a.png.x2.png"]
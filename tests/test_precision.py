@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import types
+
+import pytest
+
+from scaleforge.backend import torch_backend as tb
+from scaleforge.backend.quantize import quantized_weights_path
+from scaleforge.backend.selector import get_backend
+from scaleforge.backend.spec import BackendSpec, normalize_precision
+from scaleforge.db.models import get_conn
+from scaleforge.pipeline.queue import JobQueue
+
+
+def _fake_torch(bf16: bool = True):
+    return types.SimpleNamespace(cuda=types.SimpleNamespace(is_bf16_supported=lambda: bf16))
+
+
+def test_normalize_precision():
+    assert normalize_precision(None) == "fp32"
+    assert normalize_precision("half") == "fp16"
+    assert normalize_precision("BF16") == "bf16"
+    assert normalize_precision("qint8") == "int8"
+    with pytest.raises(ValueError):
+        normalize_precision("int4")
+
+
+def test_spec_precision_not_in_alias():
+    spec = BackendSpec("torch", "eager", "cuda", "fp16")
+    assert spec.alias == "torch-eager-cuda"
+    assert spec.precision == "fp16"
+
+
+@pytest.mark.parametrize(
+    "device,requested,bf16_cpu,expected",
+    [
+        ("cuda", "fp16", False, "fp16"),
+        ("cuda", "bf16", False, "bf16"),
+        ("mps", "bf16", False, "fp16"),
+        ("cpu", "fp16", True, "bf16"),
+        ("cpu", "bf16", False, "fp32"),
+        ("cpu", "fp32", True, "fp32"),
+        ("cpu", "int8", False, "int8"),
+        ("cuda", "int8", False, "fp16"),
+    ],
+)
+def test_resolve_precision_fallback(monkeypatch, device, requested, bf16_cpu, expected):
+    monkeypatch.setattr(tb, "_cpu_supports_bf16", lambda: bf16_cpu)
+    assert tb.resolve_precision(_fake_torch(), device, requested) == expected
+
+
+def test_resolve_precision_cuda_without_bf16():
+    assert tb.resolve_precision(_fake_torch(bf16=False), "cuda", "bf16") == "fp16"
+
+
+def test_get_backend_passes_precision(monkeypatch):
+    monkeypatch.setenv("SF_STUB_UPSCALE", "1")
+    monkeypatch.setenv("SCALEFORGE_BACKEND", "torch-eager-cpu")
+    assert get_backend(precision="bf16").precision == "bf16"
+    monkeypatch.setenv("SCALEFORGE_PRECISION", "fp16")
+    assert get_backend().precision == "fp16"
+
+
+def test_precision_in_job_hash(tmp_path):
+    src = tmp_path / "a.png"
+    src.write_bytes(b"123")
+    hashes = set()
+    for precision in ("fp32", "fp16"):
+        db = tmp_path / f"{precision}.db"
+        JobQueue(db, tb.TorchBackend(stub=True, precision=precision)).enqueue([src])
+        with get_conn(db) as conn:
+            hashes.add(conn.execute("SELECT hash FROM jobs").fetchone()[0])
+    assert len(hashes) == 2
+
+
+def test_int8_quantization_in_job_hash(tmp_path, monkeypatch):
+    src = tmp_path / "a.png"
+    src.write_bytes(b"123")
+    hashes = set()
+    for mode in ("dynamic", "static"):
+        monkeypatch.setenv("SCALEFORGE_QUANT_MODE", mode)
+        backend = tb.TorchBackend(stub=True, precision="int8")
+        assert backend.quantization.startswith(mode)
+        db = tmp_path / f"{mode}.db"
+        JobQueue(db, backend).enqueue([src])
+        with get_conn(db) as conn:
+            hashes.add(conn.execute("SELECT hash FROM jobs").fetchone()[0])
+    assert len(hashes) == 2
+    assert tb.TorchBackend(stub=True, precision="fp32").quantization is None
+
+
+def test_companion_inherits_quantization_and_workers(monkeypatch):
+    monkeypatch.setenv("SCALEFORGE_QUANT_MODE", "static")
+    backend = tb.TorchBackend(stub=True, precision="int8", workers=3)
+    backend.companions = {2: "realesr-animevideov3"}
+
+    companion = backend._companion(2)
+
+    assert companion.precision == "int8"
+    assert companion.quantization == backend.quantization
+    assert companion.workers == 3
+    monkeypatch.setenv("SCALEFORGE_QUANT_MODE", "dynamic")
+    assert tb.TorchBackend(stub=True, precision="int8")._companion_options["quantization"] == "dynamic"
+
+
+def test_quantized_weights_cached_beside_fp32(tmp_path):
+    weights = tmp_path / "realesr-general-x4v3.pth"
+    calib = tmp_path / "c.png"
+    calib.write_bytes(b"x")
+    assert quantized_weights_path(weights, "dynamic") == tmp_path / "realesr-general-x4v3.int8-dynamic.pth"
+    static = quantized_weights_path(weights, "static", [calib])
+    assert static.parent == tmp_path
+    assert static != quantized_weights_path(weights, "static")
+
+
+def test_compiled_artifacts_keyed_by_quantization(tmp_path, monkeypatch):
+    from scaleforge.backend.compiled_backend import TorchCompiledBackend
+
+    calib = tmp_path / "c.png"
+    calib.write_bytes(b"x")
+    paths = set()
+    variants = [("fp32", None, None), ("int8", "dynamic", None), ("int8", "static", None), ("int8", "static", [calib])]
+    for precision, mode, images in variants:
+        backend = TorchCompiledBackend(stub=True, precision=precision, quantization=mode, calibration_images=images)
+        backend.model_path = tmp_path / "realesr-general-x4v3.pth"
+        backend._torch = types.SimpleNamespace(__version__="2.3.0+cpu")
+        paths.add(backend.artifact_path((1, 64, 64)))
+    assert len(paths) == 4
@@ -22,3 +22,12 @@ def test_neither_url_nor_urls_fails():
     ok, errors = validate_registry(reg)
     assert not ok
     assert errors
+
+
+def test_arch_entry_validates():
+    info = {"url": "file:///tmp/x", "sha256": "0" * 64}
+    ok, _ = validate_registry({"models": {"m": {"info": info, "arch": {"name": "srvgg", "params": {"num_conv": 16}}}}})
+    assert ok
+    ok, errors = validate_registry({"models": {"m": {"info": info, "arch": {"params": {}}}}})
+    assert not ok
+    assert errors
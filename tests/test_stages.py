@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+from scaleforge.backend.base import Backend, BackendError
+from scaleforge.db.models import JobStatus, get_conn
+from scaleforge.pipeline.queue import JobQueue
+
+
+class StagedBackend(Backend):
+    name = "staged"
+    supports_stages = True
+
+    def __init__(self, delay: float = 0.05, fail: set[str] | None = None, fatal: set[str] | None = None):
+        self.delay = delay
+        self.fail = fail or set()
+        self.fatal = fatal or set()
+        self.threads: dict[str, set[str]] = {"decode": set(), "infer": set(), "encode": set()}
+
+    def _mark(self, stage: str) -> None:
+        self.threads[stage].add(threading.current_thread().name)
+        time.sleep(self.delay)
+
+    async def upscale(self, src: Path, dst: Path, scale: int = 2, tile: int | None = None):
+        raise AssertionError("staged backend should not be called per image")
+
+    def decode(self, src, job=None):
+        self._mark("decode")
+        return src
+
+    def infer(self, src):
+        self._mark("infer")
+        if src.name in self.fatal:
+            raise BackendError("gpu lost")
+        if src.name in self.fail:
+            raise RuntimeError("boom")
+        return src.read_bytes()
+
+    def encode(self, data, dst):
+        self._mark("encode")
+        dst.write_bytes(data)
+
+
+def _make_inputs(tmp_path, n):
+    paths = []
+    for i in range(n):
+        p = tmp_path / f"img{i}.png"
+        p.write_bytes(b"x" * (i + 1))
+        paths.append(p)
+    return paths
+
+
+def _statuses(db):
+    with get_conn(db) as conn:
+        return dict(conn.execute("SELECT src_path, status FROM jobs").fetchall())
+
+
+def test_stages_overlap_and_use_own_pools(tmp_path):
+    inputs = _make_inputs(tmp_path, 6)
+    backend = StagedBackend(delay=0.05)
+    queue = JobQueue(tmp_path / "q.db", backend, decode_workers=2, prefetch=2)
+    queue.enqueue(inputs)
+
+    start = time.perf_counter()
+    asyncio.run(queue.run())
+    elapsed = time.perf_counter() - start
+
+    assert set(_statuses(tmp_path / "q.db").values()) == {JobStatus.DONE}
+    for src in inputs:
+        assert src.with_suffix(".png.x2.png").read_bytes() == src.read_bytes()
+    # Serial execution would take 6 images * 3 stages * 50ms = 0.9s.
+    assert elapsed < 0.7
+    assert all(name.startswith("sf-decode") for name in backend.threads["decode"])
+    assert all(name.startswith("sf-infer") for name in backend.threads["infer"])
+    assert all(name.startswith("sf-encode") for name in backend.threads["encode"])
+
+
+def test_stage_errors_are_recorded(tmp_path, monkeypatch):
+    from scaleforge.pipeline import queue as queue_mod
+
+    real_sleep = asyncio.sleep
+
+    async def no_backoff(delay, *args):
+        await real_sleep(0)
+
+    # Skip the real transient back-off (1 s, then up to ~3 s).
+    monkeypatch.setattr(queue_mod.asyncio, "sleep", no_backoff)
+    monkeypatch.setattr(queue_mod.random, "random", lambda: 0.0)
+    inputs = _make_inputs(tmp_path, 3)
+    backend = StagedBackend(delay=0, fail={"img1.png"})
+    queue = JobQueue(tmp_path / "q.db", backend)
+    queue.enqueue(inputs)
+    asyncio.run(queue.run())
+
+    with get_conn(tmp_path / "q.db") as conn:
+        rows = dict(conn.execute("SELECT src_path, attempts FROM jobs WHERE status=?", (JobStatus.FAILED,)).fetchall())
+    assert rows == {str(inputs[1]): 3}
+    assert _statuses(tmp_path / "q.db")[str(inputs[0])] == JobStatus.DONE
+
+
+def test_fatal_error_stops_feeding(tmp_path):
+    inputs = _make_inputs(tmp_path, 8)
+    backend = StagedBackend(delay=0, fatal={"img0.png"})
+    queue = JobQueue(tmp_path / "q.db", backend, prefetch=1)
+    queue.enqueue(inputs)
+    asyncio.run(queue.run())
+
+    statuses = _statuses(tmp_path / "q.db")
+    assert statuses[str(inputs[0])] == JobStatus.FAILED
+    assert JobStatus.PENDING in statuses.values()
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+from scaleforge.backend.base import Backend
+from scaleforge.db.models import JobStatus, get_conn
+from scaleforge.pipeline.queue import JobQueue
+
+
+class RecordingBackend(Backend):
+    name = "recording"
+
+    def __init__(self):
+        self.first_done = threading.Event()
+
+    async def upscale(self, src: Path, dst: Path, scale: int = 2, tile: int | None = None):
+        dst.write_bytes(src.read_bytes())
+        self.first_done.set()
+
+
+class StagedRecordingBackend(RecordingBackend):
+    supports_stages = True
+
+    def decode(self, src, job=None):
+        return src.read_bytes()
+
+    def infer(self, data):
+        return data
+
+    def encode(self, data, dst):
+        dst.write_bytes(data)
+        self.first_done.set()
+
+
+@pytest.mark.parametrize("backend_cls", [RecordingBackend, StagedRecordingBackend])
+def test_workers_start_before_discovery_finishes(tmp_path, backend_cls):
+    backend = backend_cls()
+    seen_before_end = []
+
+    def slow_discovery():
+        for i in range(4):
+            src = tmp_path / f"img{i}.png"
+            src.write_bytes(bytes([i]) * (i + 1))
+            yield src
+            if i == 1:
+                # The queue must process a job while discovery is still running.
+                seen_before_end.append(backend.first_done.wait(10))
+
+    db = tmp_path / "q.db"
+    queue = JobQueue(db, backend, claim_size=1)
+    result = asyncio.run(queue.run_streaming(slow_discovery(), hash_workers=2))
+
+    assert seen_before_end == [True]
+    assert (result.inserted, result.skipped) == (4, 0)
+    with get_conn(db) as conn:
+        statuses = {s for (s,) in conn.execute("SELECT status FROM jobs")}
+    assert statuses == {JobStatus.DONE}
+    assert all((tmp_path / f"img{i}.png.x2.png").exists() for i in range(4))
@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from scaleforge.backend.tile_cache import TileCache, tile_cache_from_env  # noqa: E402
+from scaleforge.backend.tiling import TiledUpscaler  # noqa: E402
+
+
+def _block(value, size=8):
+    return np.full((size, size, 3), value, dtype=np.float32)
+
+
+def test_key_depends_on_namespace_and_pixels():
+    a, b = _block(0.1), _block(0.2)
+    assert TileCache.key("m|fp32", a) == TileCache.key("m|fp32", a.copy())
+    assert TileCache.key("m|fp32", a) != TileCache.key("m|fp16", a)
+    assert TileCache.key("m|fp32", a) != TileCache.key("m|fp32", b)
+
+
+def test_lru_spills_to_disk_and_reloads(tmp_path):
+    entry = _block(0.0).nbytes
+    cache = TileCache(entry * 4, spill_dir=tmp_path, spill_bytes=1 << 20)
+    for i in range(6):
+        cache.put(f"k{i}", _block(i))
+
+    assert len(cache) == 4
+    assert sorted(p.stem for p in tmp_path.glob("*.npy")) == ["k0", "k1"]
+    np.testing.assert_array_equal(cache.get("k0"), _block(0))
+    assert cache.get("missing") is None
+    # A fresh cache over the same directory finds the spilled tiles.
+    assert TileCache(entry * 4, spill_dir=tmp_path, spill_bytes=1 << 20).get("k1") is not None
+
+
+def test_repeated_tiles_are_inferred_once():
+    calls = []
+
+    def infer(arr):
+        calls.append(arr.shape)
+        return arr.repeat(2, axis=0).repeat(2, axis=1)
+
+    sprite = np.random.default_rng(0).random((32, 32, 3), dtype=np.float32)
+    sheet = np.tile(sprite, (2, 3, 1))
+    engine = TiledUpscaler(infer, 2, tile=32, tile_pad=0, cache=TileCache(1 << 24), cache_namespace="test")
+
+    stats = {}
+    out = engine.run(sheet, stats=stats)
+    assert len(calls) == 1
+    assert stats == {"tiles": 6, "skipped": 0, "cache_hits": 5, "cache_misses": 1}
+    np.testing.assert_array_equal(out, sheet.repeat(2, axis=0).repeat(2, axis=1))
+
+    stats = {}
+    engine.run(sheet[:32, :64], stats=stats)
+    assert len(calls) == 1 and stats["cache_hits"] == 2
+
+
+def test_env_disables_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv("SCALEFORGE_TILE_CACHE_MB", "0")
+    assert tile_cache_from_env(tmp_path) is None
+    monkeypatch.setenv("SCALEFORGE_TILE_CACHE_MB", "1")
+    monkeypatch.setenv("SCALEFORGE_TILE_CACHE_DISK_MB", "2")
+    cache = tile_cache_from_env(tmp_path / "tiles")
+    assert cache.spill_dir == tmp_path / "tiles" and cache.spill_bytes == 2 << 20
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import pytest
+
+from scaleforge.backend.tiling import TiledUpscaler, auto_tile_size, plan_tiles
+
+
+def test_plan_tiles_covers_image():
+    tiles = plan_tiles(201, 130, 64, 10)
+    covered = sum((t.x1 - t.x0) * (t.y1 - t.y0) for t in tiles)
+    assert covered == 201 * 130
+    assert all(t.x1 - t.x0 <= 64 and t.y1 - t.y0 <= 64 for t in tiles)
+    assert all(t.px0 >= 0 and t.py0 >= 0 and t.px1 <= 201 and t.py1 <= 130 for t in tiles)
+
+
+def test_plan_tiles_single_when_disabled():
+    assert len(plan_tiles(300, 200, 0)) == 1
+    assert len(plan_tiles(300, 200, 512)) == 1
+
+
+def test_plan_tiles_rejects_tiny_tile():
+    with pytest.raises(ValueError):
+        plan_tiles(300, 200, 16, 10)
+
+
+def test_auto_tile_size_fits_budget():
+    assert auto_tile_size(64, 64, 1 << 30) == 0
+    tile = auto_tile_size(8000, 8000, 256 * 1024 * 1024)
+    assert 64 <= tile < 8000
+    assert tile % 8 == 0
+    assert auto_tile_size(8000, 8000, None) == 0
+
+
+@pytest.mark.parametrize("tile,pad", [(64, 10), (50, 4), (100, 0)])
+def test_tiled_matches_untiled(tile, pad):
+    np = pytest.importorskip("numpy")
+
+    def infer(arr):
+        return arr.repeat(4, axis=0).repeat(4, axis=1)
+
+    img = np.random.default_rng(0).random((130, 201, 3), dtype=np.float32)
+    out = TiledUpscaler(infer, 4, tile=tile, tile_pad=pad).run(img)
+    assert out.shape == (520, 804, 3)
+    assert np.allclose(out, infer(img), atol=1e-5)
+
+
+def test_flat_and_transparent_tiles_skip_inference():
+    np = pytest.importorskip("numpy")
+    calls = []
+
+    def infer(arr):
+        calls.append(arr.shape)
+        return arr.repeat(2, axis=0).repeat(2, axis=1)
+
+    img = np.full((128, 192, 3), 0.5, dtype=np.float32)
+    img[:64, :64] = np.random.default_rng(0).random((64, 64, 3))
+    alpha = np.full((128, 192), 255, dtype=np.uint8)
+    alpha[:, 128:] = 0
+    img[:, 140:] = np.random.default_rng(1).random((128, 52, 3))  # noisy but transparent
+
+    stats = {}
+    engine = TiledUpscaler(infer, 2, tile=64, tile_pad=0, skip_threshold=1 / 255)
+    out = engine.run(img, alpha=alpha, stats=stats)
+
+    assert stats == {"tiles": 6, "skipped": 5}
+    assert calls == [(64, 64, 3)]
+    assert np.allclose(out[128:, :256], 0.5)
+
+
+def test_flat_tiles_uses_padded_region():
+    np = pytest.importorskip("numpy")
+    from scaleforge.backend.tiling import flat_tiles
+
+    img = np.zeros((64, 128, 3), dtype=np.float32)
+    img[:, 70] = 1.0  # just outside the first tile's core, inside its padding
+    tiles = plan_tiles(128, 64, 64, 8)
+    assert flat_tiles(img, tiles, 1 / 255) == [False, False]
+    assert flat_tiles(img, plan_tiles(128, 64, 64, 0), 1 / 255) == [True, False]
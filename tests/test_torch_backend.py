@@ -21,6 +21,7 @@ def stub_heavy_deps(tmp_path, monkeypatch):
     torch_stub = types.ModuleType("torch")
     torch_stub.cuda = types.SimpleNamespace(is_available=lambda: False)
     torch_stub.load = lambda path, map_location=None: {}
+    torch_stub.float32 = "float32"
     monkeypatch.setitem(sys.modules, "torch", torch_stub)
 
     # realesrgan stub
@@ -35,20 +36,16 @@ def stub_heavy_deps(tmp_path, monkeypatch):
     realesrgan_stub.RealESRGANer = _DummyUpscaler
     monkeypatch.setitem(sys.modules, "realesrgan", realesrgan_stub)
 
-    # basicsr stub
-    rrdbnet_stub = types.ModuleType("basicsr.archs.rrdbnet_arch")
-    class _DummyRRDBNet:  # noqa: D401
-        def __init__(self, *args, **kwargs):  # noqa: D401
-            pass
-
+    # network stub (replaces the registry-built architecture)
+    class _DummyNet:  # noqa: D401
         def load_state_dict(self, state_dict, strict=False):  # noqa: D401
             return [], []
 
-        def to(self, device):  # noqa: D401
+        def to(self, device, dtype=None):  # noqa: D401
             return self
 
-    rrdbnet_stub.RRDBNet = _DummyRRDBNet
-    monkeypatch.setitem(sys.modules, "basicsr.archs.rrdbnet_arch", rrdbnet_stub)
+        def eval(self):  # noqa: D401
+            return self
 
     # Fake cached model so download step is skipped
     cache_dir = tmp_path / "models"
@@ -60,6 +57,15 @@ def stub_heavy_deps(tmp_path, monkeypatch):
     # Patch expected checksum to match dummy file
     from scaleforge.backend import torch_backend as tb
 
+    monkeypatch.setattr(tb, "build_model", lambda torch, spec: _DummyNet())
+
+    # Nearest-neighbour "network" so the tiled engine runs without torch ops
+    monkeypatch.setattr(
+        tb.TorchRealESRGANBackend,
+        "_forward",
+        lambda self, arr: arr.repeat(4, axis=0).repeat(4, axis=1),
+    )
+
     monkeypatch.setattr(
         tb.TorchRealESRGANBackend,
         "_MODEL_SHA256",
@@ -83,3 +89,18 @@ async def test_upscale_roundtrip(tmp_path):
 
     assert dst.exists()
 
+
+@pytest.mark.asyncio
+async def test_upscale_tiled_per_call(tmp_path):
+    """An explicit tile size splits the input and still yields a full image."""
+
+    from scaleforge.backend.torch_backend import TorchRealESRGANBackend
+
+    src = tmp_path / "in.png"
+    dst = tmp_path / "out.png"
+    Image.new("RGB", (100, 70), "white").save(src)
+
+    backend = TorchRealESRGANBackend(prefer_gpu=False)
+    await backend.upscale(src, dst, tile=32)
+
+    assert Image.open(dst).size == (400, 280)
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+from scaleforge.backend import selector, tuner
+from scaleforge.backend.base import Backend
+from scaleforge.backend.vulkan_backend import VulkanBackend
+
+
+class FakeBackend(Backend):
+    """Records the tile it ran with; tile 256 "runs out of memory"."""
+
+    name = "fake"
+    supports_batch = True
+
+    def __init__(self):
+        self.tile = None
+        self.calls = []
+
+    async def upscale(self, src, dst, scale=2, tile=None):
+        if tile == 256:
+            raise RuntimeError("out of memory")
+        self.calls.append(tile)
+        dst.write_bytes(b"x")
+
+    async def upscale_batch(self, items):
+        for item in items:
+            item.dst.write_bytes(b"x")
+        return [None] * len(items)
+
+    def is_available(self):
+        return True
+
+
+def test_tune_persists_best_settings(tmp_path, monkeypatch):
+    caps = tmp_path / "gpu_caps.json"
+    caps.write_text(json.dumps({"vendor": "none"}))
+    monkeypatch.setattr(tuner, "memory_budget", lambda: None)
+    backend = FakeBackend()
+
+    settings, results = tuner.tune_backend(
+        backend, "torch-eager-cpu", "m", tiles=(0, 128, 256), batch_sizes=(1, 2), image_size=(16, 16), path=caps
+    )
+
+    assert [r.tile for r in results] == [0, 128, 256, settings["tile"]]
+    assert results[2].error == "RuntimeError: out of memory"
+    assert settings["tile"] in (0, 128)
+    assert backend.tile is None  # restored after the sweep
+    stored = json.loads(caps.read_text())
+    assert stored["vendor"] == "none"
+    assert stored["tuning"]["torch-eager-cpu:m"]["tile"] == settings["tile"]
+    assert tuner.load_tuning("torch-eager-cpu", "m", caps) == stored["tuning"]["torch-eager-cpu:m"]
+    assert tuner.load_tuning("torch-eager-cpu", "other", caps) is None
+
+
+def test_selector_applies_stored_tuning(tmp_path, monkeypatch):
+    caps = tmp_path / "gpu_caps.json"
+    monkeypatch.setenv("SCALEFORGE_CAPS", str(caps))
+    monkeypatch.delenv("SF_STUB_UPSCALE", raising=False)
+    tuner.save_tuning("ncnn-ncnn-vulkan", None, {"tile": 192, "batch_size": 1, "workers": 1}, caps)
+
+    backend = selector.get_backend(backend="ncnn-ncnn-vulkan", cache=False)
+
+    assert isinstance(backend, VulkanBackend)
+    assert backend.tile == 192
+
+
+def test_first_run_hook_tunes_once(tmp_path, monkeypatch):
+    monkeypatch.setenv("SCALEFORGE_CAPS", str(tmp_path / "gpu_caps.json"))
+    monkeypatch.setattr(tuner, "detect_gpu_caps", lambda: {})
+    monkeypatch.setattr(tuner, "memory_budget", lambda: None)
+    monkeypatch.delenv("SCALEFORGE_AUTOTUNE", raising=False)
+    untouched = FakeBackend()
+    selector._first_run_tune(untouched, "fake-cpu", None)
+    assert untouched.calls == []  # opt-in only
+
+    monkeypatch.setenv("SCALEFORGE_AUTOTUNE", "1")
+    backend = FakeBackend()
+    selector._first_run_tune(backend, "fake-cpu", None)
+
+    assert backend.tile in tuner.QUICK_TILES
+    assert tuner.load_tuning("fake-cpu", None)["tile"] == backend.tile
+
+
+def test_measure_reports_memory_of_each_configuration(tmp_path):
+    if tuner._rss_mb() is None:
+        pytest.skip("resident memory not readable here")
+
+    class Hungry(FakeBackend):
+        async def upscale(self, src, dst, scale=2, tile=None):
+            block = b"\x01" * (tile << 20)  # ``tile`` MiB, touched
+            time.sleep(0.05)
+            del block
+            dst.write_bytes(b"x")
+
+    src = tmp_path / "in.png"
+    src.write_bytes(b"x")
+    backend = Hungry()
+    peaks = [
+        asyncio.run(tuner._measure(backend, [src], tmp_path, tile=t, batch_size=1, runs=1, megapixels=1))[1]
+        for t in (96, 8, 96)
+    ]
+    assert peaks[0] > 64 and peaks[2] > 64
+    assert peaks[1] < 48
+
+
+# Holds ``argv[1]`` MiB of touched memory until stdin closes.
+_HOLD_MEMORY = "import sys; block = b'\\x01' * (int(sys.argv[1]) << 20); print('ready', flush=True); sys.stdin.read()"
+
+
+def test_worker_sweep_counts_pool_processes(tmp_path, monkeypatch):
+    if tuner._rss_mb() is None:
+        pytest.skip("resident memory not readable here")
+    monkeypatch.setattr(tuner, "memory_budget", lambda: 64 << 20)
+
+    class Pooled(FakeBackend):
+        """Forks one 96 MiB worker per extra ``workers`` at construction."""
+
+        def __init__(self, workers=1):
+            super().__init__()
+            self.pool = [
+                subprocess.Popen([sys.executable, "-c", _HOLD_MEMORY, "96"], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+                for _ in range(workers - 1)
+            ]
+            for proc in self.pool:
+                proc.stdout.readline()
+
+        def close(self):
+            for proc in self.pool:
+                proc.stdin.close()
+                proc.wait()
+
+    settings, results = tuner.tune_backend(
+        Pooled(),
+        "fake-cpu",
+        tiles=(0,),
+        batch_sizes=(1,),
+        workers=(2,),
+        factory=Pooled,
+        image_size=(16, 16),
+        save=False,
+    )
+
+    assert results[-1].workers == 2 and results[-1].peak_mb > 64
+    assert settings["workers"] == 1  # the pool does not fit the budget
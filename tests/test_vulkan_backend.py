@@ -0,0 +1,188 @@
+import asyncio
+import json
+import os
+import stat
+import sys
+import textwrap
+
+import pytest
+
+from scaleforge.backend.base import BackendError, BatchItem
+from scaleforge.backend.vulkan_backend import VulkanBackend
+from scaleforge.db.models import JobStatus, get_conn
+from scaleforge.pipeline.queue import JobQueue
+from PIL import Image  # after scaleforge, which puts the bundled stub on the path
+
+FAKE_BINARY = textwrap.dedent(
+    """\
+    #!{python}
+    import json, os, sys, time
+    from pathlib import Path
+
+    args = sys.argv[1:]
+    opts = dict(zip(args[::2], args[1::2]))
+    start = time.monotonic()
+    time.sleep(float(os.environ.get("FAKE_VULKAN_SLEEP", "0")))
+    src, dst = Path(opts["-i"]), Path(opts["-o"])
+    failed = False
+    for f in sorted(src.iterdir()) if src.is_dir() else [src]:
+        data = f.read_bytes()
+        if data.startswith(b"bad"):
+            print(f"decode failed: {{f.name}}", file=sys.stderr)
+            failed = True
+            continue
+        out = dst / (f.stem + "." + opts.get("-f", "png")) if src.is_dir() else dst
+        width, sep, height = data.partition(b"x")
+        if sep and width.isdigit() and height.isdigit():  # stub PIL image: scale its size
+            factor = int(opts["-s"])
+            out.write_bytes(b"%dx%d" % (int(width) * factor, int(height) * factor))
+        else:
+            out.write_bytes(data + b"@x" + opts["-s"].encode())
+    with open(os.environ["FAKE_VULKAN_LOG"], "a") as log:
+        log.write(json.dumps({{"args": args, "start": start, "end": time.monotonic()}}) + "\\n")
+    sys.exit(1 if failed else 0)
+    """
+)
+
+
+@pytest.fixture
+def fake_binary(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    exe = bin_dir / "realesrgan-ncnn-vulkan"
+    exe.write_text(FAKE_BINARY.format(python=sys.executable))
+    exe.chmod(exe.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "calls.log"
+    log.touch()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_VULKAN_LOG", str(log))
+    return lambda: [json.loads(line)["args"] for line in log.read_text().splitlines()]
+
+
+def _inputs(tmp_path, contents):
+    paths = []
+    for name, data in contents.items():
+        path = tmp_path / name
+        path.write_bytes(data)
+        paths.append(path)
+    return paths
+
+
+def test_batch_runs_one_process(tmp_path, fake_binary):
+    srcs = _inputs(tmp_path, {f"{i}.png": f"img{i}".encode() for i in range(3)})
+    items = [BatchItem(src, tmp_path / "out" / f"{src.stem}.x2.png") for src in srcs]
+
+    results = asyncio.run(VulkanBackend(tile=128).upscale_batch(items))
+
+    assert results == [None, None, None]
+    calls = fake_binary()
+    assert len(calls) == 1
+    assert calls[0][calls[0].index("-t") + 1] == "128"
+    assert (tmp_path / "out" / "1.x2.png").read_bytes() == b"img1@x2"
+    assert not any(p.name.startswith(".sf-vulkan-") for p in (tmp_path / "out").iterdir())
+
+
+def test_batch_partial_failure(tmp_path, fake_binary):
+    srcs = _inputs(tmp_path, {"a.png": b"ok", "b.png": b"bad", "c.png": b"ok"})
+    items = [BatchItem(src, tmp_path / f"{src.name}.x2.png") for src in srcs]
+
+    results = asyncio.run(VulkanBackend().upscale_batch(items))
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], RuntimeError) and not isinstance(results[1], BackendError)
+    assert "decode failed" in str(results[1])
+    assert not (tmp_path / "b.png.x2.png").exists()
+
+
+def test_batch_total_failure_is_fatal(tmp_path, fake_binary):
+    srcs = _inputs(tmp_path, {"a.png": b"bad", "b.png": b"bad"})
+    items = [BatchItem(src, tmp_path / f"{src.name}.x2.png") for src in srcs]
+
+    results = asyncio.run(VulkanBackend().upscale_batch(items))
+
+    assert all(isinstance(r, BackendError) for r in results)
+
+
+def test_job_queue_batches_vulkan_jobs(tmp_path, fake_binary):
+    srcs = _inputs(tmp_path, {f"{i}.png": f"img{i}".encode() for i in range(5)})
+    db = tmp_path / "sf.db"
+    queue = JobQueue(db, VulkanBackend(), batch_max_wait=0.01)
+    queue.enqueue(srcs, scale=4)
+    asyncio.run(queue.run())
+
+    assert len(fake_binary()) == 1
+    assert (tmp_path / "3.png.x4.png").read_bytes() == b"img3@x4"
+    with get_conn(db) as conn:
+        statuses = {row[0] for row in conn.execute("SELECT status FROM jobs")}
+    assert statuses == {JobStatus.DONE}
+
+
+class _Job:
+    def __init__(self, **metadata):
+        self.metadata = metadata
+
+
+def test_flags_from_job_metadata_and_config(tmp_path, fake_binary):
+    (src,) = _inputs(tmp_path, {"a.png": b"img"})
+    backend = VulkanBackend(tile=64, threads="1:2:2", gpus="1")
+
+    job = _Job(model="realesrgan-x4plus", scale=4, tile=200)
+    asyncio.run(backend.upscale(src, tmp_path / "out.png", job=job))
+
+    opts = dict(zip(fake_binary()[0][::2], fake_binary()[0][1::2]))
+    assert opts["-n"] == "realesrgan-x4plus"
+    assert opts["-s"] == "4"
+    assert opts["-t"] == "200"
+    assert opts["-j"] == "1:2:2"
+    assert opts["-g"] == "1"
+
+
+@pytest.mark.skipif(hasattr(Image, "fromarray"), reason="fake binary writes stub PIL images")
+@pytest.mark.parametrize(
+    ("metadata", "passes", "output"),
+    [
+        ({"scale": 1.5}, ["2"], b"6x3"),
+        ({"scale": 8}, ["2", "4"], b"32x16"),
+        ({"target": {"width": 12, "height": 12}}, ["3"], b"12x6"),
+        ({"target": {"width": 10, "height": 4, "mode": "stretch"}}, ["3"], b"10x4"),
+    ],
+)
+def test_non_native_jobs_run_native_passes(tmp_path, fake_binary, metadata, passes, output):
+    (src,) = _inputs(tmp_path, {"a.png": b"4x2"})
+    backend = VulkanBackend()
+    job = _Job(**metadata)
+
+    asyncio.run(backend.upscale(src, tmp_path / "out" / "a.png", job=job))
+
+    assert [call[call.index("-s") + 1] for call in fake_binary()] == passes
+    assert (tmp_path / "out" / "a.png").read_bytes() == output
+    assert list((tmp_path / "out").iterdir()) == [tmp_path / "out" / "a.png"]
+    assert backend.batch_key(src, job) is None
+
+
+def test_native_jobs_share_a_batch_key(tmp_path):
+    backend = VulkanBackend()
+    assert backend.batch_key(tmp_path / "a.png", _Job(scale=3.0)) == backend.batch_key(tmp_path / "b.png", _Job(scale=3))
+
+
+def test_invalid_thread_spec():
+    with pytest.raises(ValueError):
+        VulkanBackend(threads="2")
+
+
+def test_processes_bounded_per_gpu(tmp_path, fake_binary, monkeypatch):
+    monkeypatch.setenv("FAKE_VULKAN_SLEEP", "0.2")
+    srcs = _inputs(tmp_path, {f"{i}.png": b"img" for i in range(6)})
+    backend = VulkanBackend(gpus=[0, 1], procs_per_gpu=1)
+
+    async def main():
+        await asyncio.gather(*(backend.upscale(src, tmp_path / f"{src.name}.out") for src in srcs))
+
+    asyncio.run(main())
+
+    log = [json.loads(line) for line in (tmp_path / "calls.log").read_text().splitlines()]
+    assert len(log) == 6
+    for gpu in ("0", "1"):
+        runs = sorted((r["start"], r["end"]) for r in log if r["args"][r["args"].index("-g") + 1] == gpu)
+        assert len(runs) == 3
+        assert all(prev_end <= start for (_, prev_end), (start, _) in zip(runs, runs[1:]))